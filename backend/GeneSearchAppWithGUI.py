@@ -1,47 +1,105 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import os
 import glob
-from typing import Dict, List, Optional
-import numpy as np
+import queue
+import sys
+import threading
+import urllib.request
+from typing import List, Optional
+
+from organ_store import OrganStore, organ_from_workbook
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+# Snapshot written by the server (see ORGAN_SNAPSHOT_PATH in server.py): a file path or an
+# http(s) URL such as http://localhost:8000/api/organ/snapshot. Falls back to backend/data/*.xlsx.
+DEFAULT_SNAPSHOT = os.getenv(
+    "ORGAN_SNAPSHOT_PATH", os.path.join(BACKEND_DIR, "static", "organ_snapshot.npz")
+)
+DATA_DIR = os.path.join(BACKEND_DIR, "data")
+FILTER_LIMIT = 500  # combobox entries shown while typing
+
 
 class GeneSearchApp:
-    def __init__(self, root):
+    def __init__(self, root, snapshot: Optional[str] = None):
         self.root = root
         self.root.title("ChemoTox (Berezin Lab)")
         self.root.geometry("800x600")
         
-        # Load data
-        self.data = self.load_data()
-        self.all_genes = self.load_all_genes()
+        self.store: Optional[OrganStore] = None
+        self.all_genes: List[str] = []
+        self._events: "queue.Queue" = queue.Queue()
         
-        # Create GUI elements
+        # Create GUI elements, then load data in the background
         self.create_widgets()
-        
-    def load_data(self) -> Dict[str, pd.DataFrame]:
-        """Load data from Excel files in the data directory"""
-        data = {}
-        data_dir = "data"
-        if os.path.exists(data_dir):
-            excel_files = glob.glob(os.path.join(data_dir, "*.xlsx"))
-            for file_path in excel_files:
-                organ_name = os.path.splitext(os.path.basename(file_path))[0]
-                try:
-                    data[organ_name] = pd.read_excel(file_path)
-                except Exception as e:
-                    print(f"Error loading {file_path}: {e}")
-        return data
+        self.set_controls_enabled(False)
+        threading.Thread(
+            target=self.load_data, args=(snapshot or DEFAULT_SNAPSHOT,), daemon=True
+        ).start()
+        self.root.after(50, self.poll_loader)
+        
+    def load_data(self, snapshot: str):
+        """Background thread: server snapshot if available, else parse the organ workbooks."""
+        def progress(done, total, organ):
+            self._events.put(("progress", done, total, f"Loaded {organ}"))
+        
+        try:
+            if snapshot.startswith(("http://", "https://")):
+                self._events.put(("progress", 0, 1, f"Downloading {snapshot}"))
+                with urllib.request.urlopen(snapshot, timeout=60) as resp:
+                    store = OrganStore.load_snapshot(resp.read(), progress=progress)
+            elif os.path.isfile(snapshot):
+                store = OrganStore.load_snapshot(snapshot, progress=progress)
+            else:
+                organs = {}
+                excel_files = sorted(glob.glob(os.path.join(DATA_DIR, "*.xlsx")))
+                for i, file_path in enumerate(excel_files):
+                    try:
+                        cols = organ_from_workbook(file_path)
+                        if cols is not None:
+                            organs[cols.organ] = cols
+                    except Exception as e:
+                        print(f"Error loading {file_path}: {e}")
+                    progress(i + 1, len(excel_files), os.path.basename(file_path))
+                store = OrganStore(organs)
+            self._events.put(("done", store))
+        except Exception as e:
+            self._events.put(("error", str(e)))
     
-    def load_all_genes(self) -> List[str]:
-        """Load all unique gene symbols from all Excel files"""
-        all_genes = set()
-        for organ_data in self.data.values():
-            if 'Gene_symbol' in organ_data.columns:
-                all_genes.update(organ_data['Gene_symbol'].dropna().unique())
-        return sorted(list(all_genes))
+    def poll_loader(self):
+        """Apply loader events on the Tk thread (widgets are not thread-safe)."""
+        try:
+            while True:
+                event = self._events.get_nowait()
+                if event[0] == "progress":
+                    _, done, total, text = event
+                    self.progress['maximum'] = max(total, 1)
+                    self.progress['value'] = done
+                    self.status_var.set(text)
+                elif event[0] == "done":
+                    self.store = event[1]
+                    self.all_genes = self.store.symbols
+                    self.gene_dropdown['values'] = self.all_genes[:FILTER_LIMIT]
+                    self.status_var.set(
+                        f"{len(self.all_genes)} genes in {len(self.store.organs)} organs"
+                    )
+                    self.progress.pack_forget()
+                    self.set_controls_enabled(True)
+                    return
+                elif event[0] == "error":
+                    self.status_var.set("Failed to load data")
+                    messagebox.showerror("Error", f"Could not load gene data: {event[1]}")
+                    return
+        except queue.Empty:
+            pass
+        self.root.after(50, self.poll_loader)
+    
+    def set_controls_enabled(self, enabled: bool):
+        state = '!disabled' if enabled else 'disabled'
+        for widget in [self.gene_dropdown] + self.buttons:
+            widget.state([state])
     
     def create_widgets(self):
         """Create the GUI widgets"""
@@ -53,21 +111,29 @@ class GeneSearchApp:
         ttk.Label(input_frame, text="Gene Symbol:").pack(side='left')
         self.gene_var = tk.StringVar()
         self.gene_dropdown = ttk.Combobox(input_frame, textvariable=self.gene_var, 
-                                         values=self.all_genes, width=20)
+                                         values=[], width=20)
         self.gene_dropdown.pack(side='left', padx=(10, 0))
         self.gene_dropdown.bind('<KeyRelease>', self.filter_genes)
         
-        # Search button
-        ttk.Button(input_frame, text="Search", 
-                  command=self.search_gene).pack(side='left', padx=(10, 0))
-        
-        # Additional buttons
-        ttk.Button(input_frame, text="Show Fold Change", 
-                  command=self.show_fold_change).pack(side='left', padx=(10, 0))
-        ttk.Button(input_frame, text="Show LSmean (Control)", 
-                  command=self.show_lsmean_control).pack(side='left', padx=(10, 0))
-        ttk.Button(input_frame, text="Show LSmean (10mg/kg)", 
-                  command=self.show_lsmean_10mgkg).pack(side='left', padx=(10, 0))
+        # Search and plot buttons
+        self.buttons = []
+        for text, command in (
+            ("Search", self.search_gene),
+            ("Show Fold Change", self.show_fold_change),
+            ("Show LSmean (Control)", self.show_lsmean_control),
+            ("Show LSmean (10mg/kg)", self.show_lsmean_10mgkg),
+        ):
+            button = ttk.Button(input_frame, text=text, command=command)
+            button.pack(side='left', padx=(10, 0))
+            self.buttons.append(button)
+        
+        # Loading status
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(fill='x', padx=20)
+        self.status_var = tk.StringVar(value="Loading gene data...")
+        ttk.Label(status_frame, textvariable=self.status_var).pack(side='left')
+        self.progress = ttk.Progressbar(status_frame, mode='determinate', length=200)
+        self.progress.pack(side='right')
         
         # Results table
         table_frame = ttk.Frame(self.root)
@@ -96,10 +162,11 @@ class GeneSearchApp:
         self.canvas.get_tk_widget().pack(fill='both', expand=True, padx=20, pady=10)
         
     def filter_genes(self, event=None):
-        """Filter genes in dropdown based on input"""
-        search_term = self.gene_var.get().lower()
-        filtered_genes = [gene for gene in self.all_genes if search_term in gene.lower()]
-        self.gene_dropdown['values'] = filtered_genes
+        """Filter genes in dropdown by prefix (binary search over the sorted symbol index)"""
+        if self.store is None:
+            return
+        search_term = self.gene_var.get()
+        self.gene_dropdown['values'] = self.store.symbols_with_prefix(search_term, limit=FILTER_LIMIT)
     
     def search_gene(self):
         """Search for a gene and display results in table"""
@@ -112,23 +179,17 @@ class GeneSearchApp:
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        results = []
-        for organ_name, organ_data in self.data.items():
-            if 'Gene_symbol' in organ_data.columns:
-                matches = organ_data[organ_data['Gene_symbol'].str.lower() == gene_symbol.lower()]
-                if not matches.empty:
-                    row = matches.iloc[0]
-                    results.append((
-                        organ_name,
-                        row.get('Gene_symbol', ''),
-                        row.get('Gene_name', ''),
-                        row.get('P_value_10_mgkg_vs_control', ''),
-                        row.get('FDR_step_up_10_mgkg_vs_control', ''),
-                        row.get('Ratio_10_mgkg_vs_control', ''),
-                        row.get('Fold_change_10_mgkg_vs_control', ''),
-                        row.get('LSMean10mgkg_10_mgkg_vs_control', ''),
-                        row.get('LSMeancontrol_10_mgkg_vs_control', '')
-                    ))
+        results = [
+            (
+                row['organ'],
+                row['gene_symbol'],
+                row['gene_name'],
+                *('' if row[field] is None else row[field] for field in (
+                    'p_value', 'fdr_step_up', 'ratio', 'fold_change', 'lsmean_10mgkg', 'lsmean_control'
+                )),
+            )
+            for row in self.store.gene_rows(gene_symbol)
+        ]
         
         if not results:
             self.tree.insert('', 'end', values=('No Results', '', '', '', '', '', '', '', ''))
@@ -136,130 +197,52 @@ class GeneSearchApp:
             for result in results:
                 self.tree.insert('', 'end', values=result)
     
-    def show_fold_change(self):
-        """Show fold change vs organ plot"""
+    def plot_metric(self, field: str, title: str, ylabel: str, color: Optional[str] = None):
+        """Bar chart of one value per organ (color None = blue/red by sign)"""
         gene_symbol = self.gene_var.get()
         if not gene_symbol:
             messagebox.showwarning("Warning", "Please enter a gene symbol")
             return
         
-        organs = []
-        fold_changes = []
-        fdr_values = []
-        colors = []
-        
-        for organ_name, organ_data in self.data.items():
-            if 'Gene_symbol' in organ_data.columns:
-                matches = organ_data[organ_data['Gene_symbol'].str.lower() == gene_symbol.lower()]
-                if not matches.empty:
-                    row = matches.iloc[0]
-                    fold_change = row.get('Fold_change_10_mgkg_vs_control', 0)
-                    fdr = row.get('FDR_step_up_10_mgkg_vs_control', 0)
-                    
-                    organs.append(organ_name)
-                    fold_changes.append(fold_change)
-                    fdr_values.append(fdr)
-                    
-                    # Color based on fold change sign
-                    if fold_change >= 0:
-                        colors.append('blue')
-                    else:
-                        colors.append('red')
-        
-        if not organs:
+        rows = [row for row in self.store.gene_rows(gene_symbol) if row[field] is not None]
+        if not rows:
             self.ax.clear()
             self.ax.set_title('No results found')
             self.canvas.draw()
             return
         
+        organs = [row['organ'] for row in rows]
+        values = [row[field] for row in rows]
+        colors = color or ['blue' if v >= 0 else 'red' for v in values]
+        
         # Create the plot
         self.ax.clear()
-        bars = self.ax.bar(organs, fold_changes, color=colors)
-        self.ax.set_title(f'Fold Change for {gene_symbol}')
+        self.ax.bar(organs, values, color=colors)
+        self.ax.set_title(f'{title} for {gene_symbol}')
         self.ax.set_xlabel('Organ')
-        self.ax.set_ylabel('Fold Change')
+        self.ax.set_ylabel(ylabel)
         self.ax.tick_params(axis='x', rotation=45)
         self.ax.grid(True, axis='y')
         plt.tight_layout()
         self.canvas.draw()
     
+    def show_fold_change(self):
+        """Show fold change vs organ plot"""
+        self.plot_metric('fold_change', 'Fold Change', 'Fold Change')
+    
     def show_lsmean_control(self):
         """Show LSmean(Control) vs organ plot"""
-        gene_symbol = self.gene_var.get()
-        if not gene_symbol:
-            messagebox.showwarning("Warning", "Please enter a gene symbol")
-            return
-        
-        organs = []
-        lsmeans = []
-        
-        for organ_name, organ_data in self.data.items():
-            if 'Gene_symbol' in organ_data.columns:
-                matches = organ_data[organ_data['Gene_symbol'].str.lower() == gene_symbol.lower()]
-                if not matches.empty:
-                    row = matches.iloc[0]
-                    lsmean = row.get('LSMeancontrol_10_mgkg_vs_control', 0)
-                    organs.append(organ_name)
-                    lsmeans.append(lsmean)
-        
-        if not organs:
-            self.ax.clear()
-            self.ax.set_title('No results found')
-            self.canvas.draw()
-            return
-        
-        # Create the plot
-        self.ax.clear()
-        self.ax.bar(organs, lsmeans, color='blue')
-        self.ax.set_title(f'LSmean(Control) for {gene_symbol}')
-        self.ax.set_xlabel('Organ')
-        self.ax.set_ylabel('LSmean (Control)')
-        self.ax.tick_params(axis='x', rotation=45)
-        self.ax.grid(True, axis='y')
-        plt.tight_layout()
-        self.canvas.draw()
+        self.plot_metric('lsmean_control', 'LSmean(Control)', 'LSmean (Control)', color='blue')
     
     def show_lsmean_10mgkg(self):
         """Show LSmean(10mg/kg) vs organ plot"""
-        gene_symbol = self.gene_var.get()
-        if not gene_symbol:
-            messagebox.showwarning("Warning", "Please enter a gene symbol")
-            return
-        
-        organs = []
-        lsmeans = []
-        
-        for organ_name, organ_data in self.data.items():
-            if 'Gene_symbol' in organ_data.columns:
-                matches = organ_data[organ_data['Gene_symbol'].str.lower() == gene_symbol.lower()]
-                if not matches.empty:
-                    row = matches.iloc[0]
-                    lsmean = row.get('LSMean10mgkg_10_mgkg_vs_control', 0)
-                    organs.append(organ_name)
-                    lsmeans.append(lsmean)
-        
-        if not organs:
-            self.ax.clear()
-            self.ax.set_title('No results found')
-            self.canvas.draw()
-            return
-        
-        # Create the plot
-        self.ax.clear()
-        self.ax.bar(organs, lsmeans, color='green')
-        self.ax.set_title(f'LSmean(10mg/kg) for {gene_symbol}')
-        self.ax.set_xlabel('Organ')
-        self.ax.set_ylabel('LSmean (10mg/kg)')
-        self.ax.tick_params(axis='x', rotation=45)
-        self.ax.grid(True, axis='y')
-        plt.tight_layout()
-        self.canvas.draw()
+        self.plot_metric('lsmean_10mgkg', 'LSmean(10mg/kg)', 'LSmean (10mg/kg)', color='green')
 
 def main():
-    """Main function to run the application"""
+    """Main function to run the application (optional argument: snapshot path or URL)"""
     root = tk.Tk()
-    app = GeneSearchApp(root)
+    app = GeneSearchApp(root, snapshot=sys.argv[1] if len(sys.argv) > 1 else None)
     root.mainloop()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,287 @@
+"""Cross-organ statistics with two interchangeable backends.
+
+MongoCrossOrganStats pushes the work into aggregation pipelines (requires the typed numeric
+schema, see scripts/migrate_gene_data_numeric.py, and refuses to run without it); InMemoryCrossOrganStats computes the same
+answers from the columnar OrganStore when MongoDB is not available. Both return plain dicts
+in the same shape so endpoints and the benchmark script can swap them freely.
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from organ_store import OrganStore
+from organ_stats import fdr_matrix, finite_or_none, metric_matrix
+
+FDR_KEY = "fdr_step_up_10_mgkg_vs_control"
+FOLD_KEY = "fold_change_10_mgkg_vs_control"
+
+
+# Case-insensitive comparison for gene_symbol; the gene_symbol_ci index is built with it, so
+# symbol lookups under this collation are index-backed.
+SYMBOL_COLLATION = {"locale": "en", "strength": 2}
+
+
+class UntypedSchemaError(RuntimeError):
+    """gene_data still holds string-typed numeric columns (scripts/migrate_gene_data_numeric.py not run)."""
+
+
+def _dedupe_stages(fields: Sequence[str]) -> List[Dict]:
+    """One row per (organ, lower-cased trimmed symbol), like OrganStore.
+
+    The leading $sort walks the unique (organ, gene_symbol) index, so the scan is index-backed
+    and $first is deterministic: among case variants of a symbol in one organ the binary-lowest
+    spelling wins (OrganStore keeps the first in load order; the two differ only for such variants)."""
+    return [
+        {"$match": {"gene_symbol": {"$type": "string"}}},
+        {"$sort": {"organ": 1, "gene_symbol": 1}},
+        {"$addFields": {"_symbol": {"$toLower": {"$trim": {"input": "$gene_symbol"}}}}},
+        {"$match": {"_symbol": {"$ne": ""}}},
+        {
+            "$group": {
+                "_id": {"organ": "$organ", "symbol": "$_symbol"},
+                "organ": {"$first": "$organ"},
+                "gene_symbol": {"$first": {"$trim": {"input": "$gene_symbol"}}},
+                **{f: {"$first": f"${f}"} for f in fields},
+            }
+        },
+    ]
+
+
+class MongoCrossOrganStats:
+    """Aggregation-pipeline implementation over the typed numeric schema.
+
+    Rows are deduplicated per (organ, case-insensitive symbol) before counting so answers match
+    InMemoryCrossOrganStats. Raises UntypedSchemaError while fdr/fold_change are still strings
+    (range matches and $avg would silently skip them); /api/stats then falls back to memory."""
+
+    backend = "mongodb"
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._typed = False
+
+    def _require_typed(self) -> None:
+        # A fully migrated collection is remembered; until then, recheck (stops at the first string).
+        if self._typed:
+            return
+        pending = self.collection.find_one(
+            {"$or": [{FDR_KEY: {"$type": "string"}}, {FOLD_KEY: {"$type": "string"}}]}, {"_id": 1}
+        )
+        if pending is not None:
+            raise UntypedSchemaError(
+                "gene_data numeric columns are strings; run scripts/migrate_gene_data_numeric.py"
+            )
+        self._typed = True
+
+    def _aggregate(self, pipeline: List[Dict]) -> List[Dict]:
+        self._require_typed()
+        return list(self.collection.aggregate(pipeline, allowDiskUse=True))
+
+    def significant_counts(self, fdr_max: float = 0.05) -> List[Dict[str, Any]]:
+        significant = {"$and": [{"$isNumber": f"${FDR_KEY}"}, {"$lte": [f"${FDR_KEY}", fdr_max]}]}
+        fold = {"$cond": [{"$isNumber": f"${FOLD_KEY}"}, f"${FOLD_KEY}", 0]}
+        counts = {
+            d["_id"]: d
+            for d in self._aggregate(
+                _dedupe_stages([FDR_KEY, FOLD_KEY])
+                + [
+                    {
+                        "$group": {
+                            "_id": "$organ",
+                            "n": {"$sum": 1},
+                            "n_significant": {"$sum": {"$cond": [significant, 1, 0]}},
+                            "n_up": {"$sum": {"$cond": [{"$and": [significant, {"$gt": [fold, 0]}]}, 1, 0]}},
+                            "n_down": {"$sum": {"$cond": [{"$and": [significant, {"$lt": [fold, 0]}]}, 1, 0]}},
+                        }
+                    },
+                ]
+            )
+        }
+        return [
+            {
+                "organ": organ,
+                "n_genes": int(counts[organ]["n"]),
+                "n_significant": int(counts[organ]["n_significant"]),
+                "n_up": int(counts[organ]["n_up"]),
+                "n_down": int(counts[organ]["n_down"]),
+            }
+            for organ in sorted(counts)
+        ]
+
+    def mean_fold_change(
+        self, genes: Optional[Sequence[str]] = None, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        pipeline: List[Dict] = []
+        if genes:
+            # Resolve symbols through the gene_symbol_ci index; the pipeline itself runs without the
+            # collation so organ names and the final sort keep exact (binary) comparison.
+            symbols = [g.strip() for g in genes if g.strip()]
+            cursor = self.collection.find({"gene_symbol": {"$in": symbols}}, {"_id": 1})
+            ids = [d["_id"] for d in cursor.collation(SYMBOL_COLLATION)]
+            pipeline.append({"$match": {"_id": {"$in": ids}}})
+        pipeline += _dedupe_stages([FOLD_KEY]) + [
+            {"$match": {FOLD_KEY: {"$type": ["double", "int", "long", "decimal"]}}},
+            {
+                "$group": {
+                    "_id": "$_id.symbol",
+                    "gene_symbol": {"$first": "$gene_symbol"},
+                    "mean_fold_change": {"$avg": f"${FOLD_KEY}"},
+                    "n_organs": {"$sum": 1},
+                }
+            },
+            {"$addFields": {"abs_mean": {"$abs": "$mean_fold_change"}}},
+            {"$sort": {"abs_mean": -1, "_id": 1}},
+            {"$limit": int(limit)},
+        ]
+        return [
+            {
+                "gene_symbol": d["gene_symbol"],
+                "mean_fold_change": finite_or_none(d["mean_fold_change"]),
+                "n_organs": int(d["n_organs"]),
+            }
+            for d in self._aggregate(pipeline)
+        ]
+
+    def recurrent_genes(
+        self, min_organs: int = 2, fdr_max: float = 0.05, limit: int = 500
+    ) -> List[Dict[str, Any]]:
+        # Deduplicate before the FDR filter: the winning row per (organ, symbol) decides, as in
+        # memory. Matching first would let a significant case variant stand in for a losing one.
+        pipeline = (
+            _dedupe_stages([FDR_KEY])
+            + [
+                {"$match": {FDR_KEY: {"$lte": fdr_max}}},
+                {
+                    "$group": {
+                        "_id": "$_id.symbol",
+                        "gene_symbol": {"$first": "$gene_symbol"},
+                        "organs": {"$addToSet": "$organ"},
+                    }
+                },
+                {"$addFields": {"n_organs": {"$size": "$organs"}}},
+                {"$match": {"n_organs": {"$gte": int(min_organs)}}},
+                {"$sort": {"n_organs": -1, "_id": 1}},
+                {"$limit": int(limit)},
+            ]
+        )
+        return [
+            {
+                "gene_symbol": d["gene_symbol"],
+                "n_organs": int(d["n_organs"]),
+                "organs": sorted(d["organs"]),
+            }
+            for d in self._aggregate(pipeline)
+        ]
+
+
+class InMemoryCrossOrganStats:
+    """Same statistics from the columnar store (used when MONGODB_AVAILABLE is false)."""
+
+    backend = "memory"
+
+    def __init__(self, store_getter: Callable[[], OrganStore]):
+        self._store_getter = store_getter
+
+    @property
+    def store(self) -> OrganStore:
+        return self._store_getter()
+
+    def significant_counts(self, fdr_max: float = 0.05) -> List[Dict[str, Any]]:
+        out = []
+        for cols in self.store.organs.values():
+            sig = cols["fdr_step_up"] <= fdr_max
+            fc = cols["fold_change"]
+            out.append(
+                {
+                    "organ": cols.organ,
+                    "n_genes": len(cols),
+                    "n_significant": int(np.count_nonzero(sig)),
+                    "n_up": int(np.count_nonzero(sig & (fc > 0))),
+                    "n_down": int(np.count_nonzero(sig & (fc < 0))),
+                }
+            )
+        return out
+
+    def mean_fold_change(
+        self, genes: Optional[Sequence[str]] = None, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        store = self.store
+        fc = metric_matrix(store, "fold_change")
+        if genes:
+            ids = [store.symbol_id(g) for g in genes]
+            rows = np.asarray(sorted({i for i in ids if i is not None}), dtype=np.int64)
+        else:
+            rows = np.arange(fc.shape[0])
+        sub = fc[rows]
+        n = np.isfinite(sub).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.nansum(sub, axis=1) / n
+        ok = n > 0
+        rows, mean, n = rows[ok], mean[ok], n[ok]
+        order = np.lexsort((rows, -np.abs(mean)))[: int(limit)]
+        return [
+            {
+                "gene_symbol": store.symbols[rows[i]],
+                "mean_fold_change": finite_or_none(mean[i]),
+                "n_organs": int(n[i]),
+            }
+            for i in order
+        ]
+
+    def recurrent_genes(
+        self, min_organs: int = 2, fdr_max: float = 0.05, limit: int = 500
+    ) -> List[Dict[str, Any]]:
+        store = self.store
+        sig = fdr_matrix(store) <= fdr_max
+        n = sig.sum(axis=1)
+        rows = np.flatnonzero(n >= int(min_organs))
+        rows = rows[np.lexsort((rows, -n[rows]))][: int(limit)]
+        names = store.organ_names
+        return [
+            {
+                "gene_symbol": store.symbols[r],
+                "n_organs": int(n[r]),
+                "organs": [names[j] for j in np.flatnonzero(sig[r])],
+            }
+            for r in rows
+        ]
+
+
+def _comparable(value: Any) -> Any:
+    """Round floats so summation-order differences between backends do not count as disagreement."""
+    if isinstance(value, float):
+        return round(value, 9)
+    if isinstance(value, dict):
+        return {k: _comparable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_comparable(v) for v in value]
+    return value
+
+
+def benchmark(backends: Sequence[Any], repeats: int = 5, fdr_max: float = 0.05) -> Dict[str, Any]:
+    """Time each statistic on each backend (best of `repeats`, ms) and check that answers agree."""
+    calls = {
+        "significant_counts": lambda b: b.significant_counts(fdr_max=fdr_max),
+        "mean_fold_change": lambda b: b.mean_fold_change(limit=100),
+        "recurrent_genes": lambda b: b.recurrent_genes(min_organs=3, fdr_max=fdr_max),
+    }
+    timings: Dict[str, Dict[str, float]] = {}
+    answers: Dict[str, Dict[str, Any]] = {}
+    for name, call in calls.items():
+        timings[name] = {}
+        answers[name] = {}
+        for b in backends:
+            best = float("inf")
+            for _ in range(max(1, repeats)):
+                start = time.perf_counter()
+                result = call(b)
+                best = min(best, time.perf_counter() - start)
+            timings[name][b.backend] = round(best * 1000.0, 3)
+            answers[name][b.backend] = _comparable(result)
+    agree = {
+        name: all(r == next(iter(res.values())) for r in res.values())
+        for name, res in answers.items()
+    }
+    return {"timings_ms": timings, "results_agree": agree}
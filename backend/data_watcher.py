@@ -0,0 +1,115 @@
+"""Watch backend/data for added / changed / removed organ workbooks (*.xlsx).
+
+Uses watchfiles (inotify on Linux) when installed, otherwise polls file mtimes and sizes.
+The callback receives the organ names (file stems) whose workbook changed; the caller
+re-ingests just those organs.
+"""
+
+import glob
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from watchfiles import watch as _watchfiles_watch
+    WATCHFILES_AVAILABLE = True
+except ImportError:
+    WATCHFILES_AVAILABLE = False
+
+Signature = Tuple[int, int]
+
+
+def organ_from_path(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _is_workbook(path: str) -> bool:
+    name = os.path.basename(path)
+    # Skip Excel lock files (~$Liver.xlsx) written while a workbook is open.
+    return name.lower().endswith(".xlsx") and not name.startswith("~$")
+
+
+def scan_workbooks(data_dir: str) -> Dict[str, Signature]:
+    """organ → (mtime_ns, size) for every workbook currently in data_dir."""
+    out: Dict[str, Signature] = {}
+    for path in glob.glob(os.path.join(data_dir, "*.xlsx")):
+        if not _is_workbook(path):
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        out[organ_from_path(path)] = (st.st_mtime_ns, st.st_size)
+    return out
+
+
+def diff_signatures(old: Dict[str, Signature], new: Dict[str, Signature]) -> List[str]:
+    """Organs added, removed or modified between two scans (sorted)."""
+    return sorted(k for k in set(old) | set(new) if old.get(k) != new.get(k))
+
+
+class DataDirWatcher:
+    """Background thread calling on_change(organs) whenever workbooks under data_dir change."""
+
+    def __init__(
+        self,
+        data_dir: str,
+        on_change: Callable[[List[str]], None],
+        poll_interval: float = 5.0,
+        use_inotify: bool = True,
+    ):
+        self.data_dir = data_dir
+        self.on_change = on_change
+        self.poll_interval = max(0.5, float(poll_interval))
+        self.use_inotify = use_inotify and WATCHFILES_AVAILABLE
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._signatures = scan_workbooks(data_dir)
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self.use_inotify else "polling"
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="data-dir-watcher", daemon=True)
+        self._thread.start()
+        print(f"Watching {self.data_dir} for organ workbook changes ({self.mode})")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def check(self) -> List[str]:
+        """Rescan now and dispatch any changed organs; returns them."""
+        current = scan_workbooks(self.data_dir)
+        changed = diff_signatures(self._signatures, current)
+        self._signatures = current
+        if changed:
+            try:
+                self.on_change(changed)
+            except Exception as e:
+                print(f"Error re-ingesting changed organs {changed}: {e}")
+        return changed
+
+    def _run(self) -> None:
+        if self.use_inotify:
+            try:
+                for _changes in _watchfiles_watch(
+                    self.data_dir,
+                    watch_filter=lambda _change, path: _is_workbook(path),
+                    stop_event=self._stop,
+                    rust_timeout=int(self.poll_interval * 1000),
+                    yield_on_timeout=False,
+                    recursive=False,
+                ):
+                    # Re-scan instead of trusting the event kinds: editors save via rename/replace.
+                    self.check()
+                return
+            except Exception as e:
+                print(f"inotify watch failed ({e}); falling back to polling {self.data_dir}")
+        while not self._stop.wait(self.poll_interval):
+            self.check()
@@ -0,0 +1,190 @@
+"""Content-addressed cache of raw g:Profiler results.
+
+Key: (sha1 of the normalized gene set, organism, evidences flag). Values are the frames exactly
+as g:Profiler returned them (intersections included when evidences=True); p-value thresholds
+and GO-aspect filters are applied by the caller on a copy. Concurrent misses for the same key
+share one upstream request (single-flight), whether they come through profile() on a worker
+thread or aprofile() on the event loop. An optional EnrichmentStore persists entries across
+restarts and is consulted before going upstream.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from enrichment_store import EnrichmentStore
+from ttl_cache import TTLCache
+
+EnrichmentKey = Tuple[str, str, bool]
+FetchResult = Tuple[pd.DataFrame, Optional[str]]
+
+
+def normalize_gene_set(genes: Iterable[str]) -> List[str]:
+    """Stripped, de-duplicated, sorted symbols: the same list in any order shares one entry."""
+    return sorted({str(g).strip() for g in genes if str(g).strip()})
+
+
+def gene_set_hash(genes: List[str]) -> str:
+    return hashlib.sha1("\n".join(genes).encode("utf-8")).hexdigest()
+
+
+class EnrichmentCache:
+    """fetch(genes, organism, evidences) → (DataFrame, data version), memoized with LRU + TTL
+    and single-flight, optionally backed by a persistent store. `afetch` is the coroutine
+    counterpart used by aprofile(); without it aprofile() runs `fetch` on a worker thread."""
+
+    def __init__(
+        self,
+        fetch: Callable[[List[str], str, bool], FetchResult],
+        maxsize: int = 256,
+        ttl: float = 86400.0,
+        name: str = "gprofiler_enrichment",
+        store: Optional[EnrichmentStore] = None,
+        afetch: Optional[Callable[[List[str], str, bool], Awaitable[FetchResult]]] = None,
+    ):
+        self._fetch = fetch
+        self._afetch = afetch
+        self._fills: Set[asyncio.Task] = set()
+        self.cache = TTLCache(name, maxsize=maxsize, ttl=ttl)
+        self.store = store
+        self._inflight: Dict[EnrichmentKey, Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+        self.store_hits = 0
+
+    def _claim(self, key: EnrichmentKey) -> Tuple[Optional[pd.DataFrame], Optional[Future], bool]:
+        """(cached frame, None, False) on a hit, else (None, pending future, is leader)."""
+        found, frame = self.cache.get(key)
+        if found:
+            return frame, None, False
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is not None:
+                self.coalesced += 1
+                return None, pending, False
+            # A leader may have finished between the miss above and taking the lock;
+            # peek so this lookup is not counted a second time.
+            found, frame = self.cache.peek(key)
+            if found:
+                return frame, None, False
+            pending = Future()
+            self._inflight[key] = pending
+            return None, pending, True
+
+    def profile(self, genes: Iterable[str], organism: str, evidences: bool) -> pd.DataFrame:
+        """Unfiltered g:Profiler frame for this gene set (a copy; safe to modify)."""
+        start = time.perf_counter()
+        normalized = normalize_gene_set(genes)
+        key: EnrichmentKey = (gene_set_hash(normalized), organism, bool(evidences))
+        frame, pending, leader = self._claim(key)
+        if pending is None:
+            self.cache.observe(True, time.perf_counter() - start)
+            return frame.copy()
+        if not leader:
+            frame = pending.result()
+            self.cache.observe(False, time.perf_counter() - start)
+            return frame.copy()
+        try:
+            frame = self._from_store(key)
+            if frame is None:
+                frame, data_version = self._fetch(normalized, organism, bool(evidences))
+                self._to_store(key, frame, data_version)
+            self.cache.put(key, frame)
+            pending.set_result(frame)
+            self.cache.observe(False, time.perf_counter() - start)
+        except BaseException as e:
+            # Errors are not cached; waiting requests see the same failure.
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return frame.copy()
+
+    async def aprofile(self, genes: Iterable[str], organism: str, evidences: bool) -> pd.DataFrame:
+        """profile() for the event loop: store I/O goes to a worker thread, the fetch is awaited."""
+        start = time.perf_counter()
+        normalized = normalize_gene_set(genes)
+        key: EnrichmentKey = (gene_set_hash(normalized), organism, bool(evidences))
+        frame, pending, leader = self._claim(key)
+        if pending is None:
+            self.cache.observe(True, time.perf_counter() - start)
+            return frame.copy()
+        if leader:
+            # The fill runs as its own task so a cancelled (disconnected) leader does not
+            # abort the upstream call that coalesced requests are waiting on.
+            task = asyncio.create_task(self._afill(key, normalized, organism, bool(evidences), pending))
+            self._fills.add(task)
+            task.add_done_callback(self._fills.discard)
+        # shield: a cancelled waiter must not cancel the shared future.
+        frame = await asyncio.shield(asyncio.wrap_future(pending))
+        self.cache.observe(False, time.perf_counter() - start)
+        return frame.copy()
+
+    async def _afill(
+        self, key: EnrichmentKey, genes: List[str], organism: str, evidences: bool, pending: Future
+    ) -> None:
+        try:
+            frame = await asyncio.to_thread(self._from_store, key)
+            if frame is None:
+                if self._afetch is not None:
+                    frame, data_version = await self._afetch(genes, organism, evidences)
+                else:
+                    frame, data_version = await asyncio.to_thread(self._fetch, genes, organism, evidences)
+                await asyncio.to_thread(self._to_store, key, frame, data_version)
+            self.cache.put(key, frame)
+            pending.set_result(frame)
+        except BaseException as e:
+            pending.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _from_store(self, key: EnrichmentKey) -> Optional[pd.DataFrame]:
+        if self.store is None:
+            return None
+        try:
+            frame = self.store.get(key)
+        except Exception as e:
+            print(f"Warning: enrichment store read failed: {e}")
+            return None
+        if frame is not None:
+            self.store_hits += 1
+        return frame
+
+    def _to_store(self, key: EnrichmentKey, frame: pd.DataFrame, data_version: Optional[str]) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.put(key, frame, data_version)
+        except Exception as e:
+            print(f"Warning: enrichment store write failed: {e}")
+
+    def warm(self, limit: int) -> int:
+        """Load the most recently used persisted entries into memory; returns how many."""
+        if self.store is None or limit <= 0:
+            return 0
+        try:
+            entries = self.store.recent(limit)
+        except Exception as e:
+            print(f"Warning: could not warm enrichment cache: {e}")
+            return 0
+        for key, frame in reversed(entries):
+            self.cache.put(key, frame)
+        return len(entries)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        out = self.cache.stats()
+        out["coalesced_requests"] = self.coalesced
+        out["persistent_hits"] = self.store_hits
+        return out
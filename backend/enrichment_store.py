@@ -0,0 +1,172 @@
+"""SQLite-backed second level for EnrichmentCache, so g:Profiler results survive redeploys.
+
+Rows are keyed by (gene-set hash, organism, evidences flag, data version). The current data
+version is tracked per organism key (g:Profiler organisms and the local engine's
+"<organism>:local:<hash>" keys version independently); only that version is served. Older
+versions, rows past the TTL and least-recently-used rows beyond the size cap are removed by
+compact(), which also runs periodically on a background thread.
+"""
+
+import io
+import sqlite3
+import threading
+import time
+import zlib
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+StoreKey = Tuple[str, str, bool]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS enrichment (
+    gene_hash TEXT NOT NULL,
+    organism TEXT NOT NULL,
+    evidences INTEGER NOT NULL,
+    data_version TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    size INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (gene_hash, organism, evidences, data_version)
+);
+CREATE INDEX IF NOT EXISTS enrichment_last_used ON enrichment (last_used);
+CREATE TABLE IF NOT EXISTS versions (organism TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+UNKNOWN_VERSION = "unknown"
+
+
+def encode_frame(df: pd.DataFrame) -> bytes:
+    # JSON "split" keeps list cells (intersections, evidences, parents) without pickling.
+    return zlib.compress(df.to_json(orient="split", index=False).encode("utf-8"), 6)
+
+
+def decode_frame(payload: bytes) -> pd.DataFrame:
+    text = zlib.decompress(payload).decode("utf-8")
+    return pd.read_json(io.StringIO(text), orient="split", dtype=False, convert_dates=False)
+
+
+class EnrichmentStore:
+    """Persistent enrichment results; safe to share between threads."""
+
+    def __init__(self, path: str, ttl: float = 30 * 86400.0, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.ttl = float(ttl)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def data_version(self, organism: str) -> str:
+        """Latest data version recorded for this organism key by a live request."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM versions WHERE organism = ?", (organism,)).fetchone()
+        return row[0] if row else UNKNOWN_VERSION
+
+    def get(self, key: StoreKey) -> Optional[pd.DataFrame]:
+        gene_hash, organism, evidences = key
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created FROM enrichment WHERE gene_hash = ? AND organism = ? "
+                "AND evidences = ? AND data_version = (SELECT value FROM versions WHERE organism = ?)",
+                (gene_hash, organism, int(evidences), organism),
+            ).fetchone()
+            if row is None or (self.ttl > 0 and row[1] + self.ttl < now):
+                return None
+            self._conn.execute(
+                "UPDATE enrichment SET last_used = ? WHERE gene_hash = ? AND organism = ? AND evidences = ? "
+                "AND data_version = (SELECT value FROM versions WHERE organism = ?)",
+                (now, gene_hash, organism, int(evidences), organism),
+            )
+        return decode_frame(row[0])
+
+    def put(self, key: StoreKey, df: pd.DataFrame, data_version: Optional[str]) -> None:
+        gene_hash, organism, evidences = key
+        payload = encode_frame(df)
+        now = time.time()
+        with self._lock:
+            if data_version:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO versions (organism, value) VALUES (?, ?)", (organism, data_version)
+                )
+                version = data_version
+            else:
+                # A response without a version is filed under the organism's known version and
+                # never replaces it (only records UNKNOWN_VERSION when nothing is known yet).
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO versions (organism, value) VALUES (?, ?)", (organism, UNKNOWN_VERSION)
+                )
+                version = self._conn.execute(
+                    "SELECT value FROM versions WHERE organism = ?", (organism,)
+                ).fetchone()[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO enrichment VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (gene_hash, organism, int(evidences), version, now, now, len(payload), payload),
+            )
+
+    def recent(self, limit: int) -> List[Tuple[StoreKey, pd.DataFrame]]:
+        """Most recently used live entries of their organism's current data version (for warming memory)."""
+        cutoff = time.time() - self.ttl if self.ttl > 0 else 0.0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT e.gene_hash, e.organism, e.evidences, e.payload FROM enrichment e "
+                "JOIN versions v ON v.organism = e.organism AND v.value = e.data_version "
+                "WHERE e.created >= ? ORDER BY e.last_used DESC LIMIT ?",
+                (cutoff, int(limit)),
+            ).fetchall()
+        return [((h, o, bool(e)), decode_frame(p)) for h, o, e, p in rows]
+
+    def compact(self) -> int:
+        """Drop expired rows, superseded data versions and LRU rows over the size cap; returns rows removed."""
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute(
+                "DELETE FROM enrichment WHERE data_version != COALESCE("
+                "(SELECT value FROM versions WHERE versions.organism = enrichment.organism), data_version)"
+            )
+            if self.ttl > 0:
+                self._conn.execute("DELETE FROM enrichment WHERE created < ?", (now - self.ttl,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM enrichment").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                doomed = []
+                for rowid, size in self._conn.execute(
+                    "SELECT rowid, size FROM enrichment ORDER BY last_used ASC"
+                ):
+                    if excess <= 0:
+                        break
+                    doomed.append((rowid,))
+                    excess -= size
+                self._conn.executemany("DELETE FROM enrichment WHERE rowid = ?", doomed)
+            removed = self._conn.total_changes - before
+            if removed:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self._conn.execute("VACUUM")
+        return removed
+
+    def start_compaction(self, interval: float = 3600.0) -> None:
+        if self._thread is not None:
+            return
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    removed = self.compact()
+                    if removed:
+                        print(f"Enrichment store compaction removed {removed} entries")
+                except Exception as e:
+                    print(f"Enrichment store compaction failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="enrichment-store-compaction", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,292 @@
+"""Per-gene profiles (the /api/gene/symbol/search rows) and their bar-chart plots, plus the
+content-hashed static directory written by precompute_profiles.py.
+
+Layout of the static directory:
+    manifest.json                      store generation + lower-cased symbol → profile digest
+    json/<digest>.json                 profile
+    img/<digest>-<kind>.jpg            optional plots (kind in PROFILE_PLOTS)
+File names are content digests, so a file never changes once written and can be cached forever.
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import matplotlib
+import numpy as np
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+from organ_store import OrganStore  # noqa: E402
+
+# kind → (profile field, title prefix, y label, bar color; None = blue/red by sign)
+PROFILE_PLOTS: Dict[str, Tuple[str, str, str, Optional[str]]] = {
+    "fold_change": ("fold_change", "Fold Change", "Fold Change", None),
+    "lsmean_control": ("lsmean_control", "LSmean(Control)", "LSmean (Control)", "blue"),
+    "lsmean_10mgkg": ("lsmean_10mgkg", "LSmean(10mg/kg)", "LSmean (10mg/kg)", "green"),
+}
+
+MANIFEST_NAME = "manifest.json"
+
+COMPARE_METRIC_LABELS: Dict[str, str] = {
+    "fold_change": "Fold Change",
+    "log2_fold_change": "log2 Fold Change",
+    "ratio": "Ratio",
+    "lsmean_control": "LSmean (Control)",
+    "lsmean_10mgkg": "LSmean (10mg/kg)",
+}
+
+
+def gene_profile(store: OrganStore, gene_symbol: str) -> Optional[Dict[str, Any]]:
+    """Search-endpoint rows for one gene from the columnar store (None if no organ has it)."""
+    rows = store.gene_rows(gene_symbol)
+    if not rows:
+        return None
+    return {"gene_symbol": rows[0]["gene_symbol"], "data": rows}
+
+
+def profile_digest(profile: Dict[str, Any]) -> str:
+    canonical = json.dumps(profile, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:20]
+
+
+def render_profile_plot(rows: Sequence[Dict[str, Any]], kind: str, gene_symbol: str) -> bytes:
+    """One organ bar chart as JPEG bytes (same figure as the show* endpoints); rows lacking the value are skipped."""
+    field, title, ylabel, color = PROFILE_PLOTS[kind]
+    organs = [r["organ"] for r in rows if r.get(field) is not None]
+    values = [float(r[field]) for r in rows if r.get(field) is not None]
+    if not organs:
+        raise ValueError(f"No {field} values for {gene_symbol}")
+    colors = [("blue" if v >= 0 else "red") for v in values] if color is None else color
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        ax.bar(organs, values, color=colors)
+        ax.set_title(f"{title} for {gene_symbol}")
+        ax.set_xlabel("Organ")
+        ax.set_ylabel(ylabel)
+        ax.tick_params(axis="x", rotation=45)
+        ax.grid(True, axis="y")
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="jpg", dpi=300, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def render_compare_chart(
+    genes: Sequence[str],
+    organs: Sequence[str],
+    values: np.ndarray,
+    metric: str,
+    layout: str = "grouped",
+    fmt: str = "png",
+) -> bytes:
+    """Several genes in one figure: grouped bars per organ, or a small-multiples grid (one panel
+    per gene, shared y axis). values is gene × organ; NaN bars are left empty."""
+    ylabel = COMPARE_METRIC_LABELS.get(metric, metric)
+    palette = plt.get_cmap("tab10" if len(genes) <= 10 else "tab20")
+    x = np.arange(len(organs))
+    if layout == "grid":
+        ncols = min(3, len(genes))
+        nrows = -(-len(genes) // ncols)
+        fig, axes = plt.subplots(
+            nrows, ncols, figsize=(4.5 * ncols, 3.6 * nrows), sharey=True, squeeze=False
+        )
+        for k, ax in enumerate(axes.flat):
+            if k >= len(genes):
+                ax.set_visible(False)
+                continue
+            ax.bar(x, np.nan_to_num(values[k], nan=0.0), color=palette(k % palette.N))
+            ax.set_title(genes[k])
+            ax.set_xticks(x)
+            ax.set_xticklabels(organs, rotation=45, ha="right", fontsize=8)
+            ax.grid(True, axis="y")
+            if k % ncols == 0:
+                ax.set_ylabel(ylabel)
+        fig.suptitle(f"{ylabel} by organ")
+    else:
+        fig, ax = plt.subplots(figsize=(max(10, 1.1 * len(organs) * max(1, len(genes) / 3)), 6))
+        width = 0.8 / len(genes)
+        for k, gene in enumerate(genes):
+            ax.bar(
+                x - 0.4 + width * (k + 0.5),
+                np.nan_to_num(values[k], nan=0.0),
+                width,
+                label=gene,
+                color=palette(k % palette.N),
+            )
+        ax.set_xticks(x)
+        ax.set_xticklabels(organs, rotation=45)
+        ax.set_title(f"{ylabel} by organ")
+        ax.set_xlabel("Organ")
+        ax.set_ylabel(ylabel)
+        ax.axhline(0, color="black", linewidth=0.8)
+        ax.grid(True, axis="y")
+        ax.legend(title="Gene", fontsize=8)
+    try:
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        save_kwargs: Dict[str, Any] = {"format": fmt, "bbox_inches": "tight"}
+        if fmt == "png":
+            save_kwargs["dpi"] = 300
+        fig.savefig(buffer, **save_kwargs)
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def json_path(out_dir: str, digest: str) -> str:
+    return os.path.join(out_dir, "json", f"{digest}.json")
+
+
+def image_path(out_dir: str, digest: str, kind: str) -> str:
+    return os.path.join(out_dir, "img", f"{digest}-{kind}.jpg")
+
+
+def _render_job(job: Tuple[str, Dict[str, Any], str, bool]) -> Tuple[str, List[str]]:
+    """Worker: write one profile (and its plots); returns (digest, plot kinds written)."""
+    out_dir, profile, digest, images = job
+    _write_atomic(
+        json_path(out_dir, digest),
+        json.dumps(profile, separators=(",", ":")).encode("utf-8"),
+    )
+    kinds: List[str] = []
+    if images:
+        for kind in PROFILE_PLOTS:
+            try:
+                data = render_profile_plot(profile["data"], kind, profile["gene_symbol"])
+            except ValueError:
+                continue
+            _write_atomic(image_path(out_dir, digest, kind), data)
+            kinds.append(kind)
+    return digest, kinds
+
+
+def read_manifest(out_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"generation": None, "images": False, "genes": {}}
+
+
+def precompute_profiles(
+    store: OrganStore,
+    symbols: Sequence[str],
+    out_dir: str,
+    images: bool = False,
+    workers: int = 0,
+    force: bool = False,
+    prune: bool = True,
+) -> Dict[str, Any]:
+    """Write profiles for `symbols`, re-rendering only genes whose content digest changed."""
+    os.makedirs(os.path.join(out_dir, "json"), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, "img"), exist_ok=True)
+    old = read_manifest(out_dir)
+    old_genes: Dict[str, Dict[str, Any]] = old.get("genes", {}) if not force else {}
+
+    # A partial run (prune=False) keeps every other gene's entry from the previous manifest.
+    genes: Dict[str, Dict[str, Any]] = {} if prune else dict(old_genes)
+    jobs: List[Tuple[str, Dict[str, Any], str, bool]] = []
+    for symbol in symbols:
+        profile = gene_profile(store, symbol)
+        if profile is None:
+            continue
+        key = symbol.strip().lower()
+        digest = profile_digest(profile)
+        prev = old_genes.get(key)
+        up_to_date = (
+            prev is not None
+            and prev.get("digest") == digest
+            and os.path.exists(json_path(out_dir, digest))
+            and (not images or prev.get("images") is not None)
+        )
+        if up_to_date:
+            genes[key] = prev
+        else:
+            genes[key] = {"digest": digest, "images": [] if images else None}
+            jobs.append((out_dir, profile, digest, images))
+
+    if jobs:
+        if workers == 1:
+            by_digest = dict(map(_render_job, jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers or None) as pool:
+                by_digest = dict(pool.map(_render_job, jobs, chunksize=64))
+        if images:
+            for entry in genes.values():
+                if entry["digest"] in by_digest:
+                    entry["images"] = by_digest[entry["digest"]]
+
+    manifest = {"generation": store.generation, "images": images, "genes": genes}
+    _write_atomic(
+        os.path.join(out_dir, MANIFEST_NAME),
+        json.dumps(manifest, separators=(",", ":")).encode("utf-8"),
+    )
+
+    pruned = 0
+    if prune:
+        live = {e["digest"] for e in genes.values()}
+        for sub in ("json", "img"):
+            for name in os.listdir(os.path.join(out_dir, sub)):
+                if name.split(".")[0].split("-")[0] not in live:
+                    os.remove(os.path.join(out_dir, sub, name))
+                    pruned += 1
+    return {
+        "generation": store.generation,
+        "genes": len(genes),
+        "rendered": len(jobs),
+        "unchanged": len(genes) - len(jobs),
+        "pruned_files": pruned,
+    }
+
+
+class ProfileManifest:
+    """Server-side view of the static directory; reloads manifest.json when it changes on disk."""
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self._mtime: Optional[int] = None
+        self._genes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _current(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            mtime = os.stat(os.path.join(self.out_dir, MANIFEST_NAME)).st_mtime_ns
+        except OSError:
+            return {}
+        with self._lock:
+            if mtime != self._mtime:
+                self._genes = read_manifest(self.out_dir).get("genes", {})
+                self._mtime = mtime
+            return self._genes
+
+    def entry(self, gene_symbol: str, digest: str) -> Optional[Dict[str, Any]]:
+        """Manifest entry only if it was rendered from exactly this profile content."""
+        entry = self._current().get(str(gene_symbol).strip().lower())
+        if entry is None or entry.get("digest") != digest:
+            return None
+        return entry
+
+    def image(self, gene_symbol: str, digest: str, kind: str) -> Optional[bytes]:
+        entry = self.entry(gene_symbol, digest)
+        if entry is None or kind not in (entry.get("images") or []):
+            return None
+        try:
+            with open(image_path(self.out_dir, digest, kind), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
@@ -0,0 +1,94 @@
+"""BM25 full-text search over gene names ("cytochrome", "solute carrier").
+
+One document per gene symbol (deduplicated across organs, first non-empty name wins). The
+inverted index is built once per OrganStore generation and stored as CSR-style arrays:
+token → slice of (gene id, term frequency) postings.
+"""
+
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+
+from organ_store import OrganStore
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_QUERY_TOKENS = 16
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class GeneTextIndex:
+    """Inverted index over gene_name tokens with BM25 ranking."""
+
+    def __init__(self, store: OrganStore):
+        self.symbols = store.symbols
+        names = [""] * len(store.symbols)
+        for name, cols in store.organs.items():
+            for gid, gene_name in zip(store.gene_ids[name].tolist(), cols.names.tolist()):
+                if not names[gid] and gene_name and gene_name.lower() != "nan":
+                    names[gid] = gene_name.strip()
+        self.names = names
+
+        postings: Dict[str, Dict[int, int]] = {}
+        lengths = np.zeros(len(names), dtype=np.float64)
+        for gid, gene_name in enumerate(names):
+            tokens = tokenize(gene_name)
+            lengths[gid] = len(tokens)
+            for tok in tokens:
+                row = postings.setdefault(tok, {})
+                row[gid] = row.get(gid, 0) + 1
+
+        self.vocab: Dict[str, int] = {}
+        offsets = [0]
+        ids: List[int] = []
+        tfs: List[int] = []
+        for i, (tok, row) in enumerate(sorted(postings.items())):
+            self.vocab[tok] = i
+            ids.extend(row.keys())
+            tfs.extend(row.values())
+            offsets.append(len(ids))
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.doc_ids = np.asarray(ids, dtype=np.int64)
+        self.tf = np.asarray(tfs, dtype=np.float64)
+
+        n_docs = int(np.count_nonzero(lengths))
+        df = np.diff(self.offsets).astype(np.float64)
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        avgdl = float(lengths[lengths > 0].mean()) if n_docs else 1.0
+        self.norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths / avgdl)
+        self.n_docs = n_docs
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Top genes by BM25 score; repeated query tokens count once."""
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t in self.vocab][:MAX_QUERY_TOKENS]
+        if not terms:
+            return []
+        scores: Dict[int, float] = {}
+        for t in terms:
+            i = self.vocab[t]
+            lo, hi = self.offsets[i], self.offsets[i + 1]
+            ids = self.doc_ids[lo:hi]
+            tf = self.tf[lo:hi]
+            part = self.idf[i] * tf * (BM25_K1 + 1.0) / (tf + self.norm[ids])
+            for gid, s in zip(ids.tolist(), part.tolist()):
+                scores[gid] = scores.get(gid, 0.0) + s
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], self.symbols[kv[0]].lower()))
+        return [
+            {
+                "gene_symbol": self.symbols[gid],
+                "gene_name": self.names[gid],
+                "score": round(score, 4),
+            }
+            for gid, score in ranked[: max(1, int(limit))]
+        ]
+
+
+def gene_text_index(store: OrganStore) -> GeneTextIndex:
+    """Index for this store generation (built on first use)."""
+    return store.memo("gene_text_index", lambda: GeneTextIndex(store))
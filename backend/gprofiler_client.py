@@ -0,0 +1,192 @@
+"""Async g:GOSt client: pooled connections, per-call timeouts, bounded concurrency and retries.
+
+Speaks the same HTTP API as the `gprofiler` package (POST {base_url}/api/gost/profile/) and
+builds the same DataFrame as GProfiler(return_dataframe=True).profile, including the
+intersection/evidence remapping, so callers can switch between the two transparently. Unlike
+GProfiler, the response meta is returned with the frame instead of stored on the client, so
+concurrent calls never see each other's metadata.
+"""
+
+import asyncio
+import random
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import httpx
+import pandas as pd
+
+DEFAULT_BASE_URL = "https://biit.cs.ut.ee/gprofiler"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+PROFILE_COLUMNS = [
+    "source", "native", "name", "p_value", "significant", "description", "term_size",
+    "query_size", "intersection_size", "effective_domain_size", "precision", "recall",
+    "query", "parents",
+]
+
+
+class GProfilerError(Exception):
+    """g:Profiler rejected the query, or every retry failed."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def frame_from_response(res: Dict[str, Any], no_evidences: bool) -> pd.DataFrame:
+    """DataFrame exactly as GProfiler(return_dataframe=True).profile builds it (non-combined)."""
+    columns = list(PROFILE_COLUMNS)
+    if not no_evidences:
+        columns += ["intersections", "evidences"]
+        meta = res["meta"]
+        genes_meta = meta["genes_metadata"]["query"]
+        reverse_mappings = {}
+        for query in meta["query_metadata"]["queries"].keys():
+            reverse = {}
+            for symbol, ids in genes_meta[query]["mapping"].items():
+                if len(ids) == 1:
+                    reverse[ids[0]] = symbol
+                else:
+                    # One-to-many mapping: keep the gene IDs, as the gprofiler package does.
+                    for i in ids:
+                        reverse[i] = i
+            reverse_mappings[query] = reverse
+        for result in res["result"]:
+            reverse = reverse_mappings[result["query"]]
+            genes = [reverse[i] for i in genes_meta[result["query"]]["ensgs"]]
+            result["evidences"] = [ev for ev in result["intersections"] if ev]
+            result["intersections"] = [gene for ev, gene in zip(result["intersections"], genes) if ev]
+    df = pd.DataFrame(res["result"])
+    if len(df) == 0:
+        return pd.DataFrame(columns=columns)
+    return df[columns]
+
+
+class AsyncGProfilerClient:
+    """One pooled httpx.AsyncClient per event loop; at most `max_concurrency` requests in flight."""
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+        max_connections: int = 10,
+        max_concurrency: int = 4,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        user_agent: str = "gene-search-server",
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        )
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.user_agent = user_agent
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.retried = 0
+
+    def _session(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        # Pools and semaphores belong to one event loop; rebuild if called from another.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                headers={"User-Agent": self.user_agent},
+                transport=self._transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client, self._semaphore
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        # Full jitter: uniform over an exponentially growing window.
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    async def profile(
+        self,
+        query: Sequence[str],
+        organism: str = "hsapiens",
+        sources: Sequence[str] = (),
+        user_threshold: float = 0.05,
+        all_results: bool = False,
+        no_evidences: bool = True,
+        domain_scope: str = "annotated",
+        significance_threshold_method: str = "g_SCS",
+    ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """(result frame, response meta) for one g:GOSt query."""
+        payload = {
+            "organism": organism,
+            "query": list(query),
+            "sources": list(sources),
+            "user_threshold": user_threshold,
+            "all_results": all_results,
+            "no_evidences": no_evidences,
+            "combined": False,
+            "measure_underrepresentation": False,
+            "no_iea": False,
+            "numeric_ns": "",
+            "domain_scope": domain_scope,
+            "ordered": False,
+            "significance_threshold_method": significance_threshold_method,
+            "background": "",
+        }
+        res = await self._post("/api/gost/profile/", payload)
+        return frame_from_response(res, no_evidences), res.get("meta") or {}
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        client, semaphore = self._session()
+        url = f"{self.base_url}{path}"
+        last_error: Optional[str] = None
+        for attempt in range(self.retries + 1):
+            response: Optional[httpx.Response] = None
+            async with semaphore:
+                self.requests += 1
+                try:
+                    response = await client.post(url, json=payload)
+                except (httpx.TimeoutException, httpx.TransportError) as e:
+                    last_error = type(e).__name__ + (f": {e}" if str(e) else "")
+            if response is not None:
+                if response.status_code == 200:
+                    return response.json()
+                try:
+                    last_error = response.json()["message"]
+                except Exception:
+                    last_error = f"query failed with error {response.status_code}"
+                if response.status_code not in RETRY_STATUS:
+                    raise GProfilerError(last_error, response.status_code)
+            if attempt < self.retries:
+                self.retried += 1
+                # Sleep outside the semaphore so a backing-off call doesn't hold a slot.
+                await asyncio.sleep(self._delay(attempt, response))
+        raise GProfilerError(
+            f"g:Profiler unavailable after {self.retries + 1} attempts ({last_error})",
+            response.status_code if response is not None else None,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": "gprofiler_client",
+            "base_url": self.base_url,
+            "requests": self.requests,
+            "retries": self.retried,
+            "max_concurrency": self.max_concurrency,
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
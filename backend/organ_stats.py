@@ -0,0 +1,526 @@
+"""Vectorized per-organ statistics over the columnar OrganStore (summary, distributions, volcano,
+organ × organ correlation, gene-set scoring, similar cross-organ profiles)."""
+
+import base64
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy.stats import hypergeom, rankdata
+
+from organ_store import OrganColumns, OrganStore, PerOrganCache
+
+FDR_CUTOFFS = (0.001, 0.01, 0.05, 0.1)
+# Thresholds whose derived results are kept in store.memo (the endpoints' defaults among them).
+MEMO_FDR_CUTOFFS = FDR_CUTOFFS + (1.0,)
+QUANTILES = (0.0, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99, 1.0)
+
+# Fixed edges so histograms are comparable across organs.
+LOG2_FC_EDGES = np.linspace(-6.0, 6.0, 49)
+UNIT_INTERVAL_EDGES = np.linspace(0.0, 1.0, 21)
+
+VOLCANO_GRID_MIN = 16
+VOLCANO_GRID_MAX = 512
+
+CORRELATION_METHODS = ("pearson", "spearman")
+
+SIMILARITY_METRICS = ("cosine", "pearson", "euclidean")
+SIMILAR_BLOCK_ROWS = 8192
+SIMILARITY_DECIMALS = 6
+
+
+def finite_or_none(x: Any) -> Optional[float]:
+    """JSON-safe float (NaN / inf → None)."""
+    try:
+        f = float(x)
+    except (TypeError, ValueError):
+        return None
+    return f if np.isfinite(f) else None
+
+
+def _memo_at_threshold(store: OrganStore, key: tuple, fdr_max: float, factory: Callable[[], Any]) -> Any:
+    """store.memo() for the standard FDR cutoffs only; any other client-supplied threshold is
+    computed without caching so arbitrary floats cannot grow the per-generation memo."""
+    if fdr_max in MEMO_FDR_CUTOFFS:
+        return store.memo(key + (float(fdr_max),), factory)
+    return factory()
+
+
+def log2_fold_change(cols: OrganColumns) -> np.ndarray:
+    """log2 of the treated/control ratio; falls back to the signed fold change where ratio is missing."""
+    ratio = cols["ratio"]
+    fc = cols["fold_change"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        from_ratio = np.log2(np.where(ratio > 0, ratio, np.nan))
+        from_fc = np.sign(fc) * np.log2(np.abs(fc))
+    return np.where(np.isfinite(from_ratio), from_ratio, from_fc)
+
+
+METRICS: Dict[str, Callable[[OrganColumns], np.ndarray]] = {
+    "log2_fold_change": log2_fold_change,
+    "fold_change": lambda cols: cols["fold_change"],
+    "ratio": lambda cols: cols["ratio"],
+    "lsmean_10mgkg": lambda cols: cols["lsmean_10mgkg"],
+    "lsmean_control": lambda cols: cols["lsmean_control"],
+}
+
+
+def metric_matrix(store: OrganStore, metric: str) -> np.ndarray:
+    """Gene × organ matrix of a metric, aligned by the store's symbol index."""
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of: {', '.join(METRICS)}")
+    return store.dense(METRICS[metric], metric)
+
+
+def fdr_matrix(store: OrganStore) -> np.ndarray:
+    return store.dense(lambda cols: cols["fdr_step_up"], "fdr_step_up")
+
+
+def _quantiles(values: np.ndarray) -> Dict[str, Optional[float]]:
+    v = values[np.isfinite(values)]
+    if v.size == 0:
+        return {str(q): None for q in QUANTILES}
+    qs = np.quantile(v, QUANTILES)
+    return {str(q): finite_or_none(x) for q, x in zip(QUANTILES, qs)}
+
+
+def _range(values: np.ndarray) -> Dict[str, Optional[float]]:
+    v = values[np.isfinite(values)]
+    if v.size == 0:
+        return {"min": None, "median": None, "max": None}
+    return {
+        "min": finite_or_none(v.min()),
+        "median": finite_or_none(np.median(v)),
+        "max": finite_or_none(v.max()),
+    }
+
+
+def _histogram(values: np.ndarray, edges: np.ndarray) -> Dict[str, Any]:
+    v = values[np.isfinite(values)]
+    counts, _ = np.histogram(v, bins=edges)
+    return {
+        "edges": [round(float(e), 6) for e in edges],
+        "counts": counts.tolist(),
+        "underflow": int(np.count_nonzero(v < edges[0])),
+        "overflow": int(np.count_nonzero(v > edges[-1])),
+        "missing": int(values.size - v.size),
+    }
+
+
+def compute_organ_stats(cols: OrganColumns) -> Dict[str, Any]:
+    """Counts at standard FDR cutoffs (FDR <= cutoff, as elsewhere), quantiles, LSMean ranges and
+    histograms for one organ."""
+    fdr = cols["fdr_step_up"]
+    fc = cols["fold_change"]
+    l2fc = log2_fold_change(cols)
+    significant: Dict[str, Dict[str, int]] = {}
+    for cutoff in FDR_CUTOFFS:
+        sig = fdr <= cutoff
+        significant[str(cutoff)] = {
+            "total": int(np.count_nonzero(sig)),
+            "up": int(np.count_nonzero(sig & (fc > 0))),
+            "down": int(np.count_nonzero(sig & (fc < 0))),
+        }
+    summary = {
+        "organ": cols.organ,
+        "generation": cols.generation,
+        "n_genes": len(cols),
+        "significant": significant,
+        "fold_change_quantiles": _quantiles(fc),
+        "log2_fold_change_quantiles": _quantiles(l2fc),
+        "lsmean_10mgkg": _range(cols["lsmean_10mgkg"]),
+        "lsmean_control": _range(cols["lsmean_control"]),
+    }
+    histograms = {
+        "log2_fold_change": _histogram(l2fc, LOG2_FC_EDGES),
+        "p_value": _histogram(cols["p_value"], UNIT_INTERVAL_EDGES),
+        "fdr_step_up": _histogram(fdr, UNIT_INTERVAL_EDGES),
+    }
+    return {"summary": summary, "histograms": histograms}
+
+
+def encode_typed_array(values: np.ndarray, dtype: str) -> str:
+    """Little-endian typed-array bytes as base64 (decode with new Float32Array(buf) etc. in JS)."""
+    little = np.dtype(dtype).newbyteorder("<")
+    return base64.b64encode(np.ascontiguousarray(values, dtype=little).tobytes()).decode()
+
+
+def compute_volcano_base(cols: OrganColumns) -> Dict[str, Any]:
+    """x = log2 fold change, y = -log10 p; p == 0 is capped at the organ's smallest positive p."""
+    p = cols["p_value"]
+    positive = p[(p > 0) & np.isfinite(p)]
+    floor = float(positive.min()) if positive.size else 1e-300
+    capped = p <= 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y = -np.log10(np.where(capped, floor, p))
+    x = log2_fold_change(cols)
+    valid = np.isfinite(x) & np.isfinite(y)
+    return {"x": x, "y": y, "valid": valid, "capped": capped, "p_floor": floor}
+
+
+def volcano(
+    cols: OrganColumns,
+    base: Dict[str, Any],
+    fdr_max: float = 0.05,
+    min_abs_log2fc: float = 0.0,
+    labels: Iterable[str] = (),
+    grid: int = 128,
+) -> Dict[str, Any]:
+    """Level-of-detail volcano: significant and labeled genes as points, the rest as a density grid."""
+    grid = max(VOLCANO_GRID_MIN, min(VOLCANO_GRID_MAX, int(grid)))
+    x, y, valid = base["x"], base["y"], base["valid"]
+    fdr = cols["fdr_step_up"]
+    significant = valid & (fdr <= fdr_max) & (np.abs(x) >= min_abs_log2fc)
+    labeled = np.zeros(len(cols), dtype=bool)
+    label_rows = [cols.row_of.get(str(g).strip().lower()) for g in labels]
+    label_rows = [r for r in label_rows if r is not None]
+    if label_rows:
+        labeled[np.asarray(label_rows, dtype=np.int64)] = True
+    keep = (significant | labeled) & valid
+    rest = valid & ~keep
+
+    if valid.any():
+        x_lo, x_hi = float(x[valid].min()), float(x[valid].max())
+        y_lo, y_hi = 0.0, float(y[valid].max())
+    else:
+        x_lo, x_hi, y_lo, y_hi = -1.0, 1.0, 0.0, 1.0
+    if x_hi <= x_lo:
+        x_hi = x_lo + 1.0
+    if y_hi <= y_lo:
+        y_hi = y_lo + 1.0
+    counts, _, _ = np.histogram2d(
+        x[rest], y[rest], bins=grid, range=[[x_lo, x_hi], [y_lo, y_hi]]
+    )
+    ix, iy = np.nonzero(counts)
+    cell_w = (x_hi - x_lo) / grid
+    cell_h = (y_hi - y_lo) / grid
+
+    rows = np.flatnonzero(keep)
+    flags = significant[rows].astype(np.uint8) | (labeled[rows].astype(np.uint8) << 1)
+    return {
+        "organ": cols.organ,
+        "generation": cols.generation,
+        "n_genes": len(cols),
+        "fdr_max": fdr_max,
+        "min_abs_log2fc": min_abs_log2fc,
+        "x_label": "log2 fold change",
+        "y_label": "-log10 p-value",
+        "extent": {"x": [x_lo, x_hi], "y": [y_lo, y_hi]},
+        "p_floor": base["p_floor"],
+        "encoding": "base64 little-endian typed arrays",
+        "points": {
+            "count": int(rows.size),
+            "symbols": cols.symbols[rows].tolist(),
+            "x": encode_typed_array(x[rows], "float32"),
+            "y": encode_typed_array(y[rows], "float32"),
+            # bit 0 = significant, bit 1 = labeled, bit 2 = p-value capped at p_floor
+            "flags": encode_typed_array(flags | (base["capped"][rows].astype(np.uint8) << 2), "uint8"),
+        },
+        "density": {
+            "grid": grid,
+            "cell_size": [cell_w, cell_h],
+            "cells": int(ix.size),
+            "points_binned": int(np.count_nonzero(rest)),
+            "x": encode_typed_array(x_lo + (ix + 0.5) * cell_w, "float32"),
+            "y": encode_typed_array(y_lo + (iy + 0.5) * cell_h, "float32"),
+            "count": encode_typed_array(counts[ix, iy], "uint32"),
+        },
+    }
+
+
+def _pairwise_pearson(x: np.ndarray, present: np.ndarray):
+    """Pearson r for every column pair over rows present in both columns (pairwise-complete)."""
+    m = present.astype(np.float64)
+    xz = np.where(present, x, 0.0)
+    n = m.T @ m
+    s_a = xz.T @ m  # s_a[a, b] = sum of column a over rows shared with b
+    s_aa = (xz * xz).T @ m
+    s_ab = xz.T @ xz
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = s_ab - s_a * s_a.T / n
+        var_a = s_aa - s_a * s_a / n
+        r = cov / np.sqrt(var_a * var_a.T)
+    r[n < 3] = np.nan
+    return np.clip(r, -1.0, 1.0), n
+
+
+def _pairwise_spearman(x: np.ndarray, present: np.ndarray):
+    """Spearman r per column pair; ranks are recomputed on each pair's shared rows (ties averaged)."""
+    k = x.shape[1]
+    r = np.eye(k)
+    n = present.T.astype(np.int64) @ present.astype(np.int64)
+    for a in range(k):
+        for b in range(a + 1, k):
+            both = present[:, a] & present[:, b]
+            if np.count_nonzero(both) < 3:
+                r[a, b] = r[b, a] = np.nan
+                continue
+            ra = rankdata(x[both, a])
+            rb = rankdata(x[both, b])
+            val = np.corrcoef(ra, rb)[0, 1]
+            r[a, b] = r[b, a] = val
+    for a in range(k):
+        if n[a, a] < 3:
+            r[a, a] = np.nan
+    return r, n
+
+
+def organ_correlation(
+    store: OrganStore,
+    metric: str = "log2_fold_change",
+    method: str = "pearson",
+    fdr_max: float = 1.0,
+) -> Dict[str, Any]:
+    """Organ × organ correlation of a metric; a gene counts for an organ only where its FDR <= fdr_max."""
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"method must be one of: {', '.join(CORRELATION_METHODS)}")
+    values = metric_matrix(store, metric)
+
+    def build() -> Dict[str, Any]:
+        present = np.isfinite(values)
+        if fdr_max < 1.0:
+            fdr = fdr_matrix(store)
+            present &= fdr <= fdr_max
+        if method == "pearson":
+            r, n = _pairwise_pearson(values, present)
+        else:
+            r, n = _pairwise_spearman(values, present)
+        return {
+            "generation": store.generation,
+            "metric": metric,
+            "method": method,
+            "fdr_max": fdr_max,
+            "organs": store.organ_names,
+            "matrix": [[finite_or_none(v) for v in row] for row in r],
+            "n_genes": n.astype(int).tolist(),
+        }
+
+    return _memo_at_threshold(store, ("organ_correlation", metric, method), fdr_max, build)
+
+
+def _bh_adjust(p: np.ndarray) -> np.ndarray:
+    """Benjamini-Hochberg over the finite entries of p (NaN stays NaN)."""
+    out = np.full(p.shape, np.nan)
+    ok = np.flatnonzero(np.isfinite(p))
+    if ok.size == 0:
+        return out
+    order = ok[np.argsort(p[ok])]
+    ranked = p[order] * ok.size / np.arange(1, ok.size + 1)
+    out[order] = np.minimum(1.0, np.minimum.accumulate(ranked[::-1])[::-1])
+    return out
+
+
+def gene_set_score(store: OrganStore, genes: Iterable[str], fdr_max: float = 0.05) -> Dict[str, Any]:
+    """Score a gene list in every organ at once: fold change summary, fraction significant and
+    a hypergeometric enrichment p-value of FDR-significant genes (background = organ's measured genes)."""
+    ids: List[int] = []
+    unmatched: List[str] = []
+    seen = set()
+    for g in genes:
+        gid = store.symbol_id(g)
+        if gid is None:
+            unmatched.append(g)
+        elif gid not in seen:
+            seen.add(gid)
+            ids.append(gid)
+    rows = np.asarray(ids, dtype=np.int64)
+
+    l2fc_all = metric_matrix(store, "log2_fold_change")
+    fdr_all = fdr_matrix(store)
+
+    def background() -> Dict[str, np.ndarray]:
+        measured = np.isfinite(fdr_all)
+        return {
+            "N": measured.sum(axis=0),
+            "K": (measured & (fdr_all <= fdr_max)).sum(axis=0),
+        }
+
+    bg = _memo_at_threshold(store, ("set_score_background",), fdr_max, background)
+    l2fc = l2fc_all[rows]
+    fdr = fdr_all[rows]
+    measured = np.isfinite(fdr)
+    sig = measured & (fdr <= fdr_max)
+    n = measured.sum(axis=0)
+    k = sig.sum(axis=0)
+    up = (sig & (l2fc > 0)).sum(axis=0)
+    down = (sig & (l2fc < 0)).sum(axis=0)
+    fc_count = np.isfinite(l2fc).sum(axis=0)
+    has_fc = fc_count > 0
+    median_fc = np.full(l2fc.shape[1], np.nan)
+    if has_fc.any():
+        median_fc[has_fc] = np.nanmedian(l2fc[:, has_fc], axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_fc = np.nansum(l2fc, axis=0) / fc_count
+        fraction = k / n
+        expected = n * bg["K"] / bg["N"]
+        fold = k / expected
+    p = np.where(n > 0, hypergeom.sf(k - 1, bg["N"], bg["K"], n), np.nan)
+    p_adj = _bh_adjust(p)
+
+    organs = []
+    for j, name in enumerate(store.organ_names):
+        organs.append(
+            {
+                "organ": name,
+                "n_genes": int(n[j]),
+                "n_significant": int(k[j]),
+                "n_up": int(up[j]),
+                "n_down": int(down[j]),
+                "fraction_significant": finite_or_none(fraction[j]),
+                "mean_log2_fold_change": finite_or_none(mean_fc[j]),
+                "median_log2_fold_change": finite_or_none(median_fc[j]),
+                "background_genes": int(bg["N"][j]),
+                "background_significant": int(bg["K"][j]),
+                "fold_enrichment": finite_or_none(fold[j]),
+                "p_value": finite_or_none(p[j]),
+                "p_adjusted": finite_or_none(p_adj[j]),
+            }
+        )
+    return {
+        "generation": store.generation,
+        "fdr_max": fdr_max,
+        "genes_submitted": len(ids) + len(unmatched),
+        "genes_matched": len(ids),
+        "unmatched": unmatched,
+        "organs": organs,
+    }
+
+
+def _profile_matrix(store: OrganStore) -> Dict[str, np.ndarray]:
+    """Gene × organ log2 fold change with NaN zero-filled and the presence mask (float32 to halve
+    memory; similar_genes widens each block to float64 before scoring)."""
+
+    def build() -> Dict[str, np.ndarray]:
+        values = metric_matrix(store, "log2_fold_change")
+        present = np.isfinite(values)
+        x = np.where(present, values, 0.0).astype(np.float32)
+        return {"x": x, "mask": present.astype(np.float32)}
+
+    return store.memo("profile_matrix", build)
+
+
+def _block_scores(
+    x: np.ndarray, x2: np.ndarray, mask: np.ndarray, q: np.ndarray, qmask: np.ndarray, metric: str
+):
+    """Similarity (higher is closer) of each row to q over the organs both have; also shared counts.
+    Cosine and Pearson are clipped to [-1, 1] against rounding error."""
+    q2 = q * q
+    n = mask @ qmask
+    dot = x @ q
+    sx = x @ qmask
+    sxx = x2 @ qmask
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if metric == "cosine":
+            score = dot / np.sqrt(sxx * (mask @ q2))
+        elif metric == "pearson":
+            sq = mask @ q
+            cov = dot - sx * sq / n
+            score = cov / np.sqrt((sxx - sx * sx / n) * ((mask @ q2) - sq * sq / n))
+        else:
+            # Squared distance over shared organs, rescaled to all organs so overlaps compare.
+            d2 = np.maximum(sxx - 2.0 * dot + (mask @ q2), 0.0) * (q.size / n)
+            score = -np.sqrt(d2)
+    if metric != "euclidean":
+        score = np.clip(score, -1.0, 1.0)
+    return score, n
+
+
+def similar_genes(
+    store: OrganStore,
+    gene_symbol: str,
+    k: int = 50,
+    metric: str = "cosine",
+    min_shared: int = 3,
+) -> Dict[str, Any]:
+    """Top-k genes whose cross-organ log2 fold-change profile resembles the query gene's.
+
+    Missing organs are masked: each pair is compared only over the organs both genes were
+    measured in, and pairs sharing fewer than min_shared organs are skipped.
+    """
+    if metric not in SIMILARITY_METRICS:
+        raise ValueError(f"metric must be one of: {', '.join(SIMILARITY_METRICS)}")
+    gid = store.symbol_id(gene_symbol)
+    if gid is None:
+        raise KeyError(gene_symbol)
+    prof = _profile_matrix(store)
+    x, mask = prof["x"], prof["mask"]
+    q, qmask = x[gid].astype(np.float64), mask[gid].astype(np.float64)
+    min_shared = max(2 if metric == "pearson" else 1, int(min_shared))
+    k = max(1, int(k))
+
+    best_idx = np.empty(0, dtype=np.int64)
+    best_score = np.empty(0, dtype=np.float64)
+    best_n = np.empty(0, dtype=np.float64)
+    for start in range(0, x.shape[0], SIMILAR_BLOCK_ROWS):
+        stop = min(start + SIMILAR_BLOCK_ROWS, x.shape[0])
+        xb = x[start:stop].astype(np.float64)
+        score, n = _block_scores(xb, xb * xb, mask[start:stop].astype(np.float64), q, qmask, metric)
+        # Rounded before ranking so near-ties fall back to symbol order, not float noise.
+        score = np.round(score, SIMILARITY_DECIMALS)
+        score[~np.isfinite(score) | (n < min_shared)] = -np.inf
+        if start <= gid < stop:
+            score[gid - start] = -np.inf
+        take = min(k, score.size)
+        top = np.argpartition(-score, take - 1)[:take]
+        top = top[np.isfinite(score[top])]
+        best_idx = np.concatenate([best_idx, top + start])
+        best_score = np.concatenate([best_score, score[top]])
+        best_n = np.concatenate([best_n, n[top]])
+        if best_idx.size > k:
+            keep = np.argpartition(-best_score, k - 1)[:k]
+            best_idx, best_score, best_n = best_idx[keep], best_score[keep], best_n[keep]
+    order = np.lexsort((best_idx, -best_score))
+    values = metric_matrix(store, "log2_fold_change")
+
+    def profile(row: int) -> List[Optional[float]]:
+        return [finite_or_none(v) for v in values[row]]
+
+    neighbors = []
+    for i in order:
+        row = int(best_idx[i])
+        sc = float(best_score[i])
+        neighbors.append(
+            {
+                "gene_symbol": store.symbols[row],
+                "score": -sc if metric == "euclidean" else sc,
+                "shared_organs": int(best_n[i]),
+                "profile": profile(row),
+            }
+        )
+    return {
+        "generation": store.generation,
+        "gene_symbol": store.symbols[gid],
+        "metric": metric,
+        "score_meaning": "distance (lower is closer)" if metric == "euclidean" else "similarity (higher is closer)",
+        "organs": store.organ_names,
+        "profile": profile(gid),
+        "neighbors": neighbors,
+    }
+
+
+class OrganStats:
+    """Per-organ statistics precomputed for the current store, refreshed per organ generation."""
+
+    def __init__(self):
+        self._cache = PerOrganCache(compute_organ_stats)
+        self._volcano_base = PerOrganCache(compute_volcano_base)
+
+    def refresh(self, store: OrganStore) -> List[str]:
+        refreshed = self._cache.refresh(store)
+        self._volcano_base.refresh(store)
+        if refreshed:
+            print(f"Organ statistics recomputed for: {', '.join(refreshed)}")
+        return refreshed
+
+    def summary(self, store: OrganStore) -> Dict[str, Any]:
+        return {
+            "generation": store.generation,
+            "fdr_cutoffs": list(FDR_CUTOFFS),
+            "organs": [self._cache.get(cols)["summary"] for cols in store.organs.values()],
+        }
+
+    def distribution(self, cols: OrganColumns) -> Dict[str, Any]:
+        stats = self._cache.get(cols)
+        return {**stats["summary"], "histograms": stats["histograms"]}
+
+    def volcano(self, cols: OrganColumns, **options: Any) -> Dict[str, Any]:
+        return volcano(cols, self._volcano_base.get(cols), **options)
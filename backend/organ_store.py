@@ -0,0 +1,355 @@
+"""Columnar per-organ gene tables built from gene_data rows (Excel under backend/data and/or MongoDB).
+
+Each organ is held as parallel NumPy arrays (one row per gene) plus a content digest, its
+"generation". The store-level generation changes whenever any organ's content changes, so
+derived statistics can be cached per generation and recomputed only for organs that moved.
+"""
+
+import bisect
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from typing import IO, Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Response field name → gene_data document key (same mapping as GeneSearchAPI.search_gene_data).
+NUMERIC_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("p_value", "p_value_10_mgkg_vs_control"),
+    ("fdr_step_up", "fdr_step_up_10_mgkg_vs_control"),
+    ("ratio", "ratio_10_mgkg_vs_control"),
+    ("fold_change", "fold_change_10_mgkg_vs_control"),
+    ("lsmean_10mgkg", "lsmean_10mgkg_10_mgkg_vs_control"),
+    ("lsmean_control", "lsmean_control_10_mgkg_vs_control"),
+)
+
+# gene_data document key → column heading in the organ workbooks under backend/data.
+EXCEL_COLUMNS: Dict[str, str] = {
+    "gene_symbol": "Gene_symbol",
+    "gene_name": "Gene_name",
+    "p_value_10_mgkg_vs_control": "P_value_10_mgkg_vs_control",
+    "fdr_step_up_10_mgkg_vs_control": "FDR_step_up_10_mgkg_vs_control",
+    "ratio_10_mgkg_vs_control": "Ratio_10_mgkg_vs_control",
+    "fold_change_10_mgkg_vs_control": "Fold_change_10_mgkg_vs_control",
+    "lsmean_10mgkg_10_mgkg_vs_control": "LSMean10mgkg_10_mgkg_vs_control",
+    "lsmean_control_10_mgkg_vs_control": "LSMeancontrol_10_mgkg_vs_control",
+}
+
+SNAPSHOT_VERSION = 1
+_SEP = "\x1f"
+
+
+def gene_doc_number(value) -> Optional[float]:
+    """Typed gene_data schema: finite numbers as float (BSON double), anything else as None."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        f = float(str(value).strip()) if isinstance(value, str) else float(value)
+    except (TypeError, ValueError):
+        return None
+    return f if np.isfinite(f) else None
+
+
+def _short_digest(h: "hashlib._Hash") -> str:
+    return h.hexdigest()[:16]
+
+
+class OrganColumns:
+    """One organ's rows as aligned arrays; `row_of` maps lower-cased symbol → row index."""
+
+    __slots__ = ("organ", "symbols", "names", "columns", "row_of", "generation")
+
+    def __init__(
+        self,
+        organ: str,
+        symbols: np.ndarray,
+        names: np.ndarray,
+        columns: Dict[str, np.ndarray],
+    ):
+        self.organ = organ
+        self.symbols = symbols
+        self.names = names
+        self.columns = columns
+        self.row_of: Dict[str, int] = {}
+        for i, s in enumerate(symbols.tolist()):
+            self.row_of.setdefault(s.lower(), i)
+        h = hashlib.sha1(organ.encode("utf-8"))
+        h.update("\x1f".join(symbols.tolist()).encode("utf-8"))
+        h.update("\x1f".join(names.tolist()).encode("utf-8"))
+        for field, _key in NUMERIC_FIELDS:
+            h.update(columns[field].tobytes())
+        self.generation = _short_digest(h)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.columns[field]
+
+    @classmethod
+    def from_frame(cls, organ: str, df: pd.DataFrame) -> "OrganColumns":
+        """Build from a frame with gene_data document keys (numbers may be strings)."""
+        columns: Dict[str, np.ndarray] = {}
+        for field, key in NUMERIC_FIELDS:
+            if key in df.columns:
+                values = pd.to_numeric(df[key], errors="coerce").to_numpy(dtype=np.float64)
+            else:
+                values = np.full(len(df), np.nan)
+            columns[field] = np.ascontiguousarray(values)
+        symbols = df["gene_symbol"].astype(str).str.strip().to_numpy(dtype=object)
+        if "gene_name" in df.columns:
+            names = df["gene_name"].fillna("").astype(str).to_numpy(dtype=object)
+        else:
+            names = np.full(len(df), "", dtype=object)
+        return cls(organ, symbols, names, columns)
+
+
+def frame_from_records(records: Iterable[Dict]) -> pd.DataFrame:
+    """gene_data rows → frame, first row per (organ, symbol) wins like _raw_docs_for_gene."""
+    df = pd.DataFrame.from_records(list(records))
+    if df.empty or "gene_symbol" not in df.columns or "organ" not in df.columns:
+        return pd.DataFrame(columns=["organ", "gene_symbol"])
+    df = df[df["gene_symbol"].astype(str).str.strip() != ""]
+    key = df["gene_symbol"].astype(str).str.strip().str.lower()
+    dup = df.assign(_key=key).duplicated(subset=["organ", "_key"], keep="first")
+    return df[~dup].reset_index(drop=True)
+
+
+def organs_from_records(records: Iterable[Dict]) -> Dict[str, OrganColumns]:
+    df = frame_from_records(records)
+    out: Dict[str, OrganColumns] = {}
+    for organ, part in df.groupby("organ", sort=True):
+        out[str(organ)] = OrganColumns.from_frame(str(organ), part.reset_index(drop=True))
+    return out
+
+
+def organ_from_workbook(path: str) -> Optional[OrganColumns]:
+    """One organ workbook (organ name = file stem) straight into columns; None if it has no genes."""
+    organ = os.path.splitext(os.path.basename(path))[0]
+    df = pd.read_excel(path).rename(columns={v: k for k, v in EXCEL_COLUMNS.items()})
+    df = frame_from_records(df.assign(organ=organ).to_dict("records"))
+    if df.empty:
+        return None
+    return OrganColumns.from_frame(organ, df)
+
+
+def _pack_strings(values: np.ndarray) -> np.ndarray:
+    return np.frombuffer(_SEP.join(values.tolist()).encode("utf-8"), dtype=np.uint8)
+
+
+def _unpack_strings(buf: np.ndarray, n: int) -> np.ndarray:
+    if n == 0:
+        return np.empty(0, dtype=object)
+    out = np.empty(n, dtype=object)
+    out[:] = buf.tobytes().decode("utf-8").split(_SEP)
+    return out
+
+
+class OrganStore:
+    """Immutable snapshot of all organs plus a case-insensitive symbol index.
+
+    Replace organs with `with_organs`, which returns a new store; readers holding the old
+    one keep a consistent view (OrganColumns are shared between stores, never mutated).
+    `gene_ids[organ]` gives the symbol-index id of every row of that organ.
+    """
+
+    def __init__(self, organs: Dict[str, OrganColumns]):
+        self.organs: Dict[str, OrganColumns] = dict(sorted(organs.items()))
+        symbols: Dict[str, str] = {}
+        for cols in self.organs.values():
+            for s in cols.symbols.tolist():
+                symbols.setdefault(s.lower(), s)
+        self.symbols: List[str] = sorted(symbols.values(), key=lambda x: (x.lower(), x))
+        self.symbol_ids: Dict[str, int] = {s.lower(): i for i, s in enumerate(self.symbols)}
+        self.gene_ids: Dict[str, np.ndarray] = {
+            name: np.fromiter(
+                (self.symbol_ids[s.lower()] for s in cols.symbols.tolist()),
+                dtype=np.int64,
+                count=len(cols),
+            )
+            for name, cols in self.organs.items()
+        }
+        h = hashlib.sha1()
+        for name, cols in self.organs.items():
+            h.update(f"{name}={cols.generation};".encode("utf-8"))
+        self.generation = _short_digest(h)
+        self._memo: Dict[Hashable, Any] = {}
+        self._memo_lock = threading.Lock()
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "OrganStore":
+        return cls(organs_from_records(records))
+
+    def with_organs(self, replaced: Dict[str, Optional[OrganColumns]]) -> "OrganStore":
+        """New store with the given organs replaced (None removes the organ)."""
+        organs = dict(self.organs)
+        for name, cols in replaced.items():
+            if cols is None:
+                organs.pop(name, None)
+            else:
+                organs[name] = cols
+        return OrganStore(organs)
+
+    @property
+    def organ_names(self) -> List[str]:
+        return list(self.organs.keys())
+
+    def organ(self, name: str) -> Optional[OrganColumns]:
+        """Exact organ name first, then case-insensitive (URLs are often lower-cased)."""
+        cols = self.organs.get(name)
+        if cols is not None:
+            return cols
+        low = name.strip().lower()
+        for key, cols in self.organs.items():
+            if key.lower() == low:
+                return cols
+        return None
+
+    def symbol_id(self, symbol: str) -> Optional[int]:
+        return self.symbol_ids.get(str(symbol).strip().lower())
+
+    def symbols_with_prefix(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """Symbols starting with prefix (case-insensitive) via binary search over the sorted index."""
+        keys = self.memo("symbol_keys", lambda: [s.lower() for s in self.symbols])
+        low = str(prefix).strip().lower()
+        start = bisect.bisect_left(keys, low)
+        end = bisect.bisect_left(keys, low + "\U0010ffff") if low else len(keys)
+        if limit is not None:
+            end = min(end, start + limit)
+        return self.symbols[start:end]
+
+    def gene_rows(self, symbol: str) -> List[Dict[str, Any]]:
+        """One row per organ holding the gene, in the /api/gene/symbol/search field names."""
+        key = str(symbol).strip().lower()
+        rows: List[Dict[str, Any]] = []
+        for organ, cols in self.organs.items():
+            i = cols.row_of.get(key)
+            if i is None:
+                continue
+            row: Dict[str, Any] = {
+                "organ": organ,
+                "gene_symbol": cols.symbols[i],
+                "gene_name": cols.names[i],
+            }
+            for field, _key in NUMERIC_FIELDS:
+                row[field] = gene_doc_number(cols[field][i])
+            rows.append(row)
+        return rows
+
+    def save_snapshot(self, path: str) -> None:
+        """Binary snapshot (uncompressed .npz, no pickled objects) that load_snapshot maps back quickly."""
+        arrays: Dict[str, np.ndarray] = {}
+        for i, cols in enumerate(self.organs.values()):
+            arrays[f"{i}_symbols"] = _pack_strings(cols.symbols)
+            arrays[f"{i}_names"] = _pack_strings(cols.names)
+            for field, _key in NUMERIC_FIELDS:
+                arrays[f"{i}_{field}"] = cols[field]
+        meta = {
+            "version": SNAPSHOT_VERSION,
+            "generation": self.generation,
+            "organs": [[name, len(cols)] for name, cols in self.organs.items()],
+        }
+        arrays["meta"] = np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)
+        fd, tmp = tempfile.mkstemp(
+            prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path) or "."
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load_snapshot(
+        cls,
+        source: Union[str, IO[bytes], bytes],
+        progress: Optional[Callable[[int, int, str], None]] = None,
+    ) -> "OrganStore":
+        """Inverse of save_snapshot; progress(done, total, organ) is called after each organ."""
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        with np.load(source, allow_pickle=False) as npz:
+            meta = json.loads(npz["meta"].tobytes().decode("utf-8"))
+            if meta.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported organ snapshot version: {meta.get('version')}")
+            organs: Dict[str, OrganColumns] = {}
+            total = len(meta["organs"])
+            for i, (name, n) in enumerate(meta["organs"]):
+                columns = {field: np.ascontiguousarray(npz[f"{i}_{field}"]) for field, _key in NUMERIC_FIELDS}
+                organs[name] = OrganColumns(
+                    name,
+                    _unpack_strings(npz[f"{i}_symbols"], n),
+                    _unpack_strings(npz[f"{i}_names"], n),
+                    columns,
+                )
+                if progress is not None:
+                    progress(i + 1, total, name)
+        store = cls(organs)
+        if store.generation != meta.get("generation"):
+            raise ValueError("Organ snapshot is corrupt (generation mismatch)")
+        return store
+
+    def memo(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Value derived from this store, computed once; it lives exactly as long as this generation."""
+        with self._memo_lock:
+            if key in self._memo:
+                return self._memo[key]
+        value = factory()
+        with self._memo_lock:
+            return self._memo.setdefault(key, value)
+
+    def dense(self, values: Callable[[OrganColumns], np.ndarray], key: Hashable) -> np.ndarray:
+        """Gene × organ float matrix (rows follow self.symbols, NaN where an organ lacks the gene)."""
+
+        def build() -> np.ndarray:
+            out = np.full((len(self.symbols), len(self.organs)), np.nan)
+            for j, (name, cols) in enumerate(self.organs.items()):
+                out[self.gene_ids[name], j] = values(cols)
+            out.setflags(write=False)
+            return out
+
+        return self.memo(("dense", key), build)
+
+
+class PerOrganCache:
+    """Derived per-organ values keyed by organ generation; stale organs are recomputed lazily."""
+
+    def __init__(self, compute: Callable[[OrganColumns], Dict]):
+        self._compute = compute
+        self._entries: Dict[str, Tuple[str, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, cols: OrganColumns) -> Dict:
+        with self._lock:
+            hit = self._entries.get(cols.organ)
+            if hit is not None and hit[0] == cols.generation:
+                return hit[1]
+        value = self._compute(cols)
+        with self._lock:
+            self._entries[cols.organ] = (cols.generation, value)
+        return value
+
+    def refresh(self, store: OrganStore) -> List[str]:
+        """Recompute organs whose generation changed, drop removed ones; returns refreshed names."""
+        with self._lock:
+            for name in list(self._entries.keys()):
+                if name not in store.organs:
+                    del self._entries[name]
+            stale = [
+                cols
+                for name, cols in store.organs.items()
+                if self._entries.get(name, ("", None))[0] != cols.generation
+            ]
+        for cols in stale:
+            self.get(cols)
+        return [c.organ for c in stale]
@@ -0,0 +1,67 @@
+"""JSON bodies serialized and compressed once, served with strong ETags and 304 revalidation.
+
+Brotli is used when the `brotli` package is installed and the client accepts it, else gzip.
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def _accepts(request: Request, coding: str) -> bool:
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class PrecompressedJSON:
+    """One JSON payload in identity / gzip / brotli form; `version` is a digest of the body."""
+
+    def __init__(self, payload: Any):
+        self.body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.version = hashlib.sha1(self.body).hexdigest()[:16]
+        self.encoded: Dict[str, bytes] = {"gzip": gzip.compress(self.body, compresslevel=9, mtime=0)}
+        if BROTLI_AVAILABLE:
+            self.encoded["br"] = brotli.compress(self.body, quality=11)
+
+    def etag(self, coding: Optional[str]) -> str:
+        # Strong validators must differ per representation, so the coding is part of the tag.
+        return f'"{self.version}-{coding}"' if coding else f'"{self.version}"'
+
+    def _not_modified(self, request: Request) -> bool:
+        header = request.headers.get("if-none-match")
+        if not header:
+            return False
+        if header.strip() == "*":
+            return True
+        current = {self.etag(None), self.etag("gzip"), self.etag("br")}
+        return any(tag.strip().removeprefix("W/") in current for tag in header.split(","))
+
+    def response(self, request: Request, immutable: bool = False) -> Response:
+        coding = next((c for c in ("br", "gzip") if c in self.encoded and _accepts(request, c)), None)
+        headers = {
+            "ETag": self.etag(coding),
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if self._not_modified(request):
+            return Response(status_code=304, headers=headers)
+        if coding:
+            headers["Content-Encoding"] = coding
+            return Response(self.encoded[coding], media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Pre-render per-gene profiles (JSON, optionally fold-change / LSMean plots) into the static
+directory the API serves from. Incremental: only genes whose data changed since the last run
+are rendered again.
+
+Usage: python3 precompute_profiles.py [--images] [--workers 8] [--out static/profiles]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render per-gene profiles for the API")
+    parser.add_argument(
+        "--out",
+        default=os.getenv("PROFILE_STATIC_DIR", os.path.join(BACKEND_DIR, "static", "profiles")),
+        help="Static output directory (default: PROFILE_STATIC_DIR or backend/static/profiles)",
+    )
+    parser.add_argument("--images", action="store_true", help="Also render the three bar-chart plots per gene")
+    parser.add_argument("--workers", type=int, default=0, help="Process pool size (0 = CPU count, 1 = no pool)")
+    parser.add_argument("--genes", nargs="*", help="Only these symbols (default: every symbol in all_genes)")
+    parser.add_argument("--force", action="store_true", help="Ignore the previous manifest and render everything")
+    parser.add_argument("--no-prune", action="store_true", help="Keep files no longer referenced by the manifest")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from gene_profiles import precompute_profiles
+    from server import gene_api  # loads MongoDB and/or backend/data/*.xlsx
+
+    symbols = args.genes or gene_api.all_genes
+    print(f"Pre-rendering {len(symbols)} genes into {args.out} (generation {gene_api.store.generation})")
+    started = time.monotonic()
+    report = precompute_profiles(
+        gene_api.store,
+        symbols,
+        args.out,
+        images=args.images,
+        workers=args.workers,
+        force=args.force,
+        prune=not args.no_prune and not args.genes,
+    )
+    print(
+        f"✅ {report['rendered']} rendered, {report['unchanged']} unchanged, "
+        f"{report['pruned_files']} stale files removed in {time.monotonic() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Benchmark cross-organ statistics: MongoDB aggregation pushdown vs the in-memory store.
+
+Both backends are fed the same rows (the in-memory store is built from the gene_data
+collection), so the script also reports whether their answers agree. Without MongoDB it
+times the in-memory backend alone over backend/data/*.xlsx.
+
+Usage: python3 backend/scripts/benchmark_cross_organ_stats.py [--repeats 5] [--fdr-max 0.05]
+Reads MONGODB_URI from the environment or backend/.env; run after migrate_gene_data_numeric.py.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO_BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_BACKEND))
+
+from dotenv import load_dotenv  # noqa: E402
+from pymongo import MongoClient  # noqa: E402
+
+from cross_organ_stats import (  # noqa: E402
+    InMemoryCrossOrganStats,
+    MongoCrossOrganStats,
+    benchmark,
+)
+from organ_store import OrganStore  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--fdr-max", type=float, default=0.05)
+    args = parser.parse_args()
+
+    load_dotenv(REPO_BACKEND / ".env")
+    uri = os.getenv("MONGODB_URI")
+    backends = []
+    if uri:
+        collection = MongoClient(uri).gene_search_db.gene_data
+        started = time.monotonic()
+        store = OrganStore.from_records(collection.find({}, {"_id": 0}))
+        print(f"Loaded {len(store.symbols)} genes in {len(store.organs)} organs from MongoDB "
+              f"in {time.monotonic() - started:.1f}s")
+        backends.append(MongoCrossOrganStats(collection))
+    else:
+        print("MONGODB_URI not set; benchmarking the in-memory backend only")
+        from server import gene_api  # noqa: E402  (loads backend/data/*.xlsx)
+
+        store = gene_api.store
+    backends.append(InMemoryCrossOrganStats(lambda: store))
+
+    report = benchmark(backends, repeats=args.repeats, fdr_max=args.fdr_max)
+    print(json.dumps(report, indent=2))
+    return 0 if all(report["results_agree"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Convert stringified numeric columns in MongoDB gene_data to doubles (null when missing).
+
+Batched and resumable: only documents that still hold a string in a numeric column are
+selected, in _id order, so an interrupted run simply continues where it stopped. Finishes by
+creating the (organ, fdr) and (organ, fold_change) compound indexes and the case-insensitive
+gene_symbol index. /api/stats only uses MongoDB once no string-typed columns remain.
+
+Usage: python3 backend/scripts/migrate_gene_data_numeric.py [--batch-size 1000] [--dry-run]
+Reads MONGODB_URI from the environment or backend/.env.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO_BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_BACKEND))
+
+from dotenv import load_dotenv  # noqa: E402
+from pymongo import ASCENDING, MongoClient, UpdateOne  # noqa: E402
+
+from cross_organ_stats import SYMBOL_COLLATION  # noqa: E402
+from organ_store import NUMERIC_FIELDS, gene_doc_number  # noqa: E402
+
+NUMERIC_KEYS = [key for _field, key in NUMERIC_FIELDS]
+
+
+def pending_filter() -> dict:
+    return {"$or": [{key: {"$type": "string"}} for key in NUMERIC_KEYS]}
+
+
+def migrate(collection, batch_size: int, dry_run: bool) -> int:
+    converted = 0
+    last_id = None
+    started = time.monotonic()
+    while True:
+        query = pending_filter()
+        if last_id is not None:
+            query = {"$and": [query, {"_id": {"$gt": last_id}}]}
+        batch = list(
+            collection.find(query, {key: 1 for key in NUMERIC_KEYS})
+            .sort("_id", ASCENDING)
+            .limit(batch_size)
+        )
+        if not batch:
+            break
+        ops = []
+        for doc in batch:
+            update = {key: gene_doc_number(doc.get(key)) for key in NUMERIC_KEYS if key in doc}
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+        if not dry_run:
+            collection.bulk_write(ops, ordered=False)
+        converted += len(batch)
+        last_id = batch[-1]["_id"]
+        rate = converted / max(time.monotonic() - started, 1e-9)
+        print(f"Converted {converted} documents (last _id {last_id}, {rate:.0f} docs/s)")
+    return converted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--skip-indexes", action="store_true")
+    args = parser.parse_args()
+
+    load_dotenv(REPO_BACKEND / ".env")
+    uri = os.getenv("MONGODB_URI")
+    if not uri:
+        print("MONGODB_URI is not set (environment or backend/.env)", file=sys.stderr)
+        sys.exit(1)
+    collection = MongoClient(uri).gene_search_db.gene_data
+
+    remaining = collection.count_documents(pending_filter())
+    print(f"{remaining} gene_data documents still have string-typed numeric columns")
+    converted = migrate(collection, max(1, args.batch_size), args.dry_run)
+    print(f"Done: {converted} documents {'would be ' if args.dry_run else ''}converted")
+
+    if not args.skip_indexes and not args.dry_run:
+        collection.create_index([("organ", ASCENDING), ("fdr_step_up_10_mgkg_vs_control", ASCENDING)])
+        collection.create_index([("organ", ASCENDING), ("fold_change_10_mgkg_vs_control", ASCENDING)])
+        collection.create_index([("gene_symbol", ASCENDING)], name="gene_symbol_ci", collation=SYMBOL_COLLATION)
+        print(
+            "Ensured indexes on (organ, fdr_step_up_10_mgkg_vs_control), (organ, fold_change_10_mgkg_vs_control)"
+            " and case-insensitive gene_symbol"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Precompute g:Profiler enrichment for the bundled sample gene lists into the persistent store.
+
+Runs both request shapes the ontology endpoints use (plain and with intersections), so the
+first users after a deploy get cached results. Extra .txt gene lists can be passed as arguments.
+
+Usage: python3 backend/scripts/prewarm_enrichment.py [more_genes.txt ...]
+Uses ENRICHMENT_STORE_PATH from the environment or backend/.env (see env.example).
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+REPO_BACKEND = Path(__file__).resolve().parent.parent
+REPO_ROOT = REPO_BACKEND.parent
+sys.path.insert(0, str(REPO_BACKEND))
+
+SAMPLE_LISTS = [
+    REPO_ROOT / "genegen" / "public" / "data" / "sample-genes-885.txt",
+    REPO_ROOT / "genegen" / "public" / "885_genes.txt",
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("files", nargs="*", type=Path, help="Additional gene list files (one symbol per line)")
+    args = parser.parse_args()
+
+    from server import ontology_api  # noqa: E402  (opens the enrichment store)
+
+    if ontology_api.enrichment_cache.store is None:
+        print("Enrichment store is disabled (ENRICHMENT_STORE_PATH is empty); nothing to prewarm")
+        return 1
+    failures = 0
+    for path in [*SAMPLE_LISTS, *args.files]:
+        if not path.is_file():
+            print(f"Skipping missing gene list: {path}")
+            continue
+        genes = ontology_api.load_genes_from_file(path.read_text(encoding="utf-8"))
+        started = time.monotonic()
+        plain = ontology_api.enrich(genes)
+        with_genes = ontology_api.enrich_with_genes(genes)
+        if plain.empty or with_genes.empty:
+            print(f"❌ {path.name}: enrichment returned no results (is g:Profiler reachable?)")
+            failures += 1
+            continue
+        print(f"✅ {path.name}: {len(genes)} genes, {len(plain)} terms in {time.monotonic() - started:.1f}s")
+    stats = ontology_api.enrichment_cache.stats()
+    print(f"Store: {ontology_api.enrichment_cache.store.path} (persistent hits this run: {stats['persistent_hits']})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
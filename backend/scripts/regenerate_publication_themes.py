@@ -1,18 +1,32 @@
 #!/usr/bin/env python3
-"""Regenerate backend/ontology_publication_themes.py from t_GO_publication.py THEMES."""
+"""Regenerate backend/ontology_publication_themes.py from t_GO_publication.py THEMES.
+
+With --go-obo, also precompute the GO term → theme table (ontology_term_themes.json.gz) for
+every term in that GO snapshot, using the theme module just written. The server looks terms
+up there by ID / name and only keyword-matches terms the snapshot does not cover.
+
+Usage:
+  python3 backend/scripts/regenerate_publication_themes.py [path/to/t_GO_publication.py] [--go-obo go-basic.obo]
+  python3 backend/scripts/regenerate_publication_themes.py --table-only --go-obo go-basic.obo
+"""
 from __future__ import annotations
 
+import argparse
 import ast
+import gzip
+import importlib.util
+import json
 import sys
 from pathlib import Path
 
 DEFAULT_SOURCE = Path("/home/asa/Desktop/t_go_test/t_GO_publication.py")
 REPO_BACKEND = Path(__file__).resolve().parent.parent
 OUT = REPO_BACKEND / "ontology_publication_themes.py"
+TABLE_OUT = REPO_BACKEND / "ontology_term_themes.json.gz"
+sys.path.insert(0, str(REPO_BACKEND))
 
 
-def main() -> None:
-    src = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SOURCE
+def write_theme_module(src: Path) -> None:
     if not src.is_file():
         print(f"Source not found: {src}", file=sys.stderr)
         sys.exit(1)
@@ -122,5 +136,46 @@ def main() -> None:
     print(f"Wrote {OUT}")
 
 
+def write_term_table(obo: Path, out: Path) -> None:
+    """Theme masks for every GO term in the snapshot, for the publication and combined maps."""
+    from local_enrichment import parse_obo
+    from theme_matcher import build_term_theme_table, theme_matcher
+
+    # Load the module from disk: it may have been rewritten a moment ago in this process.
+    spec = importlib.util.spec_from_file_location("ontology_publication_themes", OUT)
+    themes = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(themes)
+    publication = dict(themes.PUBLICATION_THEME_KEYWORDS)
+    combined = {**themes.PUBLICATION_THEME_KEYWORDS, **themes.UI_ONTOLOGY_THEME_KEYWORDS}
+
+    terms = {tid: t["name"] for tid, t in parse_obo(str(obo)).items() if t.get("name")}
+    table = build_term_theme_table(
+        terms,
+        {"publication": theme_matcher(publication), "combined": theme_matcher(combined)},
+        source=obo.name,
+    )
+    with gzip.open(out, "wt", encoding="utf-8") as f:
+        json.dump(table, f, separators=(",", ":"))
+    themed = sum(1 for m in table["maps"]["publication"]["masks"] if m)
+    print(f"Wrote {out} ({len(terms)} GO terms, {themed} with a publication theme)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("source", nargs="?", type=Path, default=DEFAULT_SOURCE, help="t_GO_publication.py")
+    parser.add_argument("--go-obo", type=Path, help="GO snapshot (go-basic.obo, optionally .gz) for the term table")
+    parser.add_argument("--table-out", type=Path, default=TABLE_OUT)
+    parser.add_argument("--table-only", action="store_true", help="Keep the theme module; only rebuild the table")
+    args = parser.parse_args()
+
+    if not args.table_only:
+        write_theme_module(args.source)
+    if args.go_obo:
+        if not args.go_obo.is_file():
+            print(f"GO snapshot not found: {args.go_obo}", file=sys.stderr)
+            sys.exit(1)
+        write_term_table(args.go_obo, args.table_out)
+
+
 if __name__ == "__main__":
     main()
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, HTTPException, Query, Depends, status, UploadFile, File, Form, Header
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Depends, status, UploadFile, File, Form, Header, Request
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel
@@ -7,6 +8,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib
 from matplotlib.font_manager import FontProperties
+from matplotlib.figure import Figure
 matplotlib.use('Agg')  # Use non-interactive backend
 
 # 配置matplotlib以避免字体问题
@@ -18,14 +20,17 @@ import io
 import os
 import glob
 import re
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
 import json
 from datetime import datetime, timezone
 import numpy as np
 import secrets
 import os
 from dotenv import load_dotenv
-from pymongo import MongoClient
+import threading
+import asyncio
+from types import MappingProxyType
+from pymongo import TEXT, MongoClient, ReplaceOne
 from pymongo.errors import ConnectionFailure
 import seaborn as sns
 from gprofiler import GProfiler
@@ -36,6 +41,20 @@ from ontology_publication_themes import (
     UI_ONTOLOGY_THEME_KEYWORDS,
 )
 from ivcca_core import IVCCAAnalyzer, TwoSetCorrelation
+from organ_store import OrganStore, gene_doc_number, organs_from_records
+from data_watcher import DataDirWatcher
+from ttl_cache import TTLCache
+from organ_stats import OrganStats, gene_set_score, metric_matrix, organ_correlation, similar_genes
+from cross_organ_stats import SYMBOL_COLLATION, InMemoryCrossOrganStats, MongoCrossOrganStats
+from gene_text_search import gene_text_index
+from theme_matcher import TermThemeTable, ThemeMatcher, theme_matcher
+from theme_network import ThemeGeneMatrix
+from precompressed import IMMUTABLE_CACHE_CONTROL, PrecompressedJSON
+from enrichment_cache import EnrichmentCache
+from enrichment_store import EnrichmentStore
+from local_enrichment import LocalEnrichmentEngine
+from gprofiler_client import DEFAULT_BASE_URL as GPROFILER_DEFAULT_URL, AsyncGProfilerClient
+from gene_profiles import MANIFEST_NAME, ProfileManifest, gene_profile, profile_digest, render_compare_chart
 from clerk_auth import (
     clerk_auth_configured,
     clerk_issuer,
@@ -92,6 +111,67 @@ if MONGODB_URI:
 else:
     print("MONGODB_URI not provided, server will start without MongoDB functionality")
 
+# Hot reload of backend/data/*.xlsx (DATA_WATCH=0 disables; re-ingested organs optionally upserted into MongoDB).
+DATA_WATCH_ENABLED = os.getenv("DATA_WATCH", "1").strip().lower() not in ("0", "false", "no", "off")
+DATA_WATCH_INTERVAL = float(os.getenv("DATA_WATCH_INTERVAL", "5"))
+DATA_RELOAD_TO_MONGODB = os.getenv("DATA_RELOAD_TO_MONGODB", "").strip().lower() in ("1", "true", "yes", "on")
+
+# Read-through cache of merged (MongoDB + Excel) per-gene rows, keyed by symbol and data generation.
+GENE_CACHE_SIZE = int(os.getenv("GENE_CACHE_SIZE", "4096"))
+GENE_CACHE_TTL = float(os.getenv("GENE_CACHE_TTL", "300"))
+
+# Binary organ snapshot rewritten whenever the data generation changes (read by GeneSearchAppWithGUI.py).
+ORGAN_SNAPSHOT_PATH = os.getenv(
+    "ORGAN_SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "organ_snapshot.npz"),
+)
+
+# Raw g:Profiler results keyed by (gene set, organism, evidences); thresholds are applied locally.
+ENRICHMENT_CACHE_SIZE = int(os.getenv("ENRICHMENT_CACHE_SIZE", "256"))
+ENRICHMENT_CACHE_TTL = float(os.getenv("ENRICHMENT_CACHE_TTL", "86400"))
+GPROFILER_ORGANISM = "mmusculus"
+
+# Async g:Profiler client used by the ontology endpoints (pooled; retries 429/5xx/timeouts with jittered backoff).
+GPROFILER_BASE_URL = os.getenv("GPROFILER_BASE_URL", GPROFILER_DEFAULT_URL)
+GPROFILER_TIMEOUT = float(os.getenv("GPROFILER_TIMEOUT", "60"))
+GPROFILER_MAX_CONNECTIONS = int(os.getenv("GPROFILER_MAX_CONNECTIONS", "10"))
+GPROFILER_MAX_CONCURRENCY = int(os.getenv("GPROFILER_MAX_CONCURRENCY", "4"))
+GPROFILER_RETRIES = int(os.getenv("GPROFILER_RETRIES", "3"))
+
+# Persistent copy of the enrichment cache (ENRICHMENT_STORE_PATH= empty disables), warmed on start.
+ENRICHMENT_STORE_PATH = os.getenv(
+    "ENRICHMENT_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "user_data", "enrichment_cache.sqlite3"),
+)
+ENRICHMENT_STORE_TTL = float(os.getenv("ENRICHMENT_STORE_TTL", str(30 * 86400)))
+ENRICHMENT_STORE_MAX_MB = float(os.getenv("ENRICHMENT_STORE_MAX_MB", "256"))
+ENRICHMENT_STORE_COMPACT_INTERVAL = float(os.getenv("ENRICHMENT_STORE_COMPACT_INTERVAL", "3600"))
+
+# ENRICHMENT_ENGINE=local runs enrichment offline against local GO annotations instead of g:Profiler.
+# LOCAL_ENRICHMENT_GMT is a comma-separated list of "path" or "SOURCE=path" (e.g. GO:BP=go_bp.gmt);
+# LOCAL_ENRICHMENT_GAF is propagated up the ontology given in LOCAL_ENRICHMENT_OBO.
+ENRICHMENT_ENGINE = os.getenv("ENRICHMENT_ENGINE", "gprofiler").strip().lower()
+LOCAL_ENRICHMENT_GMT = [p.strip() for p in os.getenv("LOCAL_ENRICHMENT_GMT", "").split(",") if p.strip()]
+LOCAL_ENRICHMENT_GAF = os.getenv("LOCAL_ENRICHMENT_GAF", "").strip() or None
+LOCAL_ENRICHMENT_OBO = os.getenv("LOCAL_ENRICHMENT_OBO", "").strip() or None
+
+COMPARE_CHART_MAX_GENES = int(os.getenv("COMPARE_CHART_MAX_GENES", "12"))
+# POST /api/ontology/compare: most gene lists per request, and how many are enriched at once.
+COMPARE_MAX_LISTS = int(os.getenv("COMPARE_MAX_LISTS", "12"))
+COMPARE_MAX_CONCURRENCY = max(1, int(os.getenv("COMPARE_MAX_CONCURRENCY", "4")))
+
+# Precomputed GO term → theme table (scripts/regenerate_publication_themes.py --go-obo); optional.
+TERM_THEME_TABLE_PATH = os.getenv(
+    "TERM_THEME_TABLE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ontology_term_themes.json.gz"),
+)
+
+# Pre-rendered per-gene profiles / plots written by precompute_profiles.py (served under /static/profiles).
+PROFILE_STATIC_DIR = os.getenv(
+    "PROFILE_STATIC_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "profiles"),
+)
+
 USER_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "user_data")
 
 # Pydantic models
@@ -148,6 +228,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class ProfileStaticFiles(StaticFiles):
+    """Content-hashed files never change under a URL, so clients and proxies may cache them indefinitely.
+    manifest.json is rewritten in place and keeps the default (revalidated) headers."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if os.path.basename(full_path) != MANIFEST_NAME:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+# Created up front so profiles not generated yet are a 404, not a StaticFiles config error.
+os.makedirs(PROFILE_STATIC_DIR, exist_ok=True)
+app.mount("/static/profiles", ProfileStaticFiles(directory=PROFILE_STATIC_DIR), name="profiles")
+profile_manifest = ProfileManifest(PROFILE_STATIC_DIR)
+
 # Security
 security = HTTPBasic()
 
@@ -204,6 +301,7 @@ class GeneSearchAPI:
 
     @staticmethod
     def _record_from_excel_row(organ_name: str, row) -> Optional[Dict]:
+        """gene_data document: numeric columns stored as doubles, missing / unparseable as null."""
         gene_symbol = str(row.get("Gene_symbol", "")).strip()
         if not gene_symbol:
             return None
@@ -211,14 +309,26 @@ class GeneSearchAPI:
             "organ": organ_name,
             "gene_symbol": gene_symbol,
             "gene_name": str(row.get("Gene_name", "")),
-            "p_value_10_mgkg_vs_control": str(row.get("P_value_10_mgkg_vs_control", "")),
-            "fdr_step_up_10_mgkg_vs_control": str(row.get("FDR_step_up_10_mgkg_vs_control", "")),
-            "ratio_10_mgkg_vs_control": str(row.get("Ratio_10_mgkg_vs_control", "")),
-            "fold_change_10_mgkg_vs_control": str(row.get("Fold_change_10_mgkg_vs_control", "")),
-            "lsmean_10mgkg_10_mgkg_vs_control": str(row.get("LSMean10mgkg_10_mgkg_vs_control", "")),
-            "lsmean_control_10_mgkg_vs_control": str(row.get("LSMeancontrol_10_mgkg_vs_control", "")),
+            "p_value_10_mgkg_vs_control": gene_doc_number(row.get("P_value_10_mgkg_vs_control")),
+            "fdr_step_up_10_mgkg_vs_control": gene_doc_number(row.get("FDR_step_up_10_mgkg_vs_control")),
+            "ratio_10_mgkg_vs_control": gene_doc_number(row.get("Ratio_10_mgkg_vs_control")),
+            "fold_change_10_mgkg_vs_control": gene_doc_number(row.get("Fold_change_10_mgkg_vs_control")),
+            "lsmean_10mgkg_10_mgkg_vs_control": gene_doc_number(row.get("LSMean10mgkg_10_mgkg_vs_control")),
+            "lsmean_control_10_mgkg_vs_control": gene_doc_number(row.get("LSMeancontrol_10_mgkg_vs_control")),
         }
 
+    def _load_disk_organ(self, file_path: str) -> List[Dict]:
+        """Gene rows from one organ workbook (organ name = file stem)."""
+        organ_name = os.path.splitext(os.path.basename(file_path))[0]
+        out: List[Dict] = []
+        df = pd.read_excel(file_path)
+        print(f"Indexed {len(df)} rows from Excel: {file_path}")
+        for _, row in df.iterrows():
+            rec = self._record_from_excel_row(organ_name, row)
+            if rec:
+                out.append(rec)
+        return out
+
     def _load_disk_records(self) -> List[Dict]:
         """In-memory gene rows from backend/data/*.xlsx (used when MongoDB is off or empty)."""
         out: List[Dict] = []
@@ -227,23 +337,106 @@ class GeneSearchAPI:
             print(f"Data directory not found: {data_dir}")
             return out
         for file_path in glob.glob(os.path.join(data_dir, "*.xlsx")):
-            organ_name = os.path.splitext(os.path.basename(file_path))[0]
             try:
-                df = pd.read_excel(file_path)
-                print(f"Indexed {len(df)} rows from Excel: {file_path}")
-                for _, row in df.iterrows():
-                    rec = self._record_from_excel_row(organ_name, row)
-                    if rec:
-                        out.append(rec)
+                out.extend(self._load_disk_organ(file_path))
             except Exception as e:
                 print(f"Error reading {file_path}: {e}")
         print(f"Excel index: {len(out)} total gene rows under {data_dir}")
         return out
 
     def __init__(self):
+        self._refresh_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._text_index_ready = False
+        self.gene_cache = TTLCache("gene_rows", maxsize=GENE_CACHE_SIZE, ttl=GENE_CACHE_TTL)
         self._disk_records = self._load_disk_records()
         self.load_data_to_mongodb()
         self.all_genes = self.load_all_genes()
+        self.organ_stats = OrganStats()
+        self.store = self.build_store()
+        self.organ_stats.refresh(self.store)
+        self.write_snapshot()
+
+    def _merged_records(self, organs: Optional[List[str]] = None) -> List[Dict]:
+        """All gene rows (MongoDB first, then Excel), optionally limited to some organs."""
+        out: List[Dict] = []
+        if MONGODB_AVAILABLE:
+            try:
+                query = {"organ": {"$in": list(organs)}} if organs is not None else {}
+                out.extend(collection.find(query, {"_id": 0}))
+            except Exception as e:
+                print(f"Warning: MongoDB organ scan failed: {e}")
+        wanted = set(organs) if organs is not None else None
+        for rec in self._disk_records:
+            if wanted is None or rec.get("organ") in wanted:
+                out.append(rec)
+        return out
+
+    def build_store(self) -> OrganStore:
+        """Columnar organ arrays over the merged MongoDB + Excel rows."""
+        store = OrganStore.from_records(self._merged_records())
+        print(
+            f"Organ store: {len(store.organs)} organs, {len(store.symbols)} symbols "
+            f"(generation {store.generation})"
+        )
+        return store
+
+    def refresh_organs(self, organs: List[str]) -> None:
+        """Re-read only the given organs and swap in a new store; stats follow organ generations."""
+        with self._refresh_lock:
+            rebuilt = organs_from_records(self._merged_records(organs))
+            self.store = self.store.with_organs({o: rebuilt.get(o) for o in organs})
+        self.organ_stats.refresh(self.store)
+        self.write_snapshot()
+
+    def write_snapshot(self) -> None:
+        """Persist the current store for the desktop app (best effort).
+
+        Writes are serialized, and a store that was swapped out while waiting is not written:
+        whoever swapped in the newer one writes it next, so an older snapshot never lands last.
+        """
+        store = self.store
+        with self._snapshot_lock:
+            if store is not self.store:
+                return
+            try:
+                os.makedirs(os.path.dirname(ORGAN_SNAPSHOT_PATH), exist_ok=True)
+                store.save_snapshot(ORGAN_SNAPSHOT_PATH)
+            except Exception as e:
+                print(f"Warning: could not write organ snapshot {ORGAN_SNAPSHOT_PATH}: {e}")
+
+    def reload_disk_organs(self, organs: List[str]) -> None:
+        """Re-ingest changed workbooks under backend/data (missing file = organ removed from the Excel index).
+
+        The new row list and store are built aside and swapped in with single assignments, so
+        requests already iterating the previous ones finish on a consistent snapshot.
+        """
+        data_dir = self._data_dir()
+        fresh: Dict[str, List[Dict]] = {}
+        for organ in organs:
+            path = os.path.join(data_dir, f"{organ}.xlsx")
+            if not os.path.isfile(path):
+                print(f"Organ workbook removed: {path}")
+                fresh[organ] = []
+                continue
+            try:
+                fresh[organ] = self._load_disk_organ(path)
+            except Exception as e:
+                # Half-written file: keep serving the previous rows until the next change event.
+                print(f"Error reading {path}: {e}")
+        if not fresh:
+            return
+        with self._refresh_lock:
+            kept = [r for r in self._disk_records if r.get("organ") not in fresh]
+            for rows in fresh.values():
+                kept.extend(rows)
+            self._disk_records = kept
+        if DATA_RELOAD_TO_MONGODB and MONGODB_AVAILABLE:
+            for rows in fresh.values():
+                self._upsert_records(rows)
+        self.refresh_organs(list(fresh.keys()))
+        self.all_genes = self.load_all_genes()
+        print(f"Reloaded organs from {data_dir}: {', '.join(sorted(fresh))} (generation {self.store.generation})")
 
     def load_data_to_mongodb(self):
         """Load data from Excel files into MongoDB with duplicate prevention"""
@@ -310,11 +503,33 @@ class GeneSearchAPI:
         
         # Create indexes for better performance
         collection.create_index([("gene_symbol", 1)])
+        collection.create_index([("gene_symbol", 1)], name="gene_symbol_ci", collation=SYMBOL_COLLATION)
         collection.create_index([("organ", 1)])
         # Create unique compound index to prevent duplicates
         collection.create_index([("organ", 1), ("gene_symbol", 1)], unique=True)
-        print("Created indexes on gene_symbol, organ fields, and unique compound index")
-    
+        # Range / sort pushdown on the typed numeric columns
+        collection.create_index([("organ", 1), ("fdr_step_up_10_mgkg_vs_control", 1)])
+        collection.create_index([("organ", 1), ("fold_change_10_mgkg_vs_control", 1)])
+        print("Created indexes on gene_symbol (also case-insensitive), organ fields, unique compound index and (organ, fdr/fold_change)")
+    
+    def _upsert_records(self, records: List[Dict]) -> None:
+        """Upsert gene rows into MongoDB keyed by (organ, gene_symbol)."""
+        if not records:
+            return
+        operations = [
+            ReplaceOne(
+                {"organ": r["organ"], "gene_symbol": r["gene_symbol"]},
+                dict(r),
+                upsert=True,
+            )
+            for r in records
+        ]
+        try:
+            result = collection.bulk_write(operations, ordered=False)
+            print(f"MongoDB upsert: {result.upserted_count} inserted, {result.modified_count} updated")
+        except Exception as e:
+            print(f"Warning: MongoDB upsert failed: {e}")
+
     def load_all_genes(self) -> List[str]:
         """Unique gene symbols from MongoDB and/or Excel under backend/data."""
         genes: set = set()
@@ -343,12 +558,24 @@ class GeneSearchAPI:
         return out
 
     def _raw_docs_for_gene(self, gene_symbol: str) -> List[Dict]:
-        """Rows for one gene: MongoDB first, then Excel rows not already present (organ+symbol)."""
+        """Rows for one gene via the read-through cache (key: lower-cased symbol + data generation)."""
         sym = gene_symbol.strip()
         if not sym:
             return []
+        key = (sym.lower(), self.store.generation)
+        docs, _complete = self.gene_cache.get_or_load(
+            key,
+            lambda: self._load_docs_for_gene(sym),
+            cacheable=lambda loaded: loaded[1],
+        )
+        return [dict(d) for d in docs]
+
+    def _load_docs_for_gene(self, sym: str) -> Tuple[Tuple[Dict, ...], bool]:
+        """Rows for one gene: MongoDB first, then Excel rows not already present (organ+symbol).
+        Second value is False when MongoDB failed, so the partial answer is not cached."""
         keys_seen: set = set()
         out: List[Dict] = []
+        complete = True
         if MONGODB_AVAILABLE:
             try:
                 query = {
@@ -364,6 +591,7 @@ class GeneSearchAPI:
                     out.append(plain)
             except Exception as e:
                 print(f"Warning: MongoDB gene query failed: {e}")
+                complete = False
         target_lower = sym.lower()
         for rec in self._disk_records:
             if str(rec.get("gene_symbol", "")).strip().lower() != target_lower:
@@ -373,6 +601,37 @@ class GeneSearchAPI:
                 continue
             keys_seen.add(key)
             out.append(dict(rec))
+        return tuple(out), complete
+
+    def text_search_mongodb(self, query: str, limit: int) -> List[Dict]:
+        """$text search on gene_name (text index created on first use), one hit per symbol."""
+        if not self._text_index_ready:
+            collection.create_index([("gene_name", TEXT)], name="gene_name_text")
+            self._text_index_ready = True
+        cursor = (
+            collection.find(
+                {"$text": {"$search": query}},
+                {"_id": 0, "gene_symbol": 1, "gene_name": 1, "score": {"$meta": "textScore"}},
+            )
+            .sort([("score", {"$meta": "textScore"})])
+            .limit(limit * 16)
+        )
+        out: List[Dict] = []
+        seen: set = set()
+        for doc in cursor:
+            key = str(doc.get("gene_symbol", "")).strip().lower()
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            out.append(
+                {
+                    "gene_symbol": str(doc["gene_symbol"]).strip(),
+                    "gene_name": doc.get("gene_name") or "",
+                    "score": round(float(doc.get("score", 0.0)), 4),
+                }
+            )
+            if len(out) >= limit:
+                break
         return out
 
     def search_gene_data(self, gene_symbol: str) -> List[Dict]:
@@ -383,12 +642,12 @@ class GeneSearchAPI:
                 "organ": doc.get("organ", ""),
                 "gene_symbol": doc.get("gene_symbol", ""),
                 "gene_name": doc.get("gene_name", ""),
-                "p_value": doc.get("p_value_10_mgkg_vs_control", ""),
-                "fdr_step_up": doc.get("fdr_step_up_10_mgkg_vs_control", ""),
-                "ratio": doc.get("ratio_10_mgkg_vs_control", ""),
-                "fold_change": doc.get("fold_change_10_mgkg_vs_control", ""),
-                "lsmean_10mgkg": doc.get("lsmean_10mgkg_10_mgkg_vs_control", ""),
-                "lsmean_control": doc.get("lsmean_control_10_mgkg_vs_control", ""),
+                "p_value": gene_doc_number(doc.get("p_value_10_mgkg_vs_control")),
+                "fdr_step_up": gene_doc_number(doc.get("fdr_step_up_10_mgkg_vs_control")),
+                "ratio": gene_doc_number(doc.get("ratio_10_mgkg_vs_control")),
+                "fold_change": gene_doc_number(doc.get("fold_change_10_mgkg_vs_control")),
+                "lsmean_10mgkg": gene_doc_number(doc.get("lsmean_10mgkg_10_mgkg_vs_control")),
+                "lsmean_control": gene_doc_number(doc.get("lsmean_control_10_mgkg_vs_control")),
             })
         return results
     
@@ -541,18 +800,19 @@ class GeneSearchAPI:
                 'organ': gene_data.organ,
                 'gene_symbol': gene_data.gene_symbol,
                 'gene_name': gene_data.gene_name,
-                'p_value_10_mgkg_vs_control': gene_data.p_value_10_mgkg_vs_control,
-                'fdr_step_up_10_mgkg_vs_control': gene_data.fdr_step_up_10_mgkg_vs_control,
-                'ratio_10_mgkg_vs_control': gene_data.ratio_10_mgkg_vs_control,
-                'fold_change_10_mgkg_vs_control': gene_data.fold_change_10_mgkg_vs_control,
-                'lsmean_10mgkg_10_mgkg_vs_control': gene_data.lsmean_10mgkg_10_mgkg_vs_control,
-                'lsmean_control_10_mgkg_vs_control': gene_data.lsmean_control_10_mgkg_vs_control
+                'p_value_10_mgkg_vs_control': gene_doc_number(gene_data.p_value_10_mgkg_vs_control),
+                'fdr_step_up_10_mgkg_vs_control': gene_doc_number(gene_data.fdr_step_up_10_mgkg_vs_control),
+                'ratio_10_mgkg_vs_control': gene_doc_number(gene_data.ratio_10_mgkg_vs_control),
+                'fold_change_10_mgkg_vs_control': gene_doc_number(gene_data.fold_change_10_mgkg_vs_control),
+                'lsmean_10mgkg_10_mgkg_vs_control': gene_doc_number(gene_data.lsmean_10mgkg_10_mgkg_vs_control),
+                'lsmean_control_10_mgkg_vs_control': gene_doc_number(gene_data.lsmean_control_10_mgkg_vs_control)
             }
             
             # Insert the new record into MongoDB
             result = collection.insert_one(new_record)
             
             if result.inserted_id:
+                self.refresh_organs([gene_data.organ])
                 return {
                     "message": f"Gene '{gene_data.gene_symbol}' added successfully to {gene_data.organ}",
                     "gene_symbol": gene_data.gene_symbol,
@@ -569,11 +829,86 @@ class GeneSearchAPI:
 
 # Initialize the API
 gene_api = GeneSearchAPI()
+data_watcher: Optional[DataDirWatcher] = None
+
+
+@app.on_event("startup")
+async def start_data_watcher():
+    """Pick up added / replaced / removed organ workbooks without a restart."""
+    global data_watcher
+    if not DATA_WATCH_ENABLED or not os.path.isdir(gene_api._data_dir()):
+        return
+    data_watcher = DataDirWatcher(
+        gene_api._data_dir(),
+        gene_api.reload_disk_organs,
+        poll_interval=DATA_WATCH_INTERVAL,
+    )
+    data_watcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_data_watcher():
+    if data_watcher is not None:
+        data_watcher.stop()
+
+
+_symbols_payload: Optional[Tuple[List[str], PrecompressedJSON]] = None
+
+
+def _gene_symbols_payload() -> PrecompressedJSON:
+    """Serialized + compressed symbol list, rebuilt only when gene_api.all_genes is replaced."""
+    global _symbols_payload
+    genes = gene_api.all_genes
+    cached = _symbols_payload
+    if cached is None or cached[0] is not genes:
+        cached = (genes, PrecompressedJSON({"gene_symbols": genes}))
+        _symbols_payload = cached
+    return cached[1]
+
 
 @app.get("/api/gene/symbols")
-async def get_gene_symbols():
-    """Get all available gene symbols"""
-    return {"gene_symbols": gene_api.all_genes}
+async def get_gene_symbols(request: Request):
+    """Get all available gene symbols (ETag revalidation: unchanged lists return 304)"""
+    return _gene_symbols_payload().response(request)
+
+
+@app.get("/api/gene/symbols/version")
+async def get_gene_symbols_version():
+    """Current symbol-list version and its immutable URL (cacheable forever by the client)."""
+    version = _gene_symbols_payload().version
+    return {"version": version, "url": f"/api/gene/symbols/v/{version}"}
+
+
+@app.get("/api/gene/symbols/v/{version}")
+async def get_gene_symbols_versioned(version: str, request: Request):
+    """Symbol list for one version; the body never changes, so it is served as immutable."""
+    payload = _gene_symbols_payload()
+    if version != payload.version:
+        return RedirectResponse(url=f"/api/gene/symbols/v/{payload.version}", status_code=307)
+    return payload.response(request, immutable=True)
+
+@app.get("/api/gene/text-search")
+async def text_search_genes(
+    q: str = Query(..., description="Words from the gene name, e.g. 'solute carrier'"),
+    limit: int = Query(20, ge=1, le=500),
+    backend: str = Query("memory", description="memory (BM25 index) or mongodb ($text index)"),
+):
+    """Genes whose name matches the query, ranked by BM25, one hit per gene symbol."""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query is required")
+    backend = backend.strip().lower()
+    if backend == "mongodb":
+        if not MONGODB_AVAILABLE:
+            raise HTTPException(status_code=503, detail="MongoDB is not available")
+        try:
+            results = gene_api.text_search_mongodb(q, limit)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"MongoDB text search failed: {str(e)}")
+    elif backend == "memory":
+        results = gene_text_index(gene_api.store).search(q, limit=limit)
+    else:
+        raise HTTPException(status_code=400, detail="backend must be memory or mongodb")
+    return {"query": q, "backend": backend, "results": results}
 
 @app.get("/api/gene/symbol/search")
 async def search_gene_symbol(gene_symbol: str = Query(..., description="Gene symbol to search for")):
@@ -596,6 +931,28 @@ async def search_gene_symbol(gene_symbol: str = Query(..., description="Gene sym
 
     return {"gene_symbol": gene_symbol, "data": results}
 
+@app.get("/api/gene/profile")
+async def get_gene_profile(gene_symbol: str = Query(..., description="Gene symbol")):
+    """Per-organ rows for one gene; redirects to the pre-rendered static file when it is current."""
+    if not gene_symbol.strip():
+        raise HTTPException(status_code=400, detail="Gene symbol is required")
+    profile = gene_profile(gene_api.store, gene_symbol)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No data found for this gene symbol")
+    digest = profile_digest(profile)
+    if profile_manifest.entry(gene_symbol, digest) is not None:
+        return RedirectResponse(url=f"/static/profiles/json/{digest}.json", status_code=307)
+    return profile
+
+
+def _prerendered_plot(gene_symbol: str, kind: str) -> Optional[str]:
+    """Base64 of the pre-rendered plot if precompute_profiles.py wrote one for the current data."""
+    profile = gene_profile(gene_api.store, gene_symbol)
+    if profile is None:
+        return None
+    data = profile_manifest.image(gene_symbol, profile_digest(profile), kind)
+    return base64.b64encode(data).decode() if data is not None else None
+
 @app.get("/api/gene/symbol/showFoldChange")
 async def show_fold_change(gene_symbol: str = Query(..., description="Gene symbol to plot fold change for")):
     """Get fold change plot as base64 encoded image"""
@@ -603,7 +960,7 @@ async def show_fold_change(gene_symbol: str = Query(..., description="Gene symbo
         raise HTTPException(status_code=400, detail="Gene symbol is required")
     
     try:
-        image_base64 = gene_api.create_fold_change_plot(gene_symbol)
+        image_base64 = _prerendered_plot(gene_symbol, "fold_change") or gene_api.create_fold_change_plot(gene_symbol)
         return {"gene_symbol": gene_symbol, "image_base64": image_base64}
     except HTTPException:
         raise
@@ -617,7 +974,7 @@ async def show_lsmean_control(gene_symbol: str = Query(..., description="Gene sy
         raise HTTPException(status_code=400, detail="Gene symbol is required")
     
     try:
-        image_base64 = gene_api.create_lsmean_control_plot(gene_symbol)
+        image_base64 = _prerendered_plot(gene_symbol, "lsmean_control") or gene_api.create_lsmean_control_plot(gene_symbol)
         return {"gene_symbol": gene_symbol, "image_base64": image_base64}
     except HTTPException:
         raise
@@ -631,13 +988,66 @@ async def show_lsmean_ten_mgkg(gene_symbol: str = Query(..., description="Gene s
         raise HTTPException(status_code=400, detail="Gene symbol is required")
     
     try:
-        image_base64 = gene_api.create_lsmean_10mgkg_plot(gene_symbol)
+        image_base64 = _prerendered_plot(gene_symbol, "lsmean_10mgkg") or gene_api.create_lsmean_10mgkg_plot(gene_symbol)
         return {"gene_symbol": gene_symbol, "image_base64": image_base64}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating plot: {str(e)}")
 
+@app.get("/api/gene/compare-chart")
+async def compare_genes_chart(
+    genes: str = Query(..., description="Comma-separated gene symbols"),
+    metric: str = Query("fold_change", description="fold_change, log2_fold_change, ratio, lsmean_control or lsmean_10mgkg"),
+    layout: str = Query("grouped", description="grouped (one bar group per organ) or grid (one panel per gene)"),
+    chart_format: str = Query("png", description="png, svg or pdf"),
+):
+    """Several genes across organs in a single figure, from one row lookup in the gene × organ matrix."""
+    # Symbols resolve case-insensitively, so "Actb,ACTB" is one gene (first spelling kept).
+    unique: Dict[str, str] = {}
+    for g in genes.split(","):
+        if g.strip():
+            unique.setdefault(g.strip().lower(), g.strip())
+    requested = list(unique.values())
+    if not requested:
+        raise HTTPException(status_code=400, detail="At least one gene symbol is required")
+    if len(requested) > COMPARE_CHART_MAX_GENES:
+        raise HTTPException(
+            status_code=400, detail=f"At most {COMPARE_CHART_MAX_GENES} genes can be compared at once"
+        )
+    layout = layout.strip().lower()
+    if layout not in ("grouped", "grid"):
+        raise HTTPException(status_code=400, detail="layout must be grouped or grid")
+    store = gene_api.store
+    try:
+        matrix = metric_matrix(store, metric.strip().lower())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    ids = [store.symbol_id(g) for g in requested]
+    found = [i for i in ids if i is not None]
+    missing = [g for g, i in zip(requested, ids) if i is None]
+    if not found:
+        raise HTTPException(status_code=404, detail="No data found for these gene symbols")
+    values = matrix[found]
+    keep = np.isfinite(values).any(axis=0)
+    organs = [name for name, k in zip(store.organ_names, keep) if k]
+    values = values[:, keep]
+    symbols = [store.symbols[i] for i in found]
+    fmt = normalize_chart_format(chart_format)
+    try:
+        data = render_compare_chart(symbols, organs, values, metric.strip().lower(), layout=layout, fmt=fmt)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating plot: {str(e)}")
+    return {
+        "genes": symbols,
+        "missing": missing,
+        "metric": metric.strip().lower(),
+        "organs": organs,
+        "values": [[None if not np.isfinite(v) else float(v) for v in row] for row in values.tolist()],
+        "image_base64": base64.b64encode(data).decode(),
+        "media_type": 'application/pdf' if fmt == 'pdf' else f'image/{fmt}',
+    }
+
 @app.post("/api/gene/add")
 async def add_gene(
     gene_data: GeneData,
@@ -653,6 +1063,166 @@ async def add_gene(
         raise HTTPException(status_code=500, detail=f"Error adding gene: {str(e)}")
 
 
+def _organ_or_404(organ: str):
+    cols = gene_api.store.organ(organ)
+    if cols is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Organ '{organ}' not found. Available organs: {gene_api.store.organ_names}",
+        )
+    return cols
+
+
+@app.get("/api/organ/summary")
+async def get_organ_summary():
+    """Per-organ significant counts at standard FDR cutoffs, fold-change quantiles and LSMean ranges."""
+    return gene_api.organ_stats.summary(gene_api.store)
+
+
+@app.get("/api/organ/snapshot")
+async def get_organ_snapshot():
+    """Binary snapshot of the columnar organ store (.npz), as loaded by the desktop app."""
+    if not os.path.isfile(ORGAN_SNAPSHOT_PATH):
+        gene_api.write_snapshot()
+    if not os.path.isfile(ORGAN_SNAPSHOT_PATH):
+        raise HTTPException(status_code=503, detail="Organ snapshot is not available")
+    return FileResponse(
+        ORGAN_SNAPSHOT_PATH,
+        media_type="application/octet-stream",
+        filename="organ_snapshot.npz",
+    )
+
+
+@app.get("/api/organ/correlation")
+async def get_organ_correlation(
+    metric: str = Query("log2_fold_change", description="log2_fold_change, fold_change, ratio, lsmean_10mgkg or lsmean_control"),
+    method: str = Query("pearson", description="pearson or spearman"),
+    fdr_max: float = Query(1.0, ge=0.0, le=1.0, description="Use a gene in an organ only where its FDR <= fdr_max"),
+):
+    """Organ × organ correlation matrix over genes aligned by symbol (pairwise-complete)."""
+    try:
+        return organ_correlation(gene_api.store, metric=metric, method=method.strip().lower(), fdr_max=fdr_max)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/organ/{organ}/distribution")
+async def get_organ_distribution(organ: str):
+    """Organ summary plus histograms of log2 fold change, p-value and FDR (fixed bin edges)."""
+    return gene_api.organ_stats.distribution(_organ_or_404(organ))
+
+
+@app.get("/api/organ/{organ}/volcano")
+async def get_organ_volcano(
+    organ: str,
+    fdr_max: float = Query(0.05, ge=0.0, le=1.0, description="Points at or below this FDR are kept individually"),
+    min_abs_log2fc: float = Query(0.0, ge=0.0, description="Minimum |log2 fold change| for a kept significant point"),
+    labels: Optional[str] = Query(None, description="Comma-separated gene symbols always kept as points"),
+    grid: int = Query(128, description="Density grid resolution for the non-significant cloud (16-512)"),
+):
+    """Volcano plot data: significant/labeled points plus a binned density grid, as base64 typed arrays."""
+    label_list = [g for g in (labels or "").split(",") if g.strip()]
+    return gene_api.organ_stats.volcano(
+        _organ_or_404(organ),
+        fdr_max=fdr_max,
+        min_abs_log2fc=min_abs_log2fc,
+        labels=label_list,
+        grid=grid,
+    )
+
+
+@app.get("/api/gene/similar")
+async def get_similar_genes(
+    gene_symbol: str = Query(..., description="Query gene symbol"),
+    k: int = Query(50, ge=1, le=500, description="Number of neighbors to return"),
+    metric: str = Query("cosine", description="cosine, pearson or euclidean"),
+    min_shared: int = Query(3, ge=1, description="Minimum number of organs both genes must be measured in"),
+):
+    """Genes whose cross-organ log2 fold-change profile is closest to the query gene."""
+    if not gene_symbol.strip():
+        raise HTTPException(status_code=400, detail="Gene symbol is required")
+    try:
+        return similar_genes(
+            gene_api.store, gene_symbol, k=k, metric=metric.strip().lower(), min_shared=min_shared
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail="No data found for this gene symbol")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/gene/set-score")
+async def score_gene_set(
+    file: UploadFile = File(...),
+    fdr_max: float = Form(0.05),
+):
+    """Score an uploaded gene list (.txt, one symbol per line) in every organ in one vectorized pass."""
+    if not file.filename.endswith('.txt'):
+        raise HTTPException(status_code=400, detail="Only .txt files are supported")
+    if not 0.0 <= fdr_max <= 1.0:
+        raise HTTPException(status_code=400, detail="fdr_max must be between 0 and 1")
+    content = await file.read()
+    genes = [line.strip() for line in content.decode('utf-8').splitlines() if line.strip()]
+    if not genes:
+        raise HTTPException(status_code=400, detail="No valid genes found in file")
+    return gene_set_score(gene_api.store, genes, fdr_max=fdr_max)
+
+
+memory_cross_stats = InMemoryCrossOrganStats(lambda: gene_api.store)
+mongo_cross_stats = MongoCrossOrganStats(collection) if MONGODB_AVAILABLE else None
+
+
+def _cross_organ_stats(backend: str, call):
+    """Run call(stats) on MongoDB (aggregation pushdown) or the in-memory store.
+    backend=auto prefers MongoDB and falls back to memory if the pipeline fails."""
+    backend = backend.strip().lower()
+    if backend not in ("auto", "mongodb", "memory"):
+        raise HTTPException(status_code=400, detail="backend must be auto, mongodb or memory")
+    if backend == "mongodb" and mongo_cross_stats is None:
+        raise HTTPException(status_code=503, detail="MongoDB is not available")
+    if backend != "memory" and mongo_cross_stats is not None:
+        try:
+            return {"backend": mongo_cross_stats.backend, "results": call(mongo_cross_stats)}
+        except Exception as e:
+            if backend == "mongodb":
+                raise HTTPException(status_code=500, detail=f"MongoDB aggregation failed: {str(e)}")
+            print(f"Warning: MongoDB aggregation failed, using in-memory stats: {e}")
+    return {"backend": memory_cross_stats.backend, "results": call(memory_cross_stats)}
+
+
+@app.get("/api/stats/significant-counts")
+async def get_significant_counts(
+    fdr_max: float = Query(0.05, ge=0.0, le=1.0),
+    backend: str = Query("auto", description="auto, mongodb or memory"),
+):
+    """Per organ: genes measured, significant at fdr_max, and how many go up / down."""
+    return _cross_organ_stats(backend, lambda s: s.significant_counts(fdr_max=fdr_max))
+
+
+@app.get("/api/stats/mean-fold-change")
+async def get_mean_fold_change(
+    genes: Optional[str] = Query(None, description="Comma-separated gene symbols (default: all genes)"),
+    limit: int = Query(100, ge=1, le=50000),
+    backend: str = Query("auto", description="auto, mongodb or memory"),
+):
+    """Mean fold change of each gene across the organs it was measured in, largest |mean| first."""
+    gene_list = [g.strip() for g in (genes or "").split(",") if g.strip()]
+    return _cross_organ_stats(backend, lambda s: s.mean_fold_change(genes=gene_list, limit=limit))
+
+
+@app.get("/api/stats/recurrent-genes")
+async def get_recurrent_genes(
+    min_organs: int = Query(2, ge=1),
+    fdr_max: float = Query(0.05, ge=0.0, le=1.0),
+    limit: int = Query(500, ge=1, le=50000),
+    backend: str = Query("auto", description="auto, mongodb or memory"),
+):
+    """Genes significant (FDR <= fdr_max) in at least min_organs organs."""
+    return _cross_organ_stats(
+        backend, lambda s: s.recurrent_genes(min_organs=min_organs, fdr_max=fdr_max, limit=limit)
+    )
+
+
 def _csv_row_as_series(row_dict: Dict[str, Any]) -> pd.Series:
     """Normalize CSV column names to the keys expected by _record_from_excel_row."""
 
@@ -795,6 +1365,7 @@ async def upload_gene_csv(
     save_user_preferences(user_id, prefs)
 
     gene_api.all_genes = gene_api.load_all_genes()
+    gene_api.refresh_organs([organ_name])
     return {"message": "Upload successful", "rows_written": len(records), "organ": organ_name}
 
 
@@ -827,6 +1398,7 @@ SUMMARY_CHART_COLORS = [
 ]
 
 VALID_CHART_FORMATS = frozenset({'png', 'pdf', 'svg'})
+VALID_GO_ASPECTS = frozenset({'BP', 'MF', 'CC', 'ALL'})
 
 # UI labels map to fonts bundled with matplotlib on Linux (Arial/Helvetica are not installed).
 MPL_FONT_ALIASES = {
@@ -995,14 +1567,22 @@ def normalize_chart_format(chart_format: Optional[str]) -> str:
     return fmt if fmt in VALID_CHART_FORMATS else 'png'
 
 
-def figure_to_base64(fmt: str = 'png') -> Tuple[str, str]:
-    """Encode the current matplotlib figure as base64."""
+def parse_go_aspect(go_aspect: Optional[str]) -> str:
+    """Upper-cased GO aspect form field (default: the ontology API's); 400 if it is not BP/MF/CC/ALL."""
+    aspect = (go_aspect or '').strip().upper() or ontology_api.default_go_aspect
+    if aspect not in VALID_GO_ASPECTS:
+        raise HTTPException(status_code=400, detail="go_aspect must be one of: 'BP', 'MF', 'CC', 'ALL'")
+    return aspect
+
+
+def figure_to_base64(fmt: str = 'png', fig: Optional[Figure] = None) -> Tuple[str, str]:
+    """Encode `fig` (default: the current pyplot figure) as base64."""
     fmt = normalize_chart_format(fmt)
     img_buffer = io.BytesIO()
     save_kwargs: Dict[str, Any] = {'format': fmt, 'bbox_inches': 'tight'}
     if fmt == 'png':
         save_kwargs['dpi'] = 300
-    plt.savefig(img_buffer, **save_kwargs)
+    (fig or plt).savefig(img_buffer, **save_kwargs)
     img_buffer.seek(0)
     encoded = base64.b64encode(img_buffer.getvalue()).decode()
     media_type = 'application/pdf' if fmt == 'pdf' else f'image/{fmt}'
@@ -1027,17 +1607,96 @@ class GeneOntologyAPI:
     def __init__(self):
         try:
             print("Initializing GeneOntologyAPI...")
-            self.gp = GProfiler(return_dataframe=True)
+            self.gp = GProfiler(return_dataframe=True, base_url=GPROFILER_BASE_URL)
+            self.gprofiler_client = AsyncGProfilerClient(
+                base_url=GPROFILER_BASE_URL,
+                timeout=GPROFILER_TIMEOUT,
+                max_connections=GPROFILER_MAX_CONNECTIONS,
+                max_concurrency=GPROFILER_MAX_CONCURRENCY,
+                retries=GPROFILER_RETRIES,
+            )
             print("GProfiler initialized successfully")
         except Exception as e:
             print(f"Error initializing GProfiler: {e}")
             raise e
         # Publication keywords only — same dict / order as t_GO_publication.THEMES (for theme assignment).
-        self.publication_themes = dict(PUBLICATION_THEME_KEYWORDS)
+        # Read-only: requests needing another selection pass their own ThemeMatcher instead.
+        self.publication_themes = MappingProxyType(dict(PUBLICATION_THEME_KEYWORDS))
         # Full map: publication + UI-only buckets for /api/ontology/custom-* and theme-id mapping.
-        self.themes = {**PUBLICATION_THEME_KEYWORDS, **UI_ONTOLOGY_THEME_KEYWORDS}
+        self.themes = MappingProxyType({**PUBLICATION_THEME_KEYWORDS, **UI_ONTOLOGY_THEME_KEYWORDS})
         self.default_enabled_themes = PUBLICATION_DEFAULT_ENABLED_THEME_NAMES
         self.default_go_aspect = "BP"
+        self.term_theme_table = self._load_term_theme_table()
+        self.local_engine: Optional[LocalEnrichmentEngine] = None
+        # Cache/store key: local results never mix with g:Profiler ones (or another annotation build).
+        self.enrichment_organism = GPROFILER_ORGANISM
+        if ENRICHMENT_ENGINE == "local":
+            self.local_engine = LocalEnrichmentEngine.from_files(
+                LOCAL_ENRICHMENT_GMT, gaf=LOCAL_ENRICHMENT_GAF, obo=LOCAL_ENRICHMENT_OBO
+            )
+            self.enrichment_organism = f"{GPROFILER_ORGANISM}:{self.local_engine.version}"
+        elif ENRICHMENT_ENGINE != "gprofiler":
+            raise ValueError(f"Unknown ENRICHMENT_ENGINE {ENRICHMENT_ENGINE!r} (use gprofiler or local)")
+        self.enrichment_cache = EnrichmentCache(
+            self._local_profile if self.local_engine else self._gprofiler_profile,
+            maxsize=ENRICHMENT_CACHE_SIZE,
+            ttl=ENRICHMENT_CACHE_TTL,
+            store=self._open_enrichment_store(),
+            afetch=None if self.local_engine else self._gprofiler_aprofile,
+        )
+        warmed = self.enrichment_cache.warm(ENRICHMENT_CACHE_SIZE)
+        if warmed:
+            print(f"Warmed enrichment cache with {warmed} persisted results")
+
+    def _load_term_theme_table(self) -> Optional[TermThemeTable]:
+        try:
+            table = TermThemeTable.load(TERM_THEME_TABLE_PATH)
+        except Exception as e:
+            print(f"Warning: ignoring GO term theme table {TERM_THEME_TABLE_PATH}: {e}")
+            return None
+        if table is None:
+            return None
+        for label, m in (("publication", theme_matcher(self.publication_themes)), ("combined", self.theme_matcher())):
+            if not table.covers(m):
+                print(f"Warning: GO term theme table predates the current {label} keywords; matching those terms by keyword")
+        print(f"Loaded GO term theme table: {len(table.names)} terms from {table.source}")
+        return table
+
+    @staticmethod
+    def _open_enrichment_store() -> Optional[EnrichmentStore]:
+        if not ENRICHMENT_STORE_PATH:
+            return None
+        try:
+            os.makedirs(os.path.dirname(ENRICHMENT_STORE_PATH), exist_ok=True)
+            store = EnrichmentStore(
+                ENRICHMENT_STORE_PATH,
+                ttl=ENRICHMENT_STORE_TTL,
+                max_bytes=int(ENRICHMENT_STORE_MAX_MB * 1024 * 1024),
+            )
+            store.start_compaction(ENRICHMENT_STORE_COMPACT_INTERVAL)
+            return store
+        except Exception as e:
+            print(f"Warning: enrichment store disabled ({ENRICHMENT_STORE_PATH}): {e}")
+            return None
+
+    def _gprofiler_profile(self, genes: List[str], organism: str, evidences: bool) -> Tuple[pd.DataFrame, Optional[str]]:
+        """One g:Profiler round trip (called by the enrichment cache on a miss) plus its data version."""
+        df = self.gp.profile(organism=organism, query=list(genes), no_evidences=not evidences)
+        print(f"GProfiler returned {len(df)} results")
+        meta = getattr(self.gp, "meta", None) or {}
+        return df, meta.get("version")
+
+    async def _gprofiler_aprofile(self, genes: List[str], organism: str, evidences: bool) -> Tuple[pd.DataFrame, Optional[str]]:
+        """_gprofiler_profile over the pooled async client (the path the ontology endpoints take)."""
+        df, meta = await self.gprofiler_client.profile(list(genes), organism=organism, no_evidences=not evidences)
+        print(f"GProfiler returned {len(df)} results")
+        return df, meta.get("version")
+
+    def _local_profile(self, genes: List[str], organism: str, evidences: bool) -> Tuple[pd.DataFrame, Optional[str]]:
+        """Offline counterpart of _gprofiler_profile (ENRICHMENT_ENGINE=local)."""
+        df = self.local_engine.profile(list(genes), no_evidences=not evidences)
+        print(f"Local enrichment returned {len(df)} results")
+        return df, self.local_engine.version
 
     def load_genes_from_file(self, file_content: str) -> List[str]:
         """Load genes from file content (same as t_GO_publication.load_genes: splitlines + strip)."""
@@ -1056,6 +1715,16 @@ class GeneOntologyAPI:
             "Expected 'p_value' and/or 'p_value_adjusted'."
         )
 
+    def _significant_terms(self, df: pd.DataFrame, p_thresh: float) -> pd.DataFrame:
+        pcol = self._pick_pval_column(df)
+        # Match t_GO_publication.enrich: sort, then filter
+        df = df.sort_values(pcol).copy()
+        df = df[df[pcol] < p_thresh].copy()
+        print(f"After filtering, {len(df)} results remain")
+        df["Score"] = -np.log10(df[pcol].astype(float))
+        df["p_col_used"] = pcol
+        return df
+
     def enrich(self, genes: List[str], p_thresh: float = 1e-2) -> pd.DataFrame:
         """Perform gene enrichment analysis"""
         if not genes:
@@ -1063,72 +1732,82 @@ class GeneOntologyAPI:
         
         try:
             print(f"Starting enrichment analysis for {len(genes)} genes")
-            df = self.gp.profile(organism="mmusculus", query=list(genes))
-            print(f"GProfiler returned {len(df)} results")
-            pcol = self._pick_pval_column(df)
-            # Match t_GO_publication.enrich: sort, then filter
-            df = df.sort_values(pcol).copy()
-            df = df[df[pcol] < p_thresh].copy()
-            print(f"After filtering, {len(df)} results remain")
-            df["Score"] = -np.log10(df[pcol].astype(float))
-            df["p_col_used"] = pcol
-            return df
+            df = self.enrichment_cache.profile(genes, self.enrichment_organism, evidences=False)
+            return self._significant_terms(df, p_thresh)
         except Exception as e:
             print(f"Error in enrichment analysis: {e}")
             import traceback
             traceback.print_exc()
             return pd.DataFrame()
 
-    def assign_themes(self, name: str) -> List[str]:
+    async def aenrich(self, genes: List[str], p_thresh: float = 1e-2) -> pd.DataFrame:
+        """enrich() for async handlers: the g:Profiler call is awaited instead of blocking the loop."""
+        if not genes:
+            return pd.DataFrame()
+        try:
+            print(f"Starting enrichment analysis for {len(genes)} genes")
+            df = await self.enrichment_cache.aprofile(genes, self.enrichment_organism, evidences=False)
+            return self._significant_terms(df, p_thresh)
+        except Exception as e:
+            print(f"Error in enrichment analysis: {e}")
+            import traceback
+            traceback.print_exc()
+            return pd.DataFrame()
+
+    def theme_matcher(self) -> ThemeMatcher:
+        """Matcher for the combined publication + UI map; requests with their own theme
+        selection build a separate matcher and pass it down instead of touching self.themes."""
+        return theme_matcher(self.themes)
+
+    def assign_themes(self, name: str, matcher: Optional[ThemeMatcher] = None) -> List[str]:
         """Assign themes using publication + UI maps (custom / combined flows)."""
         if name is None or (not isinstance(name, str)):
             return []
-        low = name.lower()
-        matched_themes: List[str] = []
-        for th, kws in self.themes.items():
-            for kw in kws:
-                if isinstance(kw, str) and kw in low:
-                    matched_themes.append(th)
-                    break
-        return matched_themes
+        return (matcher if matcher is not None else self.theme_matcher()).match(name.lower())
 
     def assign_themes_publication(self, name: str) -> List[str]:
         """Same logic as t_GO_publication.assign_themes: iterate THEMES only (no UI-only keywords)."""
         if name is None or (not isinstance(name, str)):
             return []
-        low = name.lower()
-        matched: List[str] = []
-        for th, kws in self.publication_themes.items():
-            for kw in kws:
-                if isinstance(kw, str) and kw in low:
-                    matched.append(th)
-                    break
-        return matched
-
-    def assign_theme(self, name: str) -> Optional[str]:
-        """Backward-compatible single-theme assignment (first match in combined theme map)."""
-        matched = self.assign_themes(name)
-        return matched[0] if matched else None
+        return theme_matcher(self.publication_themes).match(name.lower())
 
-    def annotate_with_themes(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Explode rows using combined publication + UI theme keywords."""
+    def _term_themes(self, matcher: ThemeMatcher, native: Any, name: Any) -> List[str]:
+        """Themes for one term: precomputed table by GO ID / name, keyword matching otherwise."""
+        if not isinstance(name, str):
+            return []
+        low = name.lower()
+        mask = None
+        if self.term_theme_table is not None:
+            mask = self.term_theme_table.mask(matcher, native, low)
+        if mask is None:
+            mask = matcher.mask(low)
+        return list(matcher.names(mask))
+
+    def _explode_themes(self, df: pd.DataFrame, matcher: ThemeMatcher) -> pd.DataFrame:
+        """One row per (term, matched theme); terms matching no theme are dropped."""
         if df.empty:
             return pd.DataFrame()
         out = df.copy()
-        out["Themes"] = out["name"].apply(self.assign_themes)
+        natives = out["native"] if "native" in out.columns else [None] * len(out)
+        out["Themes"] = [
+            self._term_themes(matcher, native, name) for native, name in zip(natives, out["name"])
+        ]
         out = out.explode("Themes").rename(columns={"Themes": "Theme"})
         out = out.dropna(subset=["Theme"])
         return out
 
+    def assign_theme(self, name: str) -> Optional[str]:
+        """Backward-compatible single-theme assignment (first match in combined theme map)."""
+        matched = self.assign_themes(name)
+        return matched[0] if matched else None
+
+    def annotate_with_themes(self, df: pd.DataFrame, matcher: Optional[ThemeMatcher] = None) -> pd.DataFrame:
+        """Explode rows using combined publication + UI theme keywords (or a request's own matcher)."""
+        return self._explode_themes(df, matcher if matcher is not None else self.theme_matcher())
+
     def annotate_with_themes_publication(self, df: pd.DataFrame) -> pd.DataFrame:
         """Default analysis: same as t_GO_publication run_one (name → assign_themes → explode)."""
-        if df.empty:
-            return pd.DataFrame()
-        out = df.copy()
-        out["Themes"] = out["name"].apply(self.assign_themes_publication)
-        out = out.explode("Themes").rename(columns={"Themes": "Theme"})
-        out = out.dropna(subset=["Theme"])
-        return out
+        return self._explode_themes(df, theme_matcher(self.publication_themes))
 
     def filter_default_enabled_theme_terms(self, df: pd.DataFrame) -> pd.DataFrame:
         """Keep only themes enabled in t_GO_publication.py (for display filtering)."""
@@ -1179,14 +1858,29 @@ class GeneOntologyAPI:
         out.update(agg)
         return out.sort_values("Score", ascending=False)
 
-    def aggregate(self, df: pd.DataFrame) -> pd.DataFrame:
+    def aggregate_themes_publication_by_list(
+        self, themed_terms: pd.DataFrame, n_lists: int
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """aggregate_themes_publication for several lists in one groupby: themed_terms carries a
+        "List" column (0..n_lists-1). Returns (Score, Terms) as publication themes × lists."""
+        themes = pd.Index(list(self.publication_themes.keys()), name="Theme")
+        lists = pd.RangeIndex(n_lists, name="List")
+        if themed_terms.empty:
+            scores = pd.DataFrame(0.0, index=themes, columns=lists)
+            return scores, scores.astype(int)
+        grouped = themed_terms.dropna(subset=["Theme"]).groupby(["Theme", "List"], sort=False)["Score"]
+        scores = grouped.sum().unstack("List").reindex(index=themes, columns=lists).fillna(0.0)
+        counts = grouped.count().unstack("List").reindex(index=themes, columns=lists).fillna(0).astype(int)
+        return scores, counts
+
+    def aggregate(self, df: pd.DataFrame, matcher: Optional[ThemeMatcher] = None) -> pd.DataFrame:
         """Aggregate GO terms by theme (custom UI flows; supports multi-theme exploded rows)."""
         if df.empty:
             return pd.DataFrame()
         source_df = df.copy()
         if "Theme" not in source_df.columns:
             # Prefer multi-assign when Theme is missing so shared keywords are not exclusive.
-            source_df = self.annotate_with_themes(source_df)
+            source_df = self.annotate_with_themes(source_df, matcher)
         themed = (
             source_df.dropna(subset=["Theme"])
             .groupby("Theme", sort=False)
@@ -1221,25 +1915,25 @@ class GeneOntologyAPI:
 
             fig_width = 12
             fig_height = max(6, 0.3 * len(sub_df))
-            _, ax = plt.subplots(figsize=(fig_width, fig_height))
+            # Standalone Figure (no pyplot state), so charts can render on worker threads.
+            fig = Figure(figsize=(fig_width, fig_height))
+            ax = fig.subplots()
 
             ax.barh(sub_df["name"], sub_df["Score"], color=bar_color, height=0.6)
             ax.set_xlabel("-log10(p-value)")
             title_str = str(opts.get('chart_title_override') or f"Top GO Terms in Theme: {title}")
             ax.set_title(title_str, loc="left", weight="bold")
             ax.set_ylim(-0.5, len(sub_df) - 0.5)
-            plt.tight_layout(pad=1.5)
+            fig.tight_layout(pad=1.5)
             apply_matplotlib_text_styles(ax, text_styles, title_text=title_str, title_loc="left")
 
-            encoded, media_type = figure_to_base64(fmt)
-            plt.close()
+            encoded, media_type = figure_to_base64(fmt, fig)
 
             print(f"Chart created successfully for theme: {theme_key}")
             return encoded, media_type
 
         except Exception as e:
             print(f"Error creating chart for theme {theme_key}: {str(e)}")
-            plt.close('all')
             raise e
 
     def create_summary_chart(
@@ -1265,7 +1959,8 @@ class GeneOntologyAPI:
 
             fig_width = 12
             fig_height = max(8, 0.4 * len(themed_df))
-            _, ax = plt.subplots(figsize=(fig_width, fig_height))
+            fig = Figure(figsize=(fig_width, fig_height))
+            ax = fig.subplots()
 
             themed_df_sorted = themed_df.sort_values("Score", ascending=True)
             if use_multi_color:
@@ -1301,18 +1996,16 @@ class GeneOntologyAPI:
             )
             ax.set_title(title_str, loc="left", weight="bold")
             ax.set_ylim(-0.5, len(themed_df_sorted) - 0.5)
-            plt.tight_layout(pad=1.5)
+            fig.tight_layout(pad=1.5)
             apply_matplotlib_text_styles(ax, text_styles, title_text=title_str, title_loc="left")
 
-            encoded, media_type = figure_to_base64(fmt)
-            plt.close()
+            encoded, media_type = figure_to_base64(fmt, fig)
 
             print(f"Summary chart created successfully with {len(themed_df_sorted)} themes")
             return encoded, media_type
 
         except Exception as e:
             print(f"Error creating summary chart: {str(e)}")
-            plt.close('all')
             raise e
 
     @staticmethod
@@ -1336,61 +2029,78 @@ class GeneOntologyAPI:
                 out.extend(gg.strip() for gg in g if isinstance(gg, str) and gg.strip())
         return out
 
+    def _with_intersections(self, df: pd.DataFrame, p_thresh: float) -> pd.DataFrame:
+        df = self._significant_terms(df, p_thresh)
+        if "intersections" not in df.columns:
+            df["intersections"] = [[]] * len(df)
+        else:
+            df["intersections"] = df["intersections"].apply(self._normalize_intersection_genes)
+        return df
+
     def enrich_with_genes(self, genes: List[str], p_thresh: float = 1e-2) -> pd.DataFrame:
         """Enrichment analysis returning gene lists per term (for theme-theme overlap)."""
         if not genes:
             return pd.DataFrame()
         try:
             print(f"Starting enrichment with gene lists for {len(genes)} genes")
-            df = self.gp.profile(organism="mmusculus", query=list(genes), no_evidences=False)
-            print(f"GProfiler returned {len(df)} results")
-            pcol = self._pick_pval_column(df)
-            df = df.sort_values(pcol).copy()
-            df = df[df[pcol] < p_thresh].copy()
-            df["Score"] = -np.log10(df[pcol].astype(float))
-            df["p_col_used"] = pcol
-            if "intersections" not in df.columns:
-                df["intersections"] = [[]] * len(df)
-            else:
-                df["intersections"] = df["intersections"].apply(self._normalize_intersection_genes)
-            return df
+            df = self.enrichment_cache.profile(genes, self.enrichment_organism, evidences=True)
+            return self._with_intersections(df, p_thresh)
         except Exception as e:
             print(f"Error in enrich_with_genes: {e}")
             import traceback
             traceback.print_exc()
             return pd.DataFrame()
 
-    def get_theme_gene_sets(self, enr_df: pd.DataFrame) -> dict:
-        """For each theme, return the set of genes from all GO terms assigned to that theme."""
+    async def aenrich_with_genes(self, genes: List[str], p_thresh: float = 1e-2) -> pd.DataFrame:
+        """enrich_with_genes() for async handlers."""
+        if not genes:
+            return pd.DataFrame()
+        try:
+            print(f"Starting enrichment with gene lists for {len(genes)} genes")
+            df = await self.enrichment_cache.aprofile(genes, self.enrichment_organism, evidences=True)
+            return self._with_intersections(df, p_thresh)
+        except Exception as e:
+            print(f"Error in enrich_with_genes: {e}")
+            import traceback
+            traceback.print_exc()
+            return pd.DataFrame()
+
+    def theme_gene_matrix(self, enr_df: pd.DataFrame) -> ThemeGeneMatrix:
+        """Theme × gene incidence from the Theme column (one theme per row, as after explode)."""
         if enr_df.empty or "Theme" not in enr_df.columns:
-            return {}
-        theme_genes = {}
-        for _, row in enr_df.iterrows():
-            theme = row.get("Theme")
-            if pd.isna(theme) or not theme:
+            return ThemeGeneMatrix.from_sets({})
+        themes: Dict[str, int] = {}
+        term_themes: List[List[int]] = []
+        term_genes: List[List[str]] = []
+        genes_col = enr_df["intersections"] if "intersections" in enr_df.columns else [None] * len(enr_df)
+        for theme, genes in zip(enr_df["Theme"], genes_col):
+            if not isinstance(theme, str) or not theme:
                 continue
-            genes = row.get("intersections", [])
-            if not isinstance(genes, list):
-                genes = []
-            theme_genes.setdefault(theme, set()).update(g for g in genes if isinstance(g, str))
-        return theme_genes
+            term_themes.append([themes.setdefault(theme, len(themes))])
+            term_genes.append([g for g in genes if isinstance(g, str)] if isinstance(genes, list) else [])
+        return ThemeGeneMatrix.from_terms(list(themes), term_themes, term_genes)
 
-    def gene_sets_for_selected_themes(
+    def get_theme_gene_sets(self, enr_df: pd.DataFrame) -> dict:
+        """For each theme, return the set of genes from all GO terms assigned to that theme."""
+        return self.theme_gene_matrix(enr_df).gene_sets()
+
+    def selected_theme_gene_matrix(
         self,
         enr_df: pd.DataFrame,
         selected_backend_names: List[str],
         query_genes: Optional[List[str]] = None,
-    ) -> Dict[str, set]:
+        matcher: Optional[ThemeMatcher] = None,
+    ) -> ThemeGeneMatrix:
         """
-        Build per-theme gene sets for selected themes. Each enriched GO term contributes
+        Per-theme genes for selected themes. Each enriched GO term contributes
         intersection genes to every selected theme whose keywords appear in the term's
         name or description. If gProfiler returns empty intersections, falls back to the
         query gene list when intersection_size > 0, or (last resort) when no theme got any
         genes but terms matched keywords.
         """
-        out: Dict[str, set] = {t: set() for t in selected_backend_names}
-        if enr_df.empty or not selected_backend_names:
-            return out
+        selected_names = list(dict.fromkeys(selected_backend_names))
+        if enr_df.empty or not selected_names:
+            return ThemeGeneMatrix.from_sets({}, selected_names)
 
         qset: List[str] = []
         if query_genes:
@@ -1400,10 +2110,9 @@ class GeneOntologyAPI:
                 )
             )
 
-        def row_search_text(row: Any) -> str:
+        def search_text(*values: Any) -> str:
             parts: List[str] = []
-            for key in ("name", "description"):
-                v = row.get(key)
+            for v in values:
                 if v is None:
                     continue
                 if isinstance(v, float) and pd.isna(v):
@@ -1413,101 +2122,72 @@ class GeneOntologyAPI:
                     parts.append(s)
             return " ".join(parts).lower()
 
-        def genes_for_row(row: Any) -> List[str]:
-            gene_list = self._normalize_intersection_genes(row.get("intersections", []))
-            if gene_list:
-                return gene_list
-            if not qset:
-                return []
-            isize = row.get("intersection_size")
+        def has_intersection(isize: Any) -> bool:
             try:
-                if isize is None or pd.isna(isize):
-                    return []
-                if int(isize) <= 0:
-                    return []
+                return isize is not None and not pd.isna(isize) and int(isize) > 0
             except (TypeError, ValueError):
-                return []
-            return list(qset)
+                return False
 
-        for _, row in enr_df.iterrows():
-            low = row_search_text(row)
+        if matcher is None:
+            matcher = self.theme_matcher()
+        selected = matcher.subset_mask(selected_names)
+        position = {t: i for i, t in enumerate(selected_names)}
+
+        def column(name: str) -> Sequence[Any]:
+            return enr_df[name].tolist() if name in enr_df.columns else [None] * len(enr_df)
+
+        term_themes: List[List[int]] = []
+        term_genes: List[List[str]] = []
+        for name, description, raw, isize in zip(
+            column("name"), column("description"), column("intersections"), column("intersection_size")
+        ):
+            low = search_text(name, description)
             if not low:
                 continue
-            gene_list = genes_for_row(row)
-            if not gene_list:
-                continue
-            for th in selected_backend_names:
-                kws = self.themes.get(th, [])
-                if not kws:
-                    continue
-                for kw in kws:
-                    if kw in low:
-                        out[th].update(gene_list)
-                        break
-
-        if qset and all(not s for s in out.values()):
-            for _, row in enr_df.iterrows():
-                low = row_search_text(row)
-                if not low:
-                    continue
-                for th in selected_backend_names:
-                    kws = self.themes.get(th, [])
-                    if not kws:
-                        continue
-                    for kw in kws:
-                        if kw in low:
-                            out[th].update(qset)
-                            break
-
+            term_themes.append([position[t] for t in matcher.names(matcher.mask(low) & selected)])
+            gene_list = self._normalize_intersection_genes(raw)
+            if not gene_list and qset and has_intersection(isize):
+                gene_list = qset
+            term_genes.append(gene_list)
+
+        out = ThemeGeneMatrix.from_terms(selected_names, term_themes, term_genes)
+        if qset and not out.matrix.nnz:
+            out = ThemeGeneMatrix.from_terms(selected_names, term_themes, [qset] * len(term_themes))
         return out
 
+    def gene_sets_for_selected_themes(
+        self,
+        enr_df: pd.DataFrame,
+        selected_backend_names: List[str],
+        query_genes: Optional[List[str]] = None,
+        matcher: Optional[ThemeMatcher] = None,
+    ) -> Dict[str, set]:
+        """Set-valued view of selected_theme_gene_matrix."""
+        return self.selected_theme_gene_matrix(
+            enr_df, selected_backend_names, query_genes=query_genes, matcher=matcher
+        ).gene_sets()
+
     def compute_theme_overlap_network(
-        self, theme_genes: dict, theme_list: Optional[List[str]] = None
+        self,
+        theme_genes: Any,
+        theme_list: Optional[List[str]] = None,
+        include_genes: bool = True,
+        universe_size: Optional[int] = None,
+        max_fdr: Optional[float] = None,
     ) -> dict:
         """Compute nodes and edges for theme-theme gene overlap network.
+        theme_genes: ThemeGeneMatrix, or a dict of theme -> gene set.
         theme_list: if provided, only include these themes (and only edges between them).
-        Returns: { nodes: [{id, label}], edges: [{source, target, weight, genes}], min_shared, max_shared }
-        Each edge includes genes: sorted list of shared gene symbols for that theme pair.
+        Returns: { nodes: [{id, label}], edges: [{source, target, weight, jaccard, overlap_coefficient,
+        p_value, fdr, genes}], min_shared, max_shared, universe_size, tested_pairs }
+        p_value is hypergeometric over universe_size genes (the query list); max_fdr filters edges.
+        Each edge includes genes (sorted shared symbols) unless include_genes is False.
         """
-        themes = theme_list if theme_list is not None else list(theme_genes.keys())
-        seen = set()
-        ordered: List[str] = []
-        for t in themes:
-            if t in theme_genes and theme_genes[t] and t not in seen:
-                seen.add(t)
-                ordered.append(t)
-        themes = ordered
-        nodes = [{"id": t, "label": t} for t in themes]
-        edges = []
-        min_shared = None
-        max_shared = None
-        for i, a in enumerate(themes):
-            for b in themes[i + 1 :]:
-                shared_set = theme_genes[a] & theme_genes[b]
-                shared = len(shared_set)
-                if shared > 0:
-                    edges.append(
-                        {
-                            "source": a,
-                            "target": b,
-                            "weight": shared,
-                            "genes": sorted(shared_set),
-                        }
-                    )
-                    if min_shared is None or shared < min_shared:
-                        min_shared = shared
-                    if max_shared is None or shared > max_shared:
-                        max_shared = shared
-        if min_shared is None:
-            min_shared = 0
-        if max_shared is None:
-            max_shared = 0
-        return {
-            "nodes": nodes,
-            "edges": edges,
-            "min_shared": min_shared,
-            "max_shared": max_shared,
-        }
+        if not isinstance(theme_genes, ThemeGeneMatrix):
+            theme_genes = ThemeGeneMatrix.from_sets(theme_genes)
+        return theme_genes.overlap_network(
+            theme_list, include_genes=include_genes, universe_size=universe_size, max_fdr=max_fdr
+        )
 
 
 # UI checkbox ids (Customize / Default theme pages) → backend aggregate theme names used in enrichment.
@@ -1538,7 +2218,7 @@ PREDEFINED_ONTOLOGY_THEME_ID_MAP: Dict[str, str] = {
 
 
 def build_restricted_ontology_themes_by_id(
-    original: Dict[str, List[str]],
+    original: Mapping[str, Sequence[str]],
     selected_ids: List[str],
     custom_theme_data: List[Dict[str, Any]],
 ) -> Dict[str, List[str]]:
@@ -1595,7 +2275,7 @@ def keyword_signature(keywords: List[str]) -> Tuple[str, ...]:
 def mirror_aggregate_for_identical_keywords(
     themed: pd.DataFrame,
     ordered_theme_ids: List[str],
-    restricted_themes: Dict[str, List[str]],
+    restricted_themes: Mapping[str, Sequence[str]],
 ) -> pd.DataFrame:
     """
     Legacy helper for exclusive assign_theme flows. Custom analyze/summary now use
@@ -1628,12 +2308,12 @@ def mirror_aggregate_for_identical_keywords(
 
 
 def mirror_theme_gene_sets_for_identical_keywords(
-    theme_genes: Dict[str, set],
+    theme_genes: ThemeGeneMatrix,
     ordered_theme_ids: List[str],
-    restricted_themes: Dict[str, List[str]],
-) -> Dict[str, set]:
+    restricted_themes: Mapping[str, Sequence[str]],
+) -> ThemeGeneMatrix:
     """Same as mirror_aggregate but for per-theme gene sets used in overlap network."""
-    out: Dict[str, set] = {tid: set(theme_genes.get(tid) or []) for tid in ordered_theme_ids}
+    source: Dict[str, str] = {}
     sig_groups: Dict[Tuple[str, ...], List[str]] = {}
     for tid in ordered_theme_ids:
         sig = keyword_signature(restricted_themes.get(tid, []))
@@ -1641,18 +2321,13 @@ def mirror_theme_gene_sets_for_identical_keywords(
             continue
         sig_groups.setdefault(sig, []).append(tid)
     for _sig, tids in sig_groups.items():
-        source = None
-        for tid in tids:
-            if out.get(tid):
-                source = tid
-                break
-        if source is None:
+        donor = next((tid for tid in tids if theme_genes.size(tid)), None)
+        if donor is None:
             continue
-        genes = out[source]
         for tid in tids:
-            if not out[tid]:
-                out[tid] = set(genes)
-    return out
+            if not theme_genes.size(tid):
+                source[tid] = donor
+    return theme_genes.reindex(ordered_theme_ids, source)
 
 
 def parse_theme_labels_json(theme_labels: Optional[str]) -> Dict[str, str]:
@@ -1730,6 +2405,12 @@ def try_parse_selected_themes_form(themes: Optional[str]) -> Optional[List[Any]]
 # Initialize ontology API
 ontology_api = GeneOntologyAPI()
 
+
+@app.on_event("shutdown")
+async def close_gprofiler_client():
+    await ontology_api.gprofiler_client.aclose()
+
+
 @app.post("/api/ontology/analyze")
 async def analyze_ontology(file: UploadFile = File(...)):
     """Analyze gene ontology from uploaded file"""
@@ -1752,7 +2433,7 @@ async def analyze_ontology(file: UploadFile = File(...)):
         
         # Perform enrichment
         print("Starting enrichment analysis...")
-        enr_df = ontology_api.enrich(genes)
+        enr_df = await ontology_api.aenrich(genes)
         enr_df = ontology_api.filter_go_aspect(enr_df, ontology_api.default_go_aspect)
         if enr_df.empty:
             print("No enrichment results found")
@@ -1809,14 +2490,14 @@ async def generate_theme_chart(
     if custom_theme_data:
         print(f"Custom themes received for theme-chart: {custom_theme_data}")
     
-    # Temporarily scope theme keywords (custom chart: only the requested theme is matchable)
-    original_themes = ontology_api.themes.copy()
+    # Request-scoped theme keywords (custom chart: only the requested theme is matchable)
     try:
+        matcher: Optional[ThemeMatcher] = None
         if custom_theme_data:
-            ontology_api.themes = build_restricted_ontology_themes_by_id(
-                original_themes, [theme], custom_theme_data
+            matcher = theme_matcher(
+                build_restricted_ontology_themes_by_id(ontology_api.themes, [theme], custom_theme_data)
             )
-            print(f"Theme-chart restricted themes keys: {list(ontology_api.themes.keys())}")
+            print(f"Theme-chart restricted themes keys: {list(matcher.themes)}")
         
         print(f"Processing theme chart request for theme: {theme}")
         
@@ -1832,7 +2513,7 @@ async def generate_theme_chart(
         print(f"Loaded {len(genes)} genes from file")
         
         # Perform enrichment, scoped to selected GO aspect when provided
-        enr_df = ontology_api.enrich(genes)
+        enr_df = await ontology_api.aenrich(genes)
         aspect = (go_aspect or "").strip().upper() or ontology_api.default_go_aspect
         enr_df = ontology_api.filter_go_aspect(enr_df, aspect)
         if enr_df.empty:
@@ -1840,10 +2521,10 @@ async def generate_theme_chart(
         print(f"Enrichment analysis completed with {len(enr_df)} significant terms")
         
         # `theme` is a checkbox id (custom flow) or a publication display name (default flow).
-        # The custom flow installs an id-keyed map above, so it must annotate from self.themes;
+        # The custom flow builds an id-keyed matcher above, so it must annotate with it;
         # publication annotation ignores that map and would only ever yield display names.
         if custom_theme_data:
-            enr_df = ontology_api.annotate_with_themes(enr_df)
+            enr_df = ontology_api.annotate_with_themes(enr_df, matcher)
         else:
             enr_df = ontology_api.annotate_with_themes_publication(enr_df)
         themed_terms = enr_df[enr_df["Theme"].notna()]
@@ -1901,9 +2582,6 @@ async def generate_theme_chart(
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error generating chart: {str(e)}")
-    finally:
-        # Always restore original themes
-        ontology_api.themes = original_themes
 
 @app.post("/api/ontology/summary-chart")
 async def generate_summary_chart(
@@ -1935,7 +2613,7 @@ async def generate_summary_chart(
         print(f"Loaded {len(genes)} genes from file")
         
         # Perform enrichment
-        enr_df = ontology_api.enrich(genes)
+        enr_df = await ontology_api.aenrich(genes)
         enr_df = ontology_api.filter_go_aspect(enr_df, ontology_api.default_go_aspect)
         if enr_df.empty:
             raise HTTPException(status_code=400, detail="No significant enrichment results found")
@@ -1973,6 +2651,284 @@ async def generate_summary_chart(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+async def _ontology_bundle_parts(
+    genes: List[str],
+    aspect: str,
+    summary_style: Dict[str, Any],
+    theme_style: Dict[str, Any],
+    fmt: str,
+    include_theme_charts: bool,
+    include_network: bool,
+):
+    """Yield the default-theme page parts in the order they become ready.
+
+    Enrichment and theme annotation run once; charts render on worker threads concurrently
+    (they use standalone Figures) and theme charts follow the summary chart."""
+    if include_network:
+        enr_df = await ontology_api.aenrich_with_genes(genes)
+    else:
+        enr_df = await ontology_api.aenrich(genes)
+    enr_df = ontology_api.filter_go_aspect(enr_df, aspect)
+    if enr_df.empty:
+        yield {"part": "results", "results": [], "message": "No significant enrichment results found"}
+        return
+
+    themed_terms = ontology_api.annotate_with_themes_publication(enr_df)
+    themed = ontology_api.aggregate_themes_publication(themed_terms)
+    themed = ontology_api.filter_publication_display_themes(themed)
+    themes = [t for t in themed.index if t in ontology_api.default_enabled_themes]
+    print(f"Bundle: {len(enr_df)} terms, {len(themes)} themes")
+
+    summary_task = None
+    if not themed.empty:
+        summary_task = asyncio.ensure_future(asyncio.to_thread(
+            ontology_api.create_summary_chart, themed, style=summary_style, chart_format=fmt
+        ))
+
+    async def render_theme(theme: str) -> Dict[str, Any]:
+        chart_base64, media_type = await asyncio.to_thread(
+            ontology_api.create_theme_chart, themed_terms, theme, style=theme_style, chart_format=fmt
+        )
+        return {
+            "part": "theme_chart",
+            "theme": theme,
+            "chart_base64": chart_base64,
+            "format": fmt,
+            "media_type": media_type,
+        }
+
+    theme_tasks: List[asyncio.Future] = []
+    try:
+        yield {
+            "part": "results",
+            "results": [
+                {"theme": theme, "score": float(row["Score"]), "terms": int(row["Terms"])}
+                for theme, row in themed.iterrows()
+            ],
+        }
+
+        subterms: Dict[str, List[Dict[str, Any]]] = {}
+        for theme in themes:
+            sub_df = themed_terms[themed_terms["Theme"] == theme].sort_values("Score", ascending=False)
+            subterms[theme] = [
+                {"name": name, "score": float(score)} for name, score in zip(sub_df["name"], sub_df["Score"])
+            ]
+        yield {"part": "subterms", "subterms": subterms}
+
+        if include_network:
+            enabled_terms = ontology_api.filter_default_enabled_theme_terms(themed_terms)
+            theme_genes = ontology_api.theme_gene_matrix(enabled_terms)
+            network = ontology_api.compute_theme_overlap_network(
+                theme_genes,
+                theme_list=list(ontology_api.default_enabled_themes),
+                universe_size=len(set(genes)),
+            )
+            yield {"part": "network", "network": network}
+
+        if summary_task is not None:
+            chart_base64, media_type = await summary_task
+            yield {"part": "summary_chart", "chart": chart_base64, "format": fmt, "media_type": media_type}
+
+        # Theme charts start once the summary is out: rendering is mostly GIL-bound, so running
+        # them alongside it would only delay the chart the page shows first.
+        if include_theme_charts:
+            theme_tasks = [asyncio.ensure_future(render_theme(t)) for t in themes]
+        for next_chart in asyncio.as_completed(theme_tasks):
+            yield await next_chart
+    finally:
+        # Client went away (or a part failed): don't leave renders queued on the thread pool.
+        for task in [summary_task, *theme_tasks]:
+            if task is not None and not task.done():
+                task.cancel()
+
+
+@app.post("/api/ontology/bundle")
+async def ontology_bundle(
+    file: UploadFile = File(...),
+    go_aspect: str = Form(None),
+    include_theme_charts: bool = Form(False),
+    include_network: bool = Form(True),
+    stream: bool = Form(False),
+    font_size: str = Form(None),
+    font_color: str = Form(None),
+    bar_color: str = Form(None),
+    multi_color: str = Form(None),
+    chart_format: str = Form(None),
+    text_styles: str = Form(None),
+    chart_title_override: str = Form(None),
+    theme_bar_color: str = Form(None),
+    theme_text_styles: str = Form(None),
+):
+    """Everything the default-theme page needs from one upload: theme results, summary chart,
+    subterms of every enabled theme, optionally every theme chart, and the overlap network.
+
+    Summary chart styling uses the summary-chart fields; theme charts use theme_bar_color and
+    theme_text_styles. With stream=true the parts are sent as NDJSON lines ({"part": ...}) as
+    each is ready, theme charts in completion order, ending with {"part": "done"}."""
+    if not file.filename.endswith('.txt'):
+        raise HTTPException(status_code=400, detail="Only .txt files are supported")
+    aspect = parse_go_aspect(go_aspect)
+
+    content = await file.read()
+    genes = ontology_api.load_genes_from_file(content.decode('utf-8'))
+    if not genes:
+        raise HTTPException(status_code=400, detail="No valid genes found in file")
+    print(f"Bundle request: {len(genes)} genes, theme charts={include_theme_charts}, stream={stream}")
+
+    summary_style = parse_chart_style_options(font_size, font_color, bar_color, multi_color, text_styles)
+    if isinstance(chart_title_override, str) and chart_title_override.strip():
+        summary_style['chart_title_override'] = chart_title_override.strip()
+    theme_style = parse_chart_style_options(font_size, font_color, theme_bar_color, text_styles=theme_text_styles)
+    fmt = normalize_chart_format(chart_format)
+    parts = _ontology_bundle_parts(
+        genes, aspect, summary_style, theme_style, fmt, include_theme_charts, include_network
+    )
+
+    if stream:
+        async def ndjson():
+            try:
+                async for part in parts:
+                    yield json.dumps(part) + "\n"
+                yield json.dumps({"part": "done"}) + "\n"
+            except Exception as e:
+                # Headers are already sent; report the failure in-band.
+                print(f"Error in ontology bundle stream: {e}")
+                yield json.dumps({"part": "error", "detail": str(e)}) + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    try:
+        bundle: Dict[str, Any] = {}
+        theme_charts: Dict[str, Dict[str, Any]] = {}
+        async for part in parts:
+            name = part.pop("part")
+            if name == "theme_chart":
+                theme_charts[part.pop("theme")] = part
+            elif name == "summary_chart":
+                bundle["summary_chart"] = part
+            else:
+                bundle.update(part)
+        if include_theme_charts:
+            # Completion order is arbitrary; return charts in result (score) order.
+            order = [r["theme"] for r in bundle.get("results", [])]
+            bundle["theme_charts"] = {t: theme_charts[t] for t in order if t in theme_charts}
+        return bundle
+    except Exception as e:
+        print(f"Error in ontology bundle: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error analyzing genes: {str(e)}")
+
+def parse_compare_labels(labels: Optional[str], filenames: List[str]) -> List[str]:
+    """Display label per list: JSON array or comma-separated `labels`, else the file name; made unique."""
+    given: List[Any] = []
+    if labels and str(labels).strip():
+        try:
+            parsed = json.loads(labels)
+            given = parsed if isinstance(parsed, list) else []
+        except json.JSONDecodeError:
+            given = [part for part in str(labels).split(",")]
+    out: List[str] = []
+    for i, filename in enumerate(filenames):
+        label = str(given[i]).strip() if i < len(given) and given[i] is not None else ""
+        label = label or re.sub(r"\.txt$", "", filename or f"List {i + 1}")
+        base, n = label, 2
+        while label in out:
+            label = f"{base} ({n})"
+            n += 1
+        out.append(label)
+    return out
+
+
+@app.post("/api/ontology/compare")
+async def compare_ontology(
+    files: List[UploadFile] = File(...),
+    labels: str = Form(None),
+    go_aspect: str = Form(None),
+):
+    """Default-theme analysis of several gene lists side by side (one per organ, timepoint, ...).
+
+    Lists are enriched concurrently, at most COMPARE_MAX_CONCURRENCY at a time and each through the
+    enrichment cache, then annotated and aggregated in one pass with aggregate_themes_publication
+    semantics. Returns a theme × list score matrix (themes enabled and scoring in any list) with
+    term counts, and every significant GO term with its score in each list (null where absent)."""
+    if len(files) > COMPARE_MAX_LISTS:
+        raise HTTPException(status_code=400, detail=f"At most {COMPARE_MAX_LISTS} gene lists can be compared at once")
+    aspect = parse_go_aspect(go_aspect)
+
+    gene_lists: List[List[str]] = []
+    for upload in files:
+        if not upload.filename.endswith('.txt'):
+            raise HTTPException(status_code=400, detail=f"Only .txt files are supported ({upload.filename})")
+        genes = ontology_api.load_genes_from_file((await upload.read()).decode('utf-8'))
+        if not genes:
+            raise HTTPException(status_code=400, detail=f"No valid genes found in {upload.filename}")
+        gene_lists.append(genes)
+    list_labels = parse_compare_labels(labels, [upload.filename for upload in files])
+    print(f"Compare request: {len(gene_lists)} lists ({', '.join(str(len(g)) for g in gene_lists)} genes)")
+
+    semaphore = asyncio.Semaphore(COMPARE_MAX_CONCURRENCY)
+
+    async def enrich_list(genes: List[str]) -> pd.DataFrame:
+        async with semaphore:
+            return await ontology_api.aenrich(genes)
+
+    try:
+        frames = await asyncio.gather(*(enrich_list(genes) for genes in gene_lists))
+        frames = [ontology_api.filter_go_aspect(df, aspect) for df in frames]
+        non_empty = [df.assign(List=i) for i, df in enumerate(frames) if not df.empty]
+        enr_all = pd.concat(non_empty, ignore_index=True) if non_empty else pd.DataFrame()
+
+        themed_terms = ontology_api.annotate_with_themes_publication(enr_all)
+        scores, counts = ontology_api.aggregate_themes_publication_by_list(themed_terms, len(frames))
+        shown = scores.index.isin(PUBLICATION_DEFAULT_ENABLED_THEME_NAMES) & (scores > 0).any(axis=1).to_numpy()
+        order = scores[shown].sum(axis=1).sort_values(ascending=False, kind="stable").index
+        scores, counts = scores.loc[order], counts.loc[order]
+
+        terms: List[Dict[str, Any]] = []
+        if not enr_all.empty:
+            # Terms are keyed by GO id, or by name when the table has no native column.
+            key = "native" if "native" in enr_all.columns else "name"
+            presence = enr_all.pivot_table(
+                index=list(dict.fromkeys([key, "name"])), columns="List", values="Score", aggfunc="max"
+            ).reindex(columns=range(len(frames)))
+            presence = presence.assign(
+                _lists=presence.notna().sum(axis=1), _best=presence.max(axis=1)
+            ).sort_values(["_lists", "_best"], ascending=False, kind="stable")
+            enabled_terms = ontology_api.filter_default_enabled_theme_terms(themed_terms)
+            term_themes = (
+                enabled_terms.groupby(key, sort=False)["Theme"].apply(lambda t: list(dict.fromkeys(t)))
+                if not enabled_terms.empty else pd.Series(dtype=object)
+            )
+            values = presence[list(range(len(frames)))].to_numpy()
+            for index, row in zip(presence.index, values):
+                native, name = index if key == "native" else (None, index)
+                terms.append({
+                    "native": native,
+                    "name": name,
+                    "themes": term_themes.get(native if key == "native" else name, []),
+                    "scores": [None if np.isnan(v) else float(v) for v in row],
+                })
+
+        return {
+            "lists": [
+                {"label": label, "genes": len(genes), "terms": int(len(df))}
+                for label, genes, df in zip(list_labels, gene_lists, frames)
+            ],
+            "go_aspect": aspect,
+            "themes": scores.index.tolist(),
+            "scores": scores.to_numpy(dtype=float).tolist(),
+            "term_counts": counts.to_numpy(dtype=int).tolist(),
+            "terms": terms,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in ontology compare: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error comparing gene lists: {str(e)}")
+
 @app.post("/api/ontology/custom-analyze")
 async def analyze_custom_ontology(
     file: UploadFile = File(...), 
@@ -1984,7 +2940,6 @@ async def analyze_custom_ontology(
     if not file.filename.endswith('.txt'):
         raise HTTPException(status_code=400, detail="Only .txt files are supported")
     
-    original_themes = ontology_api.themes.copy()
     try:
         selected_themes = parse_selected_themes_json(themes)
         if not selected_themes:
@@ -1997,10 +2952,10 @@ async def analyze_custom_ontology(
             print(f"Custom themes received: {custom_theme_data}")
         
         unique_ids = list(dict.fromkeys(selected_themes))
-        ontology_api.themes = build_restricted_ontology_themes_by_id(
-            original_themes, unique_ids, custom_theme_data
+        matcher = theme_matcher(
+            build_restricted_ontology_themes_by_id(ontology_api.themes, unique_ids, custom_theme_data)
         )
-        print(f"Custom analyze restricted theme keys: {list(ontology_api.themes.keys())}")
+        print(f"Custom analyze restricted theme keys: {list(matcher.themes)}")
         
         # Read file content
         content = await file.read()
@@ -2012,7 +2967,7 @@ async def analyze_custom_ontology(
             raise HTTPException(status_code=400, detail="No valid genes found in file")
         
         # Perform enrichment, scoped to selected GO aspect (BP / MF / CC) when provided
-        enr_df = ontology_api.enrich(genes)
+        enr_df = await ontology_api.aenrich(genes)
         aspect = (go_aspect or "").strip().upper() or None
         if aspect:
             print(f"Filtering custom analyze to GO aspect: {aspect}")
@@ -2022,7 +2977,7 @@ async def analyze_custom_ontology(
         
         # Multi-assign so shared keywords count independently for every matching theme
         # (same as default analyze / theme-chart; not first-match-wins assign_theme).
-        annotated = ontology_api.annotate_with_themes(enr_df)
+        annotated = ontology_api.annotate_with_themes(enr_df, matcher)
         
         print(f"Selected theme IDs: {selected_themes}")
         print(f"Available themes in data: {annotated['Theme'].dropna().unique().tolist()}")
@@ -2036,7 +2991,7 @@ async def analyze_custom_ontology(
             return {"results": [], "message": f"No enrichment results found for selected themes: {unique_ids}"}
         
         # Aggregate results for selected themes
-        themed = ontology_api.aggregate(filtered_df)
+        themed = ontology_api.aggregate(filtered_df, matcher)
         
         # One row per selected theme id (stable order); shared keywords score on every match
         results = []
@@ -2058,8 +3013,6 @@ async def analyze_custom_ontology(
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing genes: {str(e)}")
-    finally:
-        ontology_api.themes = original_themes
 
 @app.post("/api/ontology/custom-summary-chart")
 async def generate_custom_summary_chart(
@@ -2080,7 +3033,6 @@ async def generate_custom_summary_chart(
     if not file.filename.endswith('.txt'):
         raise HTTPException(status_code=400, detail="Only .txt files are supported")
     
-    original_themes = ontology_api.themes.copy()
     try:
         selected_themes = parse_selected_themes_json(themes)
         if not selected_themes:
@@ -2094,10 +3046,10 @@ async def generate_custom_summary_chart(
         
         unique_ids = list(dict.fromkeys(selected_themes))
         labels_map = parse_theme_labels_json(theme_labels)
-        ontology_api.themes = build_restricted_ontology_themes_by_id(
-            original_themes, unique_ids, custom_theme_data
+        matcher = theme_matcher(
+            build_restricted_ontology_themes_by_id(ontology_api.themes, unique_ids, custom_theme_data)
         )
-        print(f"Custom summary chart restricted theme keys: {list(ontology_api.themes.keys())}")
+        print(f"Custom summary chart restricted theme keys: {list(matcher.themes)}")
         
         # Read file content
         content = await file.read()
@@ -2109,7 +3061,7 @@ async def generate_custom_summary_chart(
             raise HTTPException(status_code=400, detail="No valid genes found in file")
         
         # Perform enrichment, scoped to selected GO aspect when provided
-        enr_df = ontology_api.enrich(genes)
+        enr_df = await ontology_api.aenrich(genes)
         aspect = (go_aspect or "").strip().upper() or None
         if aspect:
             print(f"Filtering custom summary chart to GO aspect: {aspect}")
@@ -2119,7 +3071,7 @@ async def generate_custom_summary_chart(
         
         # Multi-assign so shared keywords count independently for every matching theme
         # (same as default analyze / theme-chart; not first-match-wins assign_theme).
-        annotated = ontology_api.annotate_with_themes(enr_df)
+        annotated = ontology_api.annotate_with_themes(enr_df, matcher)
         
         # Filter enrichment results to only include selected themes
         filtered_df = annotated[annotated["Theme"].isin(unique_ids)].copy()
@@ -2128,7 +3080,7 @@ async def generate_custom_summary_chart(
             raise HTTPException(status_code=400, detail=f"No enrichment results found for selected themes: {unique_ids}")
         
         # Aggregate results for selected themes
-        themed = ontology_api.aggregate(filtered_df)
+        themed = ontology_api.aggregate(filtered_df, matcher)
         
         if themed.empty:
             raise HTTPException(status_code=400, detail="No themes could be aggregated")
@@ -2166,8 +3118,6 @@ async def generate_custom_summary_chart(
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
-    finally:
-        ontology_api.themes = original_themes
 
 @app.post("/api/ontology/theme-overlap-network")
 async def get_theme_overlap_network(
@@ -2175,11 +3125,16 @@ async def get_theme_overlap_network(
     themes: str = Form(None),
     custom_themes: str = Form(None),
     go_aspect: str = Form(None),
+    edge_genes: bool = Form(True),
+    max_fdr: float = Form(None),
 ):
-    """Return theme-theme gene overlap network (nodes, edges with shared gene count) for default or custom themes."""
+    """Return theme-theme gene overlap network (nodes, edges with shared gene count and overlap statistics)
+    for default or custom themes. edge_genes=false omits the shared gene list on each edge; max_fdr keeps
+    only edges whose BH-adjusted hypergeometric p-value is at most that value."""
     if not file.filename.endswith('.txt'):
         raise HTTPException(status_code=400, detail="Only .txt files are supported")
-    original_themes = ontology_api.themes.copy()
+    if max_fdr is not None and not 0 < max_fdr <= 1:
+        raise HTTPException(status_code=400, detail="max_fdr must be in (0, 1]")
     try:
         content = await file.read()
         file_content = content.decode('utf-8')
@@ -2191,25 +3146,25 @@ async def get_theme_overlap_network(
         custom_theme_data = parse_custom_theme_form_value(custom_themes)
 
         selected_names: List[str] = []
+        matcher: Optional[ThemeMatcher] = None
         if selected_themes:
             selected_names = list(dict.fromkeys(selected_themes))
-            ontology_api.themes = build_restricted_ontology_themes_by_id(
-                original_themes, selected_names, custom_theme_data
+            matcher = theme_matcher(
+                build_restricted_ontology_themes_by_id(ontology_api.themes, selected_names, custom_theme_data)
             )
 
-        enr_df = ontology_api.enrich_with_genes(genes)
+        enr_df = await ontology_api.aenrich_with_genes(genes)
         aspect = (go_aspect or "").strip().upper() or ontology_api.default_go_aspect
         enr_df = ontology_api.filter_go_aspect(enr_df, aspect)
         if enr_df.empty:
             raise HTTPException(status_code=400, detail="No significant enrichment results found")
 
         if selected_themes:
-            restricted_snapshot = dict(ontology_api.themes)
-            theme_genes = ontology_api.gene_sets_for_selected_themes(
-                enr_df, selected_names, query_genes=genes
+            theme_genes = ontology_api.selected_theme_gene_matrix(
+                enr_df, selected_names, query_genes=genes, matcher=matcher
             )
             theme_genes = mirror_theme_gene_sets_for_identical_keywords(
-                theme_genes, selected_names, restricted_snapshot
+                theme_genes, selected_names, matcher.keywords
             )
             theme_list = selected_names
         else:
@@ -2220,12 +3175,17 @@ async def get_theme_overlap_network(
                     status_code=400,
                     detail="No GO terms could be assigned to a theme for overlap network",
                 )
-            theme_genes = ontology_api.get_theme_gene_sets(enr_df)
-            theme_list = [
-                t for t in ontology_api.default_enabled_themes if theme_genes.get(t)
-            ]
-
-        network = ontology_api.compute_theme_overlap_network(theme_genes, theme_list=theme_list)
+            theme_genes = ontology_api.theme_gene_matrix(enr_df)
+            # Themes without genes are dropped by the network itself.
+            theme_list = list(ontology_api.default_enabled_themes)
+
+        network = ontology_api.compute_theme_overlap_network(
+            theme_genes,
+            theme_list=theme_list,
+            include_genes=edge_genes,
+            universe_size=len(set(genes)),
+            max_fdr=max_fdr,
+        )
         return network
     except HTTPException:
         raise
@@ -2233,15 +3193,24 @@ async def get_theme_overlap_network(
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        ontology_api.themes = original_themes
+
+@app.get("/api/debug/cache")
+async def debug_cache():
+    """Debug endpoint: hit ratio, size and latency of the in-process caches"""
+    return {
+        "caches": [gene_api.gene_cache.stats(), ontology_api.enrichment_cache.stats()],
+        "gprofiler_client": ontology_api.gprofiler_client.stats(),
+        "generation": gene_api.store.generation,
+    }
 
 @app.get("/api/debug/themes")
 async def debug_themes():
     """Debug endpoint to show available themes"""
+    table = ontology_api.term_theme_table
     return {
         "available_themes": list(ontology_api.themes.keys()),
-        "theme_count": len(ontology_api.themes)
+        "theme_count": len(ontology_api.themes),
+        "term_table": table.stats() if table is not None else None,
     }
 
 @app.post("/api/debug/test-enrichment")
@@ -2261,7 +3230,7 @@ async def debug_test_enrichment(file: UploadFile = File(...)):
             return {"error": "No valid genes found in file"}
         
         # Perform enrichment
-        enr_df = ontology_api.enrich(genes)
+        enr_df = await ontology_api.aenrich(genes)
         if enr_df.empty:
             return {"error": "No significant enrichment results found"}
         
@@ -2306,17 +3275,34 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "GET /api/gene/symbols": "Get all available gene symbols",
+            "GET /api/gene/symbols/version": "Current symbol-list version and immutable URL",
             "GET /api/gene/symbol/search?gene_symbol=<symbol>": "Search for gene data",
+            "GET /api/gene/text-search?q=<words>&limit=": "Full-text gene name search (BM25)",
+            "GET /api/gene/profile?gene_symbol=<symbol>": "Per-organ gene profile (redirects to pre-rendered JSON when current)",
             "GET /api/gene/symbol/showFoldChange?gene_symbol=<symbol>": "Get fold change plot (base64)",
             "GET /api/gene/symbol/showLSMeanControl?gene_symbol=<symbol>": "Get LSmean(Control) plot (base64)",
             "GET /api/gene/symbol/showLSMeanTenMgKg?gene_symbol=<symbol>": "Get LSmean(10mg/kg) plot (base64)",
+            "GET /api/gene/compare-chart?genes=<a,b,c>&metric=&layout=grouped|grid": "Compare several genes across organs in one chart",
             "POST /api/gene/add": "Add a new gene to the database",
+            "GET /api/gene/similar?gene_symbol=<symbol>&k=&metric=cosine|pearson|euclidean": "Genes with similar cross-organ profiles",
+            "POST /api/gene/set-score": "Score an uploaded gene list across all organs",
+            "GET /api/organ/snapshot": "Binary columnar organ snapshot (.npz) for the desktop app",
+            "GET /api/organ/summary": "Per-organ significance counts, quantiles and LSMean ranges",
+            "GET /api/organ/correlation?metric=&method=pearson|spearman&fdr_max=": "Organ × organ correlation matrix",
+            "GET /api/organ/{organ}/distribution": "Per-organ fold-change / p-value histograms",
+            "GET /api/organ/{organ}/volcano": "Decimated volcano plot data (typed arrays)",
+            "GET /api/stats/significant-counts?fdr_max=&backend=auto|mongodb|memory": "Per-organ significant / up / down counts",
+            "GET /api/stats/mean-fold-change?genes=&limit=": "Per-gene mean fold change across organs",
+            "GET /api/stats/recurrent-genes?min_organs=&fdr_max=": "Genes significant in at least N organs",
             "POST /api/ontology/analyze": "Analyze gene ontology from uploaded file",
             "POST /api/ontology/theme-chart": "Generate theme-specific chart",
             "POST /api/ontology/summary-chart": "Generate ontology summary chart",
+            "POST /api/ontology/bundle": "Results, summary chart, subterms, theme charts and overlap network in one call",
+            "POST /api/ontology/compare": "Theme x list score matrix and term presence for several gene lists",
             "POST /api/ontology/custom-analyze": "Custom theme analysis",
             "POST /api/ontology/custom-summary-chart": "Custom theme summary chart",
             "POST /api/ontology/theme-overlap-network": "Theme-theme gene overlap network (nodes, edges)",
+            "GET /api/debug/cache": "Debug: Cache hit ratio and latency",
             "GET /api/debug/themes": "Debug: Show available themes",
             "POST /api/debug/test-enrichment": "Debug: Test enrichment analysis"
         }
@@ -0,0 +1,216 @@
+"""Keyword → theme assignment in one pass per GO term name (Aho–Corasick).
+
+Equivalent to the original nested loop
+
+    [theme for theme, kws in themes.items() if any(kw in text for kw in kws)]
+
+for every text: keywords are matched as plain substrings of the (already lowercased) text,
+and themes come back in map order. Matchers are immutable once built and cached by keyword
+signature, so requests sending the same theme map share one automaton.
+
+TermThemeTable holds the same answers precomputed for a GO snapshot (written by
+scripts/regenerate_publication_themes.py --go-obo), looked up by term ID or lowercased name.
+It is only consulted for a matcher whose signature digest it was generated with.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from collections import deque
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+ThemeSignature = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+# Per-matcher memo of text → theme bitmask; GO term names repeat across requests.
+TEXT_MEMO_SIZE = 65536
+
+
+class ThemeMatcher:
+    """Automaton over all keywords of a theme map; bit i of a mask is the i-th theme.
+
+    Never modified after construction (the text memo only caches results), so one instance
+    can be shared by concurrent requests and worker threads.
+    """
+
+    def __init__(self, signature: ThemeSignature):
+        self.signature = signature
+        self.digest = signature_digest(signature)
+        self.themes: Tuple[str, ...] = tuple(name for name, _ in signature)
+        self.keywords: Mapping[str, Tuple[str, ...]] = MappingProxyType(dict(signature))
+        self.full_mask = (1 << len(self.themes)) - 1
+
+        goto: List[Dict[str, int]] = [{}]
+        out: List[int] = [0]
+        for bit, (_, kws) in enumerate(signature):
+            for kw in kws:
+                state = 0
+                for ch in kw:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        goto.append({})
+                        out.append(0)
+                        nxt = len(goto) - 1
+                        goto[state][ch] = nxt
+                    state = nxt
+                out[state] |= 1 << bit
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] |= out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        self._memo: Dict[str, int] = {}
+        self._names: Dict[int, Tuple[str, ...]] = {}
+
+    def mask(self, text: str) -> int:
+        """Bitmask of every theme with a keyword occurring in `text` (match on lowercased text)."""
+        cached = self._memo.get(text)
+        if cached is not None:
+            return cached
+        goto, fail, out = self._goto, self._fail, self._out
+        full = self.full_mask
+        state = 0
+        found = out[0]  # an empty keyword matches everything
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            found |= out[state]
+            if found == full:
+                break
+        if len(self._memo) >= TEXT_MEMO_SIZE:
+            self._memo.clear()
+        self._memo[text] = found
+        return found
+
+    def names(self, mask: int) -> Tuple[str, ...]:
+        """Themes whose bit is set, in theme-map order."""
+        names = self._names.get(mask)
+        if names is None:
+            names = tuple(t for i, t in enumerate(self.themes) if mask >> i & 1)
+            self._names[mask] = names
+        return names
+
+    def match(self, text: str) -> List[str]:
+        return list(self.names(self.mask(text)))
+
+    def subset_mask(self, themes: Sequence[str]) -> int:
+        index = {t: i for i, t in enumerate(self.themes)}
+        mask = 0
+        for t in themes:
+            if t in index:
+                mask |= 1 << index[t]
+        return mask
+
+
+def signature_digest(signature: ThemeSignature) -> str:
+    return hashlib.sha1(json.dumps(signature, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def theme_signature(themes: Mapping[str, Sequence[str]]) -> ThemeSignature:
+    return tuple(
+        (name, tuple(kw for kw in (kws or ()) if isinstance(kw, str)))
+        for name, kws in themes.items()
+    )
+
+
+@lru_cache(maxsize=64)
+def _compiled(signature: ThemeSignature) -> ThemeMatcher:
+    return ThemeMatcher(signature)
+
+
+def theme_matcher(themes: Mapping[str, Sequence[str]]) -> ThemeMatcher:
+    """Matcher for this theme map, built once per distinct (theme order, keywords) signature."""
+    return _compiled(theme_signature(themes))
+
+
+TERM_TABLE_VERSION = 1
+
+
+def build_term_theme_table(
+    terms: Mapping[str, str], matchers: Mapping[str, ThemeMatcher], source: str = ""
+) -> Dict[str, Any]:
+    """JSON-ready table: term ID → row, lowercased name → row, and per-map theme bitmasks per row."""
+    ids = sorted(terms)
+    names = [terms[t].lower() for t in ids]
+    return {
+        "version": TERM_TABLE_VERSION,
+        "source": source,
+        "ids": ids,
+        "names": names,
+        "maps": {
+            label: {
+                "digest": m.digest,
+                "themes": list(m.themes),
+                "masks": [m.mask(name) for name in names],
+            }
+            for label, m in matchers.items()
+        },
+    }
+
+
+class TermThemeTable:
+    """Precomputed theme masks per GO term, keyed by matcher signature digest."""
+
+    def __init__(self, data: Mapping[str, Any]):
+        if data.get("version") != TERM_TABLE_VERSION:
+            raise ValueError(f"unsupported term theme table version {data.get('version')!r}")
+        self.source = data.get("source", "")
+        self.names: List[str] = list(data["names"])
+        self.by_id: Dict[str, int] = {t: i for i, t in enumerate(data["ids"])}
+        self.by_name: Dict[str, int] = {}
+        for i, name in enumerate(self.names):
+            self.by_name.setdefault(name, i)
+        self.masks: Dict[str, List[int]] = {m["digest"]: list(m["masks"]) for m in data["maps"].values()}
+        self.labels: Dict[str, str] = {m["digest"]: label for label, m in data["maps"].items()}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: str) -> Optional["TermThemeTable"]:
+        """None when the file is absent; .gz paths are decompressed."""
+        if not path or not os.path.isfile(path):
+            return None
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def covers(self, matcher: ThemeMatcher) -> bool:
+        return matcher.digest in self.masks
+
+    def mask(self, matcher: ThemeMatcher, native: Any, low_name: str) -> Optional[int]:
+        """Theme mask for a term, or None when the term (or this keyword set) is not in the table.
+        An ID hit is only used if the snapshot's name matches, since matching is on the name."""
+        masks = self.masks.get(matcher.digest)
+        if masks is None:
+            return None
+        row = self.by_id.get(native) if isinstance(native, str) else None
+        if row is None or self.names[row] != low_name:
+            row = self.by_name.get(low_name)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return masks[row]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "terms": len(self.names),
+            "maps": sorted(self.labels.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,221 @@
+"""Theme gene sets and the theme overlap network over one per-request gene universe.
+
+With T the term × gene matrix (each enriched term's intersection genes) and A the term × theme
+assignment matrix, theme × gene incidence is M = (Aᵀ T) > 0. For the network every theme row is
+packed into a bitset (one uint64 word per 64 genes), so all pairwise shared-gene counts are
+popcounts of ANDed words, and each pair's Jaccard index, overlap coefficient and hypergeometric
+p-value (BH-adjusted over all tested pairs) are computed in batch. Shared gene lists are only
+built for the edges that are returned.
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+import numpy as np
+from scipy import sparse
+from scipy.stats import hypergeom
+
+from local_enrichment import benjamini_hochberg
+
+# numpy < 2.0 has no bitwise_count; count bits of each byte through a table instead.
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits per row of a (rows × words) uint64 array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    return _BYTE_POPCOUNT[np.ascontiguousarray(words).view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+class GeneSetBits:
+    """Rows of a sets × genes incidence matrix packed as little-endian uint64 bitsets."""
+
+    def __init__(self, matrix: sparse.csr_matrix):
+        n_sets, n_genes = matrix.shape
+        n_words = max(1, -(-n_genes // 64))
+        packed = np.zeros((n_sets, n_words * 8), dtype=np.uint8)
+        if n_genes:
+            packed[:, : -(-n_genes // 8)] = np.packbits(matrix.toarray() > 0, axis=1, bitorder="little")
+        self.words = packed.view(np.uint64)
+        self.sizes = popcount(self.words)
+
+    def pairwise_shared(self) -> np.ndarray:
+        """Upper-triangular (i < j) matrix of shared-member counts."""
+        n = self.words.shape[0]
+        shared = np.zeros((n, n), dtype=np.int64)
+        for i in range(n - 1):
+            shared[i, i + 1:] = popcount(self.words[i] & self.words[i + 1:])
+        return shared
+
+
+def overlap_stats(
+    shared: np.ndarray, size_a: np.ndarray, size_b: np.ndarray, universe: int
+) -> Dict[str, np.ndarray]:
+    """Jaccard, overlap coefficient and P(X >= shared), X ~ Hypergeom(universe, size_a, size_b)."""
+    union = size_a + size_b - shared
+    jaccard = shared / np.maximum(union, 1)
+    overlap = shared / np.maximum(np.minimum(size_a, size_b), 1)
+    p = np.ones(shared.size)
+    hit = shared > 0
+    if hit.any():
+        triples, inverse = np.unique(
+            np.stack([shared[hit], size_a[hit], size_b[hit]]), axis=1, return_inverse=True
+        )
+        p[hit] = hypergeom.sf(triples[0] - 1, universe, triples[1], triples[2])[inverse.ravel()]
+    return {"jaccard": jaccard, "overlap_coefficient": overlap, "p_value": p}
+
+
+def _csr(rows: List[int], cols: List[int], shape) -> sparse.csr_matrix:
+    data = np.ones(len(rows), dtype=np.int32)
+    ij = (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))
+    return sparse.csr_matrix((data, ij), shape=shape)
+
+
+class ThemeGeneMatrix:
+    """Binary theme × gene incidence (CSR, sorted indices) with theme and gene labels."""
+
+    def __init__(self, themes: Sequence[str], genes: Sequence[str], matrix: sparse.csr_matrix):
+        genes = np.asarray(list(genes), dtype=object)
+        # Columns in symbol order, so any row's (sorted) indices list its genes sorted by name.
+        order = np.argsort(genes, kind="stable")
+        matrix = sparse.csr_matrix(matrix, dtype=np.int32)[:, order]
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        matrix.eliminate_zeros()
+        self.themes: List[str] = list(themes)
+        self.index: Dict[str, int] = {}
+        for i, t in enumerate(self.themes):
+            self.index.setdefault(t, i)
+        self.genes = genes[order]
+        self.matrix = matrix
+        self.sizes = np.diff(matrix.indptr)
+
+    @classmethod
+    def from_terms(
+        cls,
+        themes: Sequence[str],
+        term_themes: Sequence[Sequence[int]],
+        term_genes: Sequence[Sequence[str]],
+    ) -> "ThemeGeneMatrix":
+        """term_themes[r] holds indices into `themes` for term r, term_genes[r] its genes."""
+        gene_index: Dict[str, int] = {}
+        t_rows: List[int] = []
+        t_cols: List[int] = []
+        a_rows: List[int] = []
+        a_cols: List[int] = []
+        for r, (theme_ids, genes) in enumerate(zip(term_themes, term_genes)):
+            if not theme_ids or not genes:
+                continue
+            for g in genes:
+                t_rows.append(r)
+                t_cols.append(gene_index.setdefault(g, len(gene_index)))
+            a_rows.extend([r] * len(theme_ids))
+            a_cols.extend(theme_ids)
+        n_terms = len(term_genes)
+        term_gene = _csr(t_rows, t_cols, (n_terms, len(gene_index)))
+        term_theme = _csr(a_rows, a_cols, (n_terms, len(themes)))
+        return cls(themes, list(gene_index), (term_theme.T @ term_gene).tocsr())
+
+    @classmethod
+    def from_sets(
+        cls, theme_genes: Mapping[str, Iterable[str]], themes: Optional[Sequence[str]] = None
+    ) -> "ThemeGeneMatrix":
+        themes = list(theme_genes) if themes is None else list(themes)
+        gene_index: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+        for i, t in enumerate(themes):
+            for g in theme_genes.get(t) or ():
+                rows.append(i)
+                cols.append(gene_index.setdefault(g, len(gene_index)))
+        return cls(themes, list(gene_index), _csr(rows, cols, (len(themes), len(gene_index))))
+
+    def size(self, theme: str) -> int:
+        i = self.index.get(theme)
+        return 0 if i is None else int(self.sizes[i])
+
+    def _row(self, i: int) -> np.ndarray:
+        return self.matrix.indices[self.matrix.indptr[i]:self.matrix.indptr[i + 1]]
+
+    def gene_set(self, theme: str) -> Set[str]:
+        i = self.index.get(theme)
+        return set() if i is None else set(self.genes[self._row(i)].tolist())
+
+    def gene_sets(self) -> Dict[str, Set[str]]:
+        return {t: self.gene_set(t) for t in self.index}
+
+    def reindex(self, themes: Sequence[str], source: Optional[Mapping[str, str]] = None) -> "ThemeGeneMatrix":
+        """Rows for `themes` in that order; theme t takes the row of source.get(t, t) (empty if unknown)."""
+        source = source or {}
+        empty = len(self.themes)
+        padded = sparse.vstack(
+            [self.matrix, sparse.csr_matrix((1, len(self.genes)), dtype=np.int32)], format="csr"
+        )
+        rows = [self.index.get(source.get(t, t), empty) for t in themes]
+        return ThemeGeneMatrix(themes, self.genes, padded[rows])
+
+    def shared_genes(self, a: str, b: str) -> List[str]:
+        """Sorted symbols in both themes."""
+        return self.edge_genes([self.index[a]], [self.index[b]])[0]
+
+    def edge_genes(self, rows_a: Sequence[int], rows_b: Sequence[int]) -> List[List[str]]:
+        """Sorted shared symbols for each (rows_a[k], rows_b[k]) pair, from one elementwise product."""
+        if not len(rows_a):
+            return []
+        both = sparse.csr_matrix(self.matrix[list(rows_a)].multiply(self.matrix[list(rows_b)]))
+        both.eliminate_zeros()
+        both.sort_indices()
+        return [chunk.tolist() for chunk in np.split(self.genes[both.indices], both.indptr[1:-1])]
+
+    def overlap_network(
+        self,
+        theme_list: Optional[Sequence[str]] = None,
+        include_genes: bool = True,
+        universe_size: Optional[int] = None,
+        max_fdr: Optional[float] = None,
+    ) -> dict:
+        """Nodes for non-empty themes in `theme_list` order; edges (i < j) sharing at least one gene.
+
+        universe_size is the hypergeometric population (the request's query genes); it is never
+        taken smaller than the union of theme genes. max_fdr drops edges whose BH-adjusted
+        p-value (over every tested pair) exceeds it."""
+        candidates = self.themes if theme_list is None else theme_list
+        ordered = [t for t in dict.fromkeys(candidates) if self.size(t)]
+        rows = np.asarray([self.index[t] for t in ordered], dtype=np.int64)
+        bits = GeneSetBits(self.matrix[rows])
+        union = np.unique(self.matrix[rows].indices).size
+        universe = max(int(universe_size or 0), union)
+
+        src, dst = np.triu_indices(len(ordered), k=1)
+        shared = bits.pairwise_shared()[src, dst]
+        stats = overlap_stats(shared, bits.sizes[src], bits.sizes[dst], universe)
+        fdr = benjamini_hochberg(stats["p_value"])
+        keep = shared > 0
+        if max_fdr is not None:
+            keep &= fdr <= max_fdr
+        src, dst, shared, fdr = src[keep], dst[keep], shared[keep], fdr[keep]
+        stats = {k: v[keep] for k, v in stats.items()}
+
+        edges = [
+            {
+                "source": ordered[i],
+                "target": ordered[j],
+                "weight": int(shared[k]),
+                "jaccard": round(float(stats["jaccard"][k]), 4),
+                "overlap_coefficient": round(float(stats["overlap_coefficient"][k]), 4),
+                "p_value": float(stats["p_value"][k]),
+                "fdr": float(fdr[k]),
+            }
+            for k, (i, j) in enumerate(zip(src, dst))
+        ]
+        if include_genes:
+            for edge, genes in zip(edges, self.edge_genes(rows[src], rows[dst])):
+                edge["genes"] = genes
+        return {
+            "nodes": [{"id": t, "label": t} for t in ordered],
+            "edges": edges,
+            "min_shared": int(shared.min()) if shared.size else 0,
+            "max_shared": int(shared.max()) if shared.size else 0,
+            "universe_size": universe,
+            "tested_pairs": int(keep.size),
+        }
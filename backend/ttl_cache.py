@@ -0,0 +1,122 @@
+"""Thread-safe LRU cache with per-entry TTL and hit / latency counters."""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+_LATENCY_WINDOW = 2048
+
+
+def _percentiles_ms(samples: Deque[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50_ms": None, "p99_ms": None}
+    arr = np.fromiter(samples, dtype=np.float64) * 1000.0
+    p50, p99 = np.percentile(arr, [50, 99])
+    return {"p50_ms": round(float(p50), 4), "p99_ms": round(float(p99), 4)}
+
+
+class TTLCache:
+    """Bounded mapping; entries expire `ttl` seconds after insert (ttl <= 0 disables expiry)."""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 300.0):
+        self.name = name
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._hit_latency: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self._miss_latency: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires, value = entry
+        if self.ttl > 0 and expires < time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """(found, value) without loading; counts as a hit or miss."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return found, value
+
+    def peek(self, key: Hashable) -> Tuple[bool, Any]:
+        """Like get() but not counted, for re-checks of a lookup already recorded."""
+        with self._lock:
+            return self._lookup(key)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Read-through: return the cached value or call loader() and cache its result
+        (unless cacheable(result) is False, e.g. a degraded answer after a backend error)."""
+        start = time.perf_counter()
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                self._hit_latency.append(time.perf_counter() - start)
+                return value
+            self.misses += 1
+        value = loader()
+        if cacheable is None or cacheable(value):
+            self.put(key, value)
+        with self._lock:
+            self._miss_latency.append(time.perf_counter() - start)
+        return value
+
+    def observe(self, hit: bool, seconds: float) -> None:
+        """Record lookup latency for callers that wrap get() / put() themselves."""
+        with self._lock:
+            (self._hit_latency if hit else self._miss_latency).append(seconds)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_latency": _percentiles_ms(self._hit_latency),
+                "miss_latency": _percentiles_ms(self._miss_latency),
+            }
@@ -3,6 +3,7 @@
 import { useCallback, useEffect, useMemo, useRef, useState } from 'react';
 import { API_BASE_URL } from '@/lib/api-base';
 import {
+  fetchDatabaseGeneSymbols,
   fetchGeneListFromUrl,
   genesToTxtFile,
   parseGeneListText,
@@ -58,10 +59,8 @@ export function GeneListSelector({ onFileReady, onClear }: GeneListSelectorProps
     fetchGeneListFromUrl(SAMPLE_GENES_URL)
       .then(setSampleGenes)
       .catch(() => setSampleGenes([]));
-    fetch(`${API_BASE_URL}/api/gene/symbols`)
-      .then((r) => r.json())
-      .then((data) => {
-        const list = Array.isArray(data.gene_symbols) ? data.gene_symbols : [];
+    fetchDatabaseGeneSymbols(API_BASE_URL)
+      .then((list) => {
         setAllGenes([...list].sort((a, b) => a.localeCompare(b)));
       })
       .catch(() => setAllGenes([]));
@@ -113,9 +112,7 @@ export function GeneListSelector({ onFileReady, onClear }: GeneListSelectorProps
       if (kind === 'database') {
         let list = allGenes;
         if (list.length === 0) {
-          const res = await fetch(`${API_BASE_URL}/api/gene/symbols`);
-          const data = await res.json();
-          list = Array.isArray(data.gene_symbols) ? data.gene_symbols : [];
+          list = await fetchDatabaseGeneSymbols(API_BASE_URL);
           if (list.length === 0) throw new Error('No genes returned from database');
         }
         if (
@@ -29,6 +29,19 @@ export interface ThemeOverlapEdge {
   weight: number;
   /** Sorted gene symbols shared between the two themes (from API). */
   genes?: string[];
+  /** Overlap statistics (from API): hypergeometric p over the query genes, BH-adjusted as fdr. */
+  jaccard?: number;
+  overlap_coefficient?: number;
+  p_value?: number;
+  fdr?: number;
+}
+
+type EdgeOverlapStats = Pick<ThemeOverlapEdge, 'jaccard' | 'overlap_coefficient' | 'p_value' | 'fdr'>;
+
+function pickEdgeStats(edge: ThemeOverlapEdge | undefined): EdgeOverlapStats | undefined {
+  if (!edge || edge.p_value === undefined) return undefined;
+  const { jaccard, overlap_coefficient, p_value, fdr } = edge;
+  return { jaccard, overlap_coefficient, p_value, fdr };
 }
 
 export interface ThemeOverlapData {
@@ -201,6 +214,7 @@ type OverlapPairSelection = {
   targetLabel: string;
   weight: number;
   genes: string[];
+  stats?: EdgeOverlapStats;
 };
 
 function findOverlapEdge(
@@ -234,6 +248,18 @@ function SharedGenesAside({ pair, onClose }: { pair: OverlapPairSelection; onClo
           shared {pair.weight === 1 ? 'gene' : 'genes'}
         </span>
       </p>
+      {pair.stats && (
+        <dl className="mt-2 grid grid-cols-2 gap-x-3 gap-y-0.5 text-xs text-gray-700">
+          <dt>Jaccard</dt>
+          <dd className="tabular-nums">{pair.stats.jaccard?.toFixed(3)}</dd>
+          <dt>Overlap coeff.</dt>
+          <dd className="tabular-nums">{pair.stats.overlap_coefficient?.toFixed(3)}</dd>
+          <dt>p (hypergeom.)</dt>
+          <dd className="tabular-nums">{pair.stats.p_value?.toExponential(2)}</dd>
+          <dt>FDR</dt>
+          <dd className="tabular-nums">{pair.stats.fdr?.toExponential(2)}</dd>
+        </dl>
+      )}
       {pair.genes.length > 0 ? (
         <ul className="mt-3 max-h-[min(480px,55vh)] space-y-1 overflow-y-auto rounded-lg border border-white/90 bg-white px-3 py-2 font-mono text-xs text-gray-900 shadow-inner">
           {pair.genes.map((symbol) => (
@@ -448,6 +474,7 @@ export default function ThemeOverlapNetwork({ data, loading, className = '' }: T
             target: e.target,
             weight: w,
             genes,
+            stats: pickEdgeStats(e),
             lineColor,
             lineWidth,
           },
@@ -557,6 +584,7 @@ export default function ThemeOverlapNetwork({ data, loading, className = '' }: T
           targetLabel: idToLabel[targetId] ?? targetId,
           weight,
           genes,
+          stats: edge.data('stats') as EdgeOverlapStats | undefined,
         });
         instance.elements().removeClass('highlight');
         instance.elements().unselect();
@@ -575,6 +603,7 @@ export default function ThemeOverlapNetwork({ data, loading, className = '' }: T
           targetLabel: idToLabel[targetId] ?? targetId,
           weight,
           genes,
+          stats: edge.data('stats') as EdgeOverlapStats | undefined,
         });
       });
 
@@ -1171,6 +1200,7 @@ export default function ThemeOverlapNetwork({ data, loading, className = '' }: T
                                   targetLabel: tgtNode?.label ?? idB,
                                   weight: r.weight,
                                   genes: edgeRow?.genes ?? [],
+                                  stats: pickEdgeStats(edgeRow),
                                 });
                               }}
                               onKeyDown={(e) => {
@@ -1191,6 +1221,7 @@ export default function ThemeOverlapNetwork({ data, loading, className = '' }: T
                                   targetLabel: tgtNode?.label ?? idB,
                                   weight: r.weight,
                                   genes: edgeRow?.genes ?? [],
+                                  stats: pickEdgeStats(edgeRow),
                                 });
                               }}
                               role="button"
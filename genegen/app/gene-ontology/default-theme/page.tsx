@@ -91,13 +91,16 @@ export default function DefaultTheme() {
 
     try {
       console.log('API proxy base:', API_BASE_URL || '(same-origin)');
-      console.log('Making request to:', `/api/ontology/analyze (→ ${API_PUBLIC_BASE_URL})`);
+      console.log('Making request to:', `/api/ontology/bundle (→ ${API_PUBLIC_BASE_URL})`);
       console.log('Selected file:', selectedFile.name, 'Size:', selectedFile.size);
       
+      // One request for theme results + summary chart (enrichment runs once on the server).
       const formData = new FormData();
       formData.append('file', selectedFile);
+      formData.append('include_network', 'false');
+      appendChartStyleToFormData(formData, summaryChartStyle, 'png', { isSummary: true });
       
-      const response = await fetch(`${API_BASE_URL}/api/ontology/analyze`, {
+      const response = await fetch(`${API_BASE_URL}/api/ontology/bundle`, {
         method: 'POST',
         body: formData,
       });
@@ -117,12 +120,11 @@ export default function DefaultTheme() {
       if (data.results && Array.isArray(data.results)) {
         setResults(data.results);
         setCurrentStep(3);
-        
-        // Generate summary chart
-        console.log('Starting summary chart generation...');
-        setSummaryChartLoading(true);
-        await generateSummaryChart(summaryChartStyle, 'png');
-        setSummaryChartLoading(false);
+        if (data.summary_chart?.chart) {
+          setSummaryChart(
+            chartResponseToDataUrl(data.summary_chart.chart, 'png', data.summary_chart.media_type),
+          );
+        }
       } else {
         console.error('Invalid response format:', data);
         setError('Invalid response format from server');
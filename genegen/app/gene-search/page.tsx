@@ -10,12 +10,12 @@ interface GeneData {
   organ: string;
   gene_symbol: string;
   gene_name: string;
-  p_value: string;
-  fdr_step_up: string;
-  ratio: string;
-  fold_change: string;
-  lsmean_10mgkg: string;
-  lsmean_control: string;
+  p_value: number | null;
+  fdr_step_up: number | null;
+  ratio: number | null;
+  fold_change: number | null;
+  lsmean_10mgkg: number | null;
+  lsmean_control: number | null;
 }
 
 interface SearchResponse {
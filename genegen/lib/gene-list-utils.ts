@@ -21,3 +21,19 @@ export async function fetchGeneListFromUrl(url: string): Promise<string[]> {
   if (!res.ok) throw new Error(`Failed to load gene list (${res.status})`);
   return parseGeneListText(await res.text());
 }
+
+/**
+ * All database gene symbols. Asks for the current version (tiny), then fetches the
+ * versioned immutable URL, which the browser cache serves without a network transfer
+ * until the list changes.
+ */
+export async function fetchDatabaseGeneSymbols(apiBaseUrl: string): Promise<string[]> {
+  const versionRes = await fetch(`${apiBaseUrl}/api/gene/symbols/version`);
+  const url = versionRes.ok
+    ? `${apiBaseUrl}${(await versionRes.json()).url}`
+    : `${apiBaseUrl}/api/gene/symbols`;
+  const res = await fetch(url);
+  if (!res.ok) throw new Error(`Failed to load gene symbols (${res.status})`);
+  const data = await res.json();
+  return Array.isArray(data.gene_symbols) ? data.gene_symbols : [];
+}